@@ -1,364 +1,97 @@
 import logging
 import os
-import json
-import glob
-import pyperclip
-from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, StaleElementReferenceException, NoSuchElementException
 import time
-
-# Ensure directories exist
-os.makedirs('D:\\Documents\\AutoSDLC\\logs', exist_ok=True)
-os.makedirs('D:\\Documents\\AutoSDLC\\Downloads', exist_ok=True)
-
-# Set up logging with timestamped archive
-current_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-log_file = f'D:\\Documents\\AutoSDLC\\logs\\analyze_requirements_{current_time}.log'
-logging.basicConfig(
-    filename=log_file,
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
-console = logging.StreamHandler()
-console.setLevel(logging.INFO)
-formatter = logging.Formatter('%(levelname)s - %(message)s')
-console.setFormatter(formatter)
-logging.getLogger('').addHandler(console)
-
-logging.info("Ensured log and download directories exist")
-
-# Chrome options
-chrome_options = Options()
+from datetime import datetime
+from grok_browser import open_grok
+from result_store import issue_key
+from artifact_store import ArtifactStore
+from llm_cache import LLMCache, hash_text
+from batch_prompting import BEGIN_MARKER, batch_size_from_env, run_batched, split_batch_response
+from chat_export import ExportIndex, export_chat
+from session_pool import GrokSession
+from llm_backend import backend_kind, create_backend, run_with_backend
+from browser_daemon import connect_browser, release_browser
+from structured_log import log_context, log_event, setup_logging
+
+# Bump when the analysis prompt changes so cached responses are not reused
+ANALYSIS_PROMPT_VERSION = 1
+# Requirements packed into one prompt; 1 sends one prompt per requirement
+ANALYSIS_BATCH_SIZE = batch_size_from_env("ANALYSIS_BATCH_SIZE")
+
+# Chrome profile, used when no browser daemon is running (see browser_daemon.py)
 user_data_dir = r"C:\Users\Irika\AppData\Local\Google\Chrome\User Data"
 profile_directory = "Default"
-chrome_options.add_argument(f"--user-data-dir={user_data_dir}")
-chrome_options.add_argument(f"--profile-directory={profile_directory}")
-chrome_options.add_experimental_option("prefs", {
-    "download.default_directory": r"D:\Documents\AutoSDLC\Downloads",
-    "download_prompt_for_download": False,
-    "download.directory_upgrade": True,
-    "safebrowsing.enabled": True
-})
-
-# Initialize driver
-driver = webdriver.Chrome(options=chrome_options)
-logging.info("Initialized Chrome driver")
-
-def get_fresh_element(driver, by, value, timeout=20, max_retries=3):
-    """Locate elements with retries, ensuring they are interactable."""
-    for attempt in range(max_retries):
-        try:
-            element = WebDriverWait(driver, timeout).until(
-                EC.element_to_be_clickable((by, value))
-            )
-            if element.is_displayed() and element.is_enabled():
-                driver.execute_script("arguments[0].scrollIntoView(true);", element)
-                element.click()  # Ensure focus for textareas
-                logging.info(f"Located and focused element: {value}")
-                return element
-            else:
-                raise TimeoutException("Element not interactable")
-        except TimeoutException:
-            logging.warning(f"Retry {attempt + 1}/{max_retries} for element {value}")
-            if attempt == max_retries - 1:
-                with open('D:\\Documents\\AutoSDLC\\logs\\page_source.html', 'w', encoding='utf-8') as f:
-                    f.write(driver.page_source)
-                logging.error(f"Failed to locate interactable element: {value}. Page source saved")
-                return None
-            time.sleep(2)
-    return None
-
-def check_for_login_page(driver):
-    """Check for login page and prompt for manual login."""
-    if "login" in driver.current_url.lower():
-        logging.warning("Detected login page. Manual login required.")
-        print("Login page detected. Please log in manually, then press Enter...")
-        input("Press Enter after logging in...")
-        WebDriverWait(driver, 20).until(
-            lambda d: "grok" in d.current_url.lower()
-        )
-        logging.info("Redirected to Grok Chat UI after login")
-
-def get_latest_export():
-    """Get the latest exported JSON file from the Downloads folder."""
-    files = glob.glob(r"D:\Documents\AutoSDLC\Downloads\*.json")
-    if not files:
-        return None
-    latest_file = max(files, key=os.path.getctime)
-    with open(latest_file, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-def wait_for_clipboard_update(initial_content, max_wait=10):
-    """Poll for clipboard update instead of fixed delay."""
-    start_time = time.time()
-    while time.time() - start_time < max_wait:
-        current_content = pyperclip.paste()
-        if current_content != initial_content:
-            logging.info("Clipboard updated successfully")
-            return current_content
-        time.sleep(0.5)
-    raise Exception("Clipboard did not update within max wait time")
-
-def wait_for_copy_text_button(driver, prompt_count, max_wait=120):
-    """Wait for the correct number of Copy text buttons and return the latest one."""
-    start_time = time.time()
-    last_log_time = start_time
-
-    while time.time() - start_time < max_wait:
-        try:
-            page_buttons = driver.find_elements(By.XPATH, "//button[@aria-label]")
-            copy_text_buttons = [btn for btn in page_buttons if "copy text" in btn.get_attribute("aria-label").lower()]
-            
-            current_time = time.time()
-            if current_time - last_log_time >= 10 or len(copy_text_buttons) == prompt_count:
-                if len(copy_text_buttons) == prompt_count:
-                    logging.info(f"Found {len(copy_text_buttons)} Copy text buttons, matches prompt count {prompt_count}")
-                    return copy_text_buttons[-1]
-                else:
-                    logging.info(f"Found {len(copy_text_buttons)} Copy text buttons, expected {prompt_count}. Waiting...")
-                last_log_time = current_time
-            time.sleep(1)
-        except StaleElementReferenceException:
-            logging.warning("Stale element in button check, retrying")
-            time.sleep(1)
-
-    logging.error("Copy text button not found with correct prompt count within max wait time")
-    return None
-
-def send_prompt_and_copy_response(driver, prompt, prompt_count):
-    """Send a prompt, verify it's sent, click Copy text, and retrieve the response from the clipboard."""
-    text_input = get_fresh_element(driver, By.XPATH, "//textarea[@placeholder='Ask anything']")
-    if not text_input:
-        raise Exception("Text input field not found")
-
-    # Clear the textarea and send the prompt
-    text_input.clear()
-    prompt_parts = prompt.split("\n")
-    for i, part in enumerate(prompt_parts):
-        text_input.send_keys(part)
-        if i < len(prompt_parts) - 1:
-            text_input.send_keys(Keys.SHIFT + Keys.RETURN)
-    text_input.send_keys(Keys.RETURN)
-    logging.info("Prompt submitted")
-
-    # Verify the prompt appears in the chat
-    issue_number = prompt.split(":")[1].strip().split(" ")[0] + " " + prompt.split(":")[1].strip().split(" ")[1]
-    prompt_selector = f"//div[contains(@class, 'r-a8ghvy') and contains(., '{issue_number}')]"
-    max_wait = 20
-    start_time = time.time()
-    while time.time() - start_time < max_wait:
-        try:
-            prompt_element = driver.find_element(By.XPATH, prompt_selector)
-            logging.info("Prompt verified in chat")
-            break
-        except NoSuchElementException:
-            logging.info("Prompt not yet in chat, waiting...")
-            time.sleep(1)
-    else:
-        with open('D:\\Documents\\AutoSDLC\\logs\\page_source_prompt_failure.html', 'w', encoding='utf-8') as f:
-            f.write(driver.page_source)
-        raise Exception("Prompt failed to appear in chat after submission. Page source saved for debugging.")
-
-    # Wait for the Copy text button and copy the response
-    copy_button = wait_for_copy_text_button(driver, prompt_count)
-    if not copy_button:
-        raise Exception("Failed to locate Copy text button")
-
-    # Use polling for clipboard update
-    response = None
-    pyperclip.copy("")  # Clear the clipboard
-    initial_content = pyperclip.paste()
-    for attempt in range(3):
-        try:
-            driver.execute_script("arguments[0].scrollIntoView(true);", copy_button)
-            copy_button.click()
-            response = wait_for_clipboard_update(initial_content)
-            logging.info(f"Clipboard content after attempt {attempt + 1}: '{response[:50]}...'")
-            if response and prompt not in response and "import logging" not in response and len(response) > 50:
-                logging.info("Clipboard capture successful")
-                break
-            logging.warning(f"Clipboard content not updated correctly (attempt {attempt + 1}/3), retrying...")
-        except Exception as e:
-            logging.warning(f"Native click failed (attempt {attempt + 1}/3): {e}, trying JavaScript click...")
-            try:
-                driver.execute_script("arguments[0].click();", copy_button)
-                response = wait_for_clipboard_update(initial_content)
-                logging.info(f"Clipboard content after JS attempt {attempt + 1}: '{response[:50]}...'")
-                if response and prompt not in response and "import logging" not in response and len(response) > 50:
-                    logging.info("Clipboard capture successful via JS click")
-                    break
-                logging.warning(f"Clipboard content not updated after JS click (attempt {attempt + 1}/3), retrying...")
-            except Exception as e2:
-                logging.warning(f"JS click failed (attempt {attempt + 1}/3): {e2}, retrying...")
-    else:
-        logging.warning("Clipboard method failed, falling back to DOM scraping")
-        message_selector = "//div[contains(@class, 'r-a8ghvy')]"
-        messages = driver.find_elements(By.XPATH, message_selector)
-        if not messages:
-            raise Exception("No messages found for DOM scraping fallback")
-
-        end_index = 0
-        for i, msg in enumerate(messages):
-            try:
-                buttons_in_msg = msg.find_elements(By.XPATH, ".//button[translate(@aria-label, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')='copy text']")
-                page_buttons = driver.find_elements(By.XPATH, "//button[@aria-label]")
-                copy_text_buttons = [btn for btn in page_buttons if "copy text" in btn.get_attribute("aria-label").lower()]
-                current_copy_button = copy_text_buttons[prompt_count - 1]
-                if any(btn == current_copy_button for btn in buttons_in_msg):
-                    end_index = i
-                    break
-            except StaleElementReferenceException:
-                continue
-        else:
-            raise Exception("Could not locate current Copy text button for DOM scraping")
-
-        full_text_parts = []
-        seen_texts = set()
-        msg = messages[end_index]
-        text_elements = msg.find_elements(By.XPATH, ".//*[text()]")
-        for elem in text_elements:
-            text = elem.text.strip()
-            normalized_text = " ".join(text.lower().split())
-            if text and normalized_text not in seen_texts:
-                full_text_parts.append(text)
-                seen_texts.add(normalized_text)
-        response = " ".join(full_text_parts).strip()
-        if not response:
-            raise Exception("Failed to capture response via DOM scraping")
-
-    logging.info(f"Captured response text length: {len(response)} chars")
-    logging.info(f"Captured response text: {response}")
-    return response
-
-def export_chat(driver, max_retries=3):
-    """Export chat history with dynamic wait for file."""
-    for attempt in range(max_retries):
-        try:
-            export_button = get_fresh_element(driver, By.XPATH, "//span[normalize-space()='Export session']")
-            if not export_button:
-                raise Exception("Export session button not found")
-            time.sleep(5)
-            
-            with open(f'D:\\Documents\\AutoSDLC\\logs\\page_source_export_attempt_{attempt + 1}.html', 'w', encoding='utf-8') as f:
-                f.write(driver.page_source)
-            
-            json_button = None
-            try:
-                json_button = get_fresh_element(driver, By.XPATH, "//div[contains(@class, 'export-option') and @data-format='json']", timeout=30)
-            except Exception as e:
-                logging.warning(f"Primary JSON export XPath failed: {e}, trying fallback XPath")
-                json_button = get_fresh_element(driver, By.XPATH, "//div[contains(@class, 'export-option') and contains(text(), 'JSON')]", timeout=30)
-            
-            if not json_button:
-                driver.save_screenshot(f'D:\\Documents\\AutoSDLC\\logs\\export_failure_attempt_{attempt + 1}.png')
-                raise Exception("JSON export option not found")
-            
-            driver.execute_script("arguments[0].scrollIntoView(true);", json_button)
-            driver.execute_script("arguments[0].click();", json_button)
-            
-            # Dynamic wait for download
-            start_time = time.time()
-            while time.time() - start_time < 30:
-                if glob.glob(r"D:\Documents\AutoSDLC\Downloads\*.json"):
-                    logging.info("Exported session to JSON")
-                    return True
-                time.sleep(1)
-            raise Exception("JSON file not found in Downloads after export")
-        except Exception as e:
-            logging.error(f"Export attempt {attempt + 1} failed: {e}")
-            if attempt == max_retries - 1:
-                return False
-            time.sleep(2)
-    return False
-
-try:
-    driver.get("https://x.com/i/grok")
-    logging.info("Opened Grok Chat UI")
-    check_for_login_page(driver)
-    
-    WebDriverWait(driver, 20).until(
-        EC.presence_of_element_located((By.XPATH, "//textarea[@placeholder='Ask anything']"))
-    )
-
-    with open("requirements.txt", "r", encoding="utf-8") as f:
-        requirements = f.read().splitlines()
-
-    prompt_count = 0
-    with open("analyzed_requirements.txt", "w", encoding="utf-8") as f_txt, \
-         open("analyzed_requirements.md", "w", encoding="utf-8") as f_md:
-        for req in requirements:
-            prompt_count += 1
-            print(f"Analyzing: {req}")
-            logging.info(f"Analyzing requirement: {req}")
-            
-            response = send_prompt_and_copy_response(driver, f"Analyze this requirement: {req}", prompt_count)
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            # Write the initial response
-            f_txt.write(f"{req}\nTimestamp: {timestamp}\nAnalysis: {response}\n\n")
-            f_md.write(f"## {req}\n\n**Timestamp:** {timestamp}\n\n{response}\n\n")
-            
-            # Export and verify
-            if export_chat(driver):
-                export_data = get_latest_export()
-                if export_data:
-                    latest_response = None
-                    for entry in reversed(export_data):
-                        if entry.get("role") == "assistant" and req in entry.get("content", ""):
-                            latest_response = entry.get("content")
-                            break
-                    if latest_response and latest_response != response:
-                        logging.info(f"Export matches requirement, updating response")
-                        response = latest_response
-                        # Clear the file and rewrite with corrected responses
-                        f_txt.seek(0)
-                        f_txt.truncate()
-                        f_md.seek(0)
-                        f_md.truncate()
-                        # Re-read requirements to rewrite the file
-                        with open("requirements.txt", "r", encoding="utf-8") as f_reread:
-                            reread_reqs = f_reread.read().splitlines()
-                        temp_prompt_count = 0
-                        for reread_req in reread_reqs:
-                            temp_prompt_count += 1
-                            temp_response = response if reread_req == req else send_prompt_and_copy_response(driver, f"Analyze this requirement: {reread_req}", temp_prompt_count)
-                            temp_timestamp = timestamp if reread_req == req else datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                            f_txt.write(f"{reread_req}\nTimestamp: {temp_timestamp}\nAnalysis: {temp_response}\n\n")
-                            f_md.write(f"## {reread_req}\n\n**Timestamp:** {temp_timestamp}\n\n{temp_response}\n\n")
-                    elif not latest_response:
-                        logging.info("Export found but no matching response, keeping clipboard/DOM response")
-                    else:
-                        logging.info("Export matches clipboard/DOM, no update needed")
-                else:
-                    logging.warning("No export data found, keeping clipboard/DOM response")
-            else:
-                logging.warning("Failed to export chat history, keeping clipboard/DOM response")
 
-            print(f"Analysis for '{req}' saved.")
-            logging.info(f"Analysis for '{req}' saved.")
-
-    if export_chat(driver):
-        print("Chat history exported to D:\\Documents\\AutoSDLC\\Downloads")
-        logging.info("Chat history exported successfully")
-    else:
-        print("Failed to export chat history")
-        logging.error("Failed to export chat history")
-
-finally:
-    if 'driver' in locals():
-        time.sleep(2)
-        driver.quit()
-        print("Browser closed.")
-        logging.info("Browser closed.")
+def send_prompt_and_copy_response(backend, prompt):
+    """Send a prompt through the LLM backend and return the response text."""
+    start = time.perf_counter()
+    response = backend.complete(prompt)
+    # The text itself goes to the blob directory; the log line only references it
+    log_event("response", f"Captured response text: {len(response)} chars", time.perf_counter() - start, response)
+    return response
 
-# Documentation in a README file
-readme_content = """# AutoSDLC Requirement Analysis Script
+def verify_against_export(index, sent, store, cache):
+    """Replace stored analyses that differ from the exported answer to the same prompt.
+
+    sent holds (prompt, requirements) for every prompt of the exported chat; a
+    prompt covering several requirements is a batch and is split again.
+    """
+    updated = 0
+    for prompt, reqs in sent:
+        exported = index.response_for(prompt)
+        if exported is None:
+            logging.info(f"No exported response for the prompt covering {', '.join(issue_key(r) for r in reqs)}")
+            continue
+        if len(reqs) > 1 or BEGIN_MARKER.format(key="<key>") in prompt:  # A batch prompt, even when of one requirement
+            answers, _ = split_batch_response(exported, [issue_key(r) for r in reqs])
+        else:
+            answers = {issue_key(reqs[0]): exported}
+        for req in reqs:
+            key = issue_key(req)
+            record = store.get(key, "analyze")
+            analysis = answers.get(key)
+            if analysis and record and record["content"] != analysis:
+                logging.info(f"Export differs from captured response, replacing record for {key}")
+                store.put(key, "analyze", analysis, prompt_hash=record["prompt_hash"], latency=record["latency"],
+                          attempts=record["attempts"], timestamp=record["produced_at"], requirement=req)
+                cache.put("analysis", ANALYSIS_PROMPT_VERSION, req, analysis)
+                updated += 1
+    logging.info(f"Verified {len(sent)} prompts against the export, {updated} analyses replaced")
+
+def analysis_inputs(req):
+    """What an analysis is built from, for the build manifest."""
+    return {"requirement": hash_text(req), "version": ANALYSIS_PROMPT_VERSION}
+
+def reuse_cached_analysis(req, store, cache):
+    """Return the cached analysis of req (storing it if the store lacks it), or None."""
+    cached = cache.get("analysis", ANALYSIS_PROMPT_VERSION, req)
+    if cached is not None:
+        # Keep the stored timestamp when the cached analysis is already there
+        previous = store.get(issue_key(req), "analyze")
+        if not previous or previous["content"] != cached:
+            store.put(issue_key(req), "analyze", cached, attempts=0, requirement=req)
+        print(f"Analysis for '{req}' reused from cache.")
+    return cached
+
+def analyze_requirement(backend, req, store, cache):
+    """Prompt for one requirement, store the analysis and return (prompt, analysis)."""
+    print(f"Analyzing: {req}")
+    logging.info(f"Analyzing requirement: {req}")
+
+    prompt = f"Analyze this requirement: {req}"
+    start = time.perf_counter()
+    with log_context("analyze", issue_key(req)):
+        response = send_prompt_and_copy_response(backend, prompt)
+    store.put(issue_key(req), "analyze", response, prompt_hash=hash_text(prompt), latency=time.perf_counter() - start,
+              requirement=req)
+
+    cache.put("analysis", ANALYSIS_PROMPT_VERSION, req, response)
+    print(f"Analysis for '{req}' saved.")
+    logging.info(f"Analysis for '{req}' saved.")
+    return prompt, response
+
+# Documentation written to README.md on every run
+README_CONTENT = """# AutoSDLC Requirement Analysis Script
 
 This script automates the analysis of software requirements using Grok Chat UI on X.
 
@@ -370,10 +103,11 @@ This script automates the analysis of software requirements using Grok Chat UI o
 5. Run: `python analyze_requirements.py`
 
 ## Output
-- Plain text analyses: `analyzed_requirements.txt`
-- Markdown analyses: `analyzed_requirements.md`
-- Chat history: JSON files in `D:\\Documents\\AutoSDLC\\Downloads`
-- Logs: Timestamped files in `D:\\Documents\\AutoSDLC\\logs`
+- Artifact store: `artifacts.db` (SQLite) holds every issue and each stage's output with its prompt hash, LLM latency and attempts; `python artifact_store.py list`, `show 'Issue #3'` or `export` (rewrites the files below)
+- Plain text analyses: `analyzed_requirements.txt` (exported from the store)
+- Markdown analyses: `analyzed_requirements.md` (exported from the store)
+- Chat history: one JSON export per run in `D:\\Documents\\AutoSDLC\\Downloads`, listed by run in `export_manifest.jsonl`
+- Logs: one JSONL file per script in `D:\\Documents\\AutoSDLC\\logs`, rotated by size, with responses and page sources in `logs\\blobs`
 
 ## Dependencies
 - Python 3.x
@@ -382,7 +116,132 @@ This script automates the analysis of software requirements using Grok Chat UI o
 
 ## Notes
 - Ensure you're logged into X/Grok before running.
-- Logs are archived with timestamps for each run.
+- Log files are rotated at `LOG_MAX_BYTES` (default 5 MB), keeping 5.
+- Set `LLM_BACKEND=http` (with `LLM_API_URL`, `LLM_API_KEY`, `LLM_MODEL`) to use an OpenAI/xAI-compatible API instead of the browser. `python stub_llm_server.py` serves an offline stand-in.
+- `fetch_requirements.py --api-url` points the issue sync at another GitHub API; `python stub_github_server.py` serves an offline stand-in, which `test_fetch_requirements.py` uses to test pagination, the ETag 304 and the `since` delta.
+- Prompts are put into the chat box in one script call; set `PROMPT_INPUT_MODE=cdp` to use CDP `Input.insertText` or `PROMPT_INPUT_MODE=keys` for the old keystroke typing. `python bench_prompt_input.py` compares them.
+- `python browser_daemon.py` keeps warm, logged-in Chrome sessions (`--sessions N`) that all stage scripts attach to instead of starting Chrome; `python browser_daemon.py status` / `stop` manage it, and `BROWSER_DAEMON=off` disables attaching.
+- `python pipeline.py` runs analyze → design → code → tests per issue, so early issues reach testing while later ones are still being analyzed; `--concurrency analyze=2,design=2,code=2,tests=2` sets workers per stage and `--queue-size` bounds the work waiting between stages.
+- `build_manifest.jsonl` records the input and output hashes of every stage per issue; the pipeline and stage scripts skip stages whose inputs and outputs are unchanged. `python pipeline.py plan` lists what would rerun and `--force 'Issue #3'` rebuilds one issue.
+- Browser chats are rotated after `CHAT_MAX_PROMPTS` responses (default 20) or once the page holds more than `CHAT_MAX_DOM_NODES` elements (default 20000); 0 disables a limit. The analysis chat is exported and verified before each rotation.
+- The design, code and test stages take their ```plantuml / ```javascript block as soon as it is complete instead of waiting for the rest of the answer (the HTTP backend streams and closes the request there). `STREAM_CAPTURE=0` waits for full answers; `STOP_AFTER_BLOCK=1` also stops Grok's generation once the block is captured. The first prompt of a browser chat always waits for the full answer.
+- Diagrams are rendered by `plantuml_renderer.py` on its own pool of warm `plantuml -pipe` processes (`PLANTUML_WORKERS`, default 2) while prompting continues; diagrams whose .puml is unchanged since their image was written are skipped, and the per-diagram render times are logged. `python plantuml_renderer.py [--batch] [--format svg] [--force]` re-renders the designs directory, `--batch` in one JVM run.
+- Every generated diagram is parsed in process by `plantuml_model.py` before it is written; a diagram with syntax errors is sent back to the LLM with the exact line errors (up to 2 times) instead of failing in Java. `python plantuml_model.py designs/*.puml [--json]` checks files and prints the parsed classes and relationships.
+- Code blocks are cut out of responses by one tokenizer (`code_blocks.py`) that finds every fenced block with its language tag and offsets in a single pass; each stage declares which block it wants (tags, untagged fences, the block holding `describe(` or `@startuml`). `python bench_code_blocks.py [check|bench]` checks it against the exported chats in `Downloads` and times it against the old regexes.
+- Generated modules are checked before they are saved by `js_checker.py` on warm Node workers (`node_check_worker.js`, `NODE_CHECK_WORKERS`, default 1): each is compiled, its requires resolved and its top-level code run in an isolated context with inert stand-ins for required packages and for the builtins that write files, open sockets or start processes, in a few milliseconds. A module that fails to compile or load, or exports nothing, is sent back to the LLM with the exact errors (up to 2 times). `python js_checker.py src/*.js [--json]` checks files.
+- The test debug loop runs only the test file being refined, on a warm Jest process (`jest_runner.py`, `jest_worker.js`) started once per run, with no pytest/PowerShell/npx in between; Jest's `--json` results are parsed into per-test pass/fail/duration records. `python run_tests.py [files]` and `python jest_runner.py [files] [--json]` use the same runner.
+- Each issue's tests run in a workspace of their own under the temp directory (`jest_sandbox.py`: the src/ modules, only that issue's test and a linked `node_modules`), so another issue's broken test no longer fails its iteration, and several issues run at once on warm Jest workers (`TEST_WORKERS`, default one per core). Results are cached in `test_results.jsonl` by source, test and package.json hash, so an unchanged pair never runs twice. `python jest_sandbox.py [--workers N] [--no-cache]` tests every issue this way.
+- Debug prompts carry only what the LLM needs to fix a failing test (`failure_minimizer.py`): the failing test names, their assertion diffs and the first stack frame outside `node_modules`, with tests failing the same way reported once, cut to `DEBUG_OUTPUT_BUDGET` characters (default 3000). Each iteration logs how much smaller the output got. `python failure_minimizer.py results.json` shrinks a saved `jest --json` report.
+- Only the tests a change can affect need to run (`jest_impact.py`): the `require`/`import` graph of `src/` and `tests/` is parsed once per file version into `import_graph.jsonl`, and every test run is recorded in `test_runs.jsonl` with the hashes of the modules it reached. `python run_tests.py --changed` and `python generate_tests.py --changed` run only the tests that failed or reach a module changed since their last run; `python jest_impact.py src/Issue_3.js` lists the tests a change to that module affects. The test results cache covers the same modules, so a test is run again when a module it requires changes.
+- Logging goes through a queue to a background thread (`structured_log.py`), so file and console writes stay out of the prompt loop. Each script writes JSONL records (time, stage, issue, event, duration, message) to `logs\\<script>.jsonl`, rotated at `LOG_MAX_BYTES`. Responses and page sources are stored once, gzipped, in `logs\\blobs` under their sha256, and records reference them by hash. `python structured_log.py events logs\\pipeline.jsonl --issue 'Issue #3'` filters a log; `python structured_log.py show <hash>` prints a stored response.
 """
-with open("README.md", "w", encoding="utf-8") as f:
-    f.write(readme_content)
\ No newline at end of file
+
+def main():
+    # Ensure directories exist
+    os.makedirs('D:\\Documents\\AutoSDLC\\logs', exist_ok=True)
+    os.makedirs('D:\\Documents\\AutoSDLC\\Downloads', exist_ok=True)
+
+    # One JSONL log rotated by size instead of a file per run; responses are kept as blobs (see structured_log.py)
+    setup_logging("analyze", "analyze_requirements")
+    current_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")  # Names this run's chat exports
+
+    logging.info("Ensured log and download directories exist")
+
+    # Attach to a warm daemon session or start Chrome; the HTTP backend (LLM_BACKEND=http) does not need a browser
+    driver, lease = None, None
+    if backend_kind() == "browser":
+        driver, lease = connect_browser(user_data_dir, profile_directory, download_dir=r"D:\Documents\AutoSDLC\Downloads")
+
+    backend = None
+    try:
+        primary = None
+        if driver is not None:
+            open_grok(driver)
+            primary = GrokSession(0, driver, lease)
+        backend = create_backend(primary)
+
+        with open("requirements.txt", "r", encoding="utf-8") as f:
+            requirements = f.read().splitlines()
+
+        store = ArtifactStore()
+        cache = LLMCache()
+        # (prompt, requirements) sent in the primary browser's current chat, checked against its export
+        sent = []
+        exports = 0
+
+        def export_and_verify():
+            """Export the primary browser's chat and check the analyses sent in it."""
+            nonlocal exports
+            exports += 1
+            export_path = export_chat(driver, current_time if exports == 1 else f"{current_time}_{exports}")
+            if export_path:
+                print(f"Chat history exported to {export_path}")
+                verify_against_export(ExportIndex.load(export_path), sent, store, cache)
+            else:
+                print("Failed to export chat history")
+                logging.error("Failed to export chat history, keeping captured responses")
+            sent.clear()
+
+        if primary is not None:
+            primary.before_new_chat = export_and_verify  # The chat is exported before it is rotated
+        pending = [req for req in requirements if reuse_cached_analysis(req, store, cache) is None]
+
+        if ANALYSIS_BATCH_SIZE > 1 and pending:
+            batch_prompts = {}
+
+            def send_batch(prompt):
+                start = time.perf_counter()
+                response = send_prompt_and_copy_response(backend, prompt)
+                batch_prompts[prompt] = time.perf_counter() - start
+                if primary is not None:
+                    sent.append((prompt, [req for req in pending if f"\n{req}" in prompt]))  # Only this batch's
+                return response
+
+            logging.info(f"Analyzing {len(pending)} requirements in batches of {ANALYSIS_BATCH_SIZE}")
+            results, failed = run_batched([(issue_key(req), req) for req in pending], send_batch,
+                                          "Analyze each of these requirements", ANALYSIS_BATCH_SIZE)
+            for req in pending:
+                analysis = results.get(issue_key(req))
+                if analysis:
+                    # The last batch prompt listing this requirement is the one its answer came from
+                    prompt = next((p for p in reversed(list(batch_prompts)) if f"\n{req}" in p), None)
+                    store.put(issue_key(req), "analyze", analysis, prompt_hash=hash_text(prompt) if prompt else None,
+                              latency=batch_prompts.get(prompt), requirement=req)
+                    cache.put("analysis", ANALYSIS_PROMPT_VERSION, req, analysis)
+                    print(f"Analysis for '{req}' saved.")
+            if failed:
+                logging.warning(f"Falling back to single prompts for unparsed requirements: {', '.join(failed)}")
+            pending = [req for req in pending if issue_key(req) in failed]
+
+        def analyze(backend, req):
+            prompt, _ = analyze_requirement(backend, req, store, cache)
+            # Only the primary browser downloads into the Downloads folder
+            if primary is not None and getattr(backend, "session", None) is primary:
+                sent.append((prompt, [req]))
+
+        run_with_backend(backend, analyze, pending)
+
+        # One export per chat; this covers the prompts since the last rotation
+        if primary is None or primary.prompt_count == 0:
+            logging.info("Nothing was sent through the browser, skipping chat export")
+        else:
+            export_and_verify()
+
+        cache.log_stats()
+        store.export_analysis_views(requirements)
+        store.close()
+
+    finally:
+        if backend is not None:
+            backend.close()
+        if driver is not None:
+            release_browser(driver, lease)
+            print("Browser closed.")
+            logging.info("Browser closed.")
+
+    # Documentation in a README file
+    with open("README.md", "w", encoding="utf-8") as f:
+        f.write(README_CONTENT)
+
+if __name__ == "__main__":
+    main()
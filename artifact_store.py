@@ -0,0 +1,196 @@
+import argparse
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from build_manifest import issue_from_stem
+from result_store import issue_key
+
+ARTIFACT_DB = "artifacts.db"
+# Where analyses lived before the artifact store; imported once into an empty store
+LEGACY_ANALYSES = "analyzed_requirements.jsonl"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS issues (
+    key TEXT PRIMARY KEY,
+    number INTEGER,
+    requirement TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS issues_number ON issues (number);
+CREATE TABLE IF NOT EXISTS artifacts (
+    issue TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    content TEXT NOT NULL,
+    path TEXT,
+    prompt_hash TEXT,
+    latency REAL,
+    attempts INTEGER NOT NULL DEFAULT 1,
+    produced_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (issue, stage)
+);
+CREATE INDEX IF NOT EXISTS artifacts_stage ON artifacts (stage, issue);
+"""
+
+def now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+def issue_number(key):
+    match = re.search(r"#(\d+)", key)
+    return int(match.group(1)) if match else None
+
+class ArtifactStore:
+    """SQLite store of every issue and the output of each of its stages.
+
+    One row per (issue, stage) holds the output text, the file it is exported
+    to, the hash of the prompt that produced it, the LLM latency and the
+    attempts it took. Each write is its own transaction, so a crash never
+    leaves half an issue, and stages read exactly the rows they need. The
+    .txt/.md/.puml/.js files are views exported from it on demand.
+    """
+
+    def __init__(self, path=ARTIFACT_DB, legacy_analyses=LEGACY_ANALYSES):
+        self.path = path
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+        if legacy_analyses and os.path.exists(legacy_analyses) and not self.rows("analyze"):
+            self.import_result_store(legacy_analyses)
+
+    def _upsert_issue(self, key, requirement):
+        self.conn.execute(
+            "INSERT INTO issues (key, number, requirement, created_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET requirement = excluded.requirement",
+            (key, issue_number(key), requirement, now()))
+
+    def put_issue(self, requirement):
+        key = issue_key(requirement)
+        with self._lock, self.conn:
+            self._upsert_issue(key, requirement)
+        return key
+
+    def put(self, issue, stage, content, path=None, prompt_hash=None, latency=None, attempts=1, timestamp=None,
+            requirement=None):
+        """Insert or replace the output of one stage of one issue (and the issue itself when requirement is given)."""
+        with self._lock, self.conn:
+            if requirement is not None:
+                self._upsert_issue(issue, requirement)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO artifacts "
+                "(issue, stage, content, path, prompt_hash, latency, attempts, produced_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (issue, stage, content, path, prompt_hash, latency, attempts, timestamp or now(), now()))
+
+    def get(self, issue, stage):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT a.*, i.requirement FROM artifacts a LEFT JOIN issues i ON i.key = a.issue "
+                "WHERE a.issue = ? AND a.stage = ?", (issue, stage)).fetchone()
+        return dict(row) if row else None
+
+    def rows(self, stage, issues=None):
+        """Every output of stage (or of only the given issues), in issue number order."""
+        query = ("SELECT a.*, i.requirement FROM artifacts a LEFT JOIN issues i ON i.key = a.issue "
+                 "WHERE a.stage = ?")
+        params = [stage]
+        if issues is not None:
+            issues = list(issues)
+            query += f" AND a.issue IN ({', '.join('?' * len(issues))})"
+            params += issues
+        with self._lock:
+            rows = self.conn.execute(query, params).fetchall()
+        return sorted((dict(row) for row in rows), key=lambda row: (issue_number(row["issue"]) or 0, row["issue"]))
+
+    def export(self, row):
+        """Write row's content to its file when the file is missing or differs; return the path."""
+        path = row["path"]
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                if f.read() == row["content"]:
+                    return path
+        except FileNotFoundError:
+            pass
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(row["content"])
+        logging.info(f"Exported {row['issue']} {row['stage']} to {path}")
+        return path
+
+    def export_analysis_views(self, requirements=None, txt_path="analyzed_requirements.txt",
+                              md_path="analyzed_requirements.md"):
+        """Regenerate analyzed_requirements.txt/.md from the stored analyses, in requirements order (default: issue order)."""
+        rows = {row["issue"]: row for row in self.rows("analyze")}
+        order = [issue_key(req) for req in requirements if req.strip()] if requirements is not None else list(rows)
+        with open(txt_path, "w", encoding="utf-8") as f_txt, open(md_path, "w", encoding="utf-8") as f_md:
+            for key in order:
+                row = rows.get(key)
+                if not row:
+                    logging.warning(f"No analysis stored for '{key}', leaving it out of the views")
+                    continue
+                f_txt.write(f"{row['requirement']}\nTimestamp: {row['produced_at']}\nAnalysis: {row['content']}\n\n")
+                f_md.write(f"## {row['requirement']}\n\n**Timestamp:** {row['produced_at']}\n\n{row['content']}\n\n")
+        logging.info(f"Regenerated {txt_path}/.md from the artifact store")
+
+    def import_files(self, stage, paths):
+        """Adopt artifact files written before the store existed (Issue_4.js -> 'Issue #4')."""
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                content = f.read()
+            issue = issue_from_stem(os.path.basename(path).split(".")[0])
+            self.put(issue, stage, content, path=path, attempts=0)
+        logging.info(f"Imported {len(paths)} existing {stage} files into {self.path}")
+
+    def import_result_store(self, path):
+        count = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self.put(record["key"], "analyze", record["analysis"], timestamp=record.get("timestamp"),
+                         requirement=record["requirement"])
+                count += 1
+        logging.info(f"Imported {count} analysis records from {path} into {self.path}")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect the artifact store and export its files")
+    parser.add_argument("command", choices=["list", "show", "export"])
+    parser.add_argument("issue", nargs="?", help="issue key for show, e.g. 'Issue #3'")
+    parser.add_argument("--stage", default=None, help="analyze, design, code or tests (default: all)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    store = ArtifactStore()
+    stages = [args.stage] if args.stage else ["analyze", "design", "code", "tests"]
+    if args.command == "list":
+        print(f"{'issue':<12}{'stage':<10}{'attempts':>9}{'latency':>10}  produced at")
+        for stage in stages:
+            for row in store.rows(stage):
+                latency = f"{row['latency']:.1f}s" if row["latency"] is not None else "-"
+                print(f"{row['issue']:<12}{stage:<10}{row['attempts']:>9}{latency:>10}  {row['produced_at']}")
+    elif args.command == "show":
+        for stage in stages:
+            row = store.get(args.issue, stage)
+            if row:
+                print(f"--- {args.issue} {stage} ({row['path'] or 'not exported'})\n{row['content']}\n")
+    else:
+        for stage in stages:
+            if stage == "analyze":
+                store.export_analysis_views()
+            for row in store.rows(stage):
+                if row["path"]:
+                    store.export(row)
+    store.close()
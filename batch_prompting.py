@@ -0,0 +1,75 @@
+import logging
+import os
+
+BEGIN_MARKER = "[[BEGIN {key}]]"
+END_MARKER = "[[END {key}]]"
+
+def batch_size_from_env(name, default=1):
+    """Read a batch size (K) from the environment; 1 keeps one prompt per item."""
+    value = os.getenv(name)
+    if not value:
+        return default
+    size = int(value)
+    if size < 1:
+        raise ValueError(f"{name} must be at least 1, got {size}")
+    return size
+
+def build_batch_prompt(instruction, items):
+    """Pack several (key, text) items into one prompt with a strict per-item envelope.
+
+    The keys are listed right after the first colon so the prompt can still be
+    located in the chat by its first issue key.
+    """
+    keys = [key for key, _ in items]
+    lines = [
+        f"{instruction}: {', '.join(keys)}.",
+        f"Answer every item separately. Start each answer with a line containing exactly "
+        f"{BEGIN_MARKER.format(key='<key>')} and end it with a line containing exactly "
+        f"{END_MARKER.format(key='<key>')}, where <key> is the item key as given (for example "
+        f"{BEGIN_MARKER.format(key=keys[0])}). Do not put anything between answers.",
+        ""
+    ]
+    for key, text in items:
+        lines.append(f"{key}: {text}" if not text.startswith(key) else text)
+    return "\n".join(lines)
+
+def split_batch_response(response, keys):
+    """Split a batched response into {key: text}; keys without a complete envelope are returned as failed."""
+    results = {}
+    failed = []
+    for key in keys:
+        begin = BEGIN_MARKER.format(key=key)
+        start = response.find(begin)
+        if start == -1:
+            failed.append(key)
+            continue
+        start += len(begin)
+        end = response.find(END_MARKER.format(key=key), start)
+        text = response[start:end].strip() if end != -1 else ""
+        if not text:
+            failed.append(key)
+            continue
+        results[key] = text
+    return results, failed
+
+def run_batched(items, send, instruction, batch_size, max_retries=2):
+    """Send items in batches of batch_size and re-prompt only the ones that failed to parse.
+
+    send(prompt) -> response text. Returns ({key: text}, [keys still failing]).
+    """
+    texts = dict(items)
+    results = {}
+    failed = []
+    for offset in range(0, len(items), batch_size):
+        pending = [key for key, _ in items[offset:offset + batch_size]]
+        for attempt in range(max_retries + 1):
+            prompt = build_batch_prompt(instruction, [(key, texts[key]) for key in pending])
+            response = send(prompt)
+            parsed, pending = split_batch_response(response, pending)
+            results.update(parsed)
+            logging.info(f"Batch attempt {attempt + 1}: parsed {len(parsed)} items, {len(pending)} failed")
+            if not pending:
+                break
+            logging.warning(f"Re-prompting unparsed items: {', '.join(pending)}")
+        failed.extend(pending)
+    return results, failed
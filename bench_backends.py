@@ -0,0 +1,66 @@
+import argparse
+import statistics
+import time
+from llm_backend import run_with_backend
+
+PROMPT = "Analyze this requirement: Issue #{n}: {filler}"
+# Asks the stub for its canned code answer, which has prose after the code block
+BLOCK_PROMPT = "Based on this PlantUML, generate JavaScript code for Issue #{n}: {filler}"
+
+def bench(backend, prompt_count, prompt_size, until_block=None):
+    """Send prompt_count prompts through backend and return (per-prompt latencies, wall time)."""
+    filler = ("Implement a caching mechanism for API calls. " * (prompt_size // 45 + 1))[:prompt_size]
+    template = BLOCK_PROMPT if until_block else PROMPT
+    prompts = [template.format(n=n, filler=filler) for n in range(1, prompt_count + 1)]
+
+    def timed(backend, prompt):
+        start = time.perf_counter()
+        if until_block:
+            backend.complete(prompt, until_block)
+        else:
+            backend.complete(prompt)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = run_with_backend(backend, timed, prompts)
+    return latencies, time.perf_counter() - start
+
+def report(name, latencies, wall):
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"{name}: {len(latencies)} prompts in {wall:.2f}s ({len(latencies) / wall:.2f}/s), "
+          f"p50 {statistics.median(ordered):.3f}s, p95 {p95:.3f}s, max {ordered[-1]:.3f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare prompt latency and throughput of the LLM backends")
+    parser.add_argument("--backend", choices=["http", "browser"], default="http")
+    parser.add_argument("--prompts", type=int, default=20)
+    parser.add_argument("--size", type=int, default=500, help="prompt length in characters")
+    parser.add_argument("--stub", action="store_true", help="run the HTTP backend against a local stub server")
+    parser.add_argument("--stub-latency", type=float, default=0.5)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--block", help="stream and stop at the first finished code block in this language, e.g. javascript (STREAM_CAPTURE=0 for the full-answer baseline)")
+    parser.add_argument("--chunk-delay", type=float, default=0.05, help="stub seconds between streamed lines")
+    args = parser.parse_args()
+    until_block = (args.block,) if args.block else None
+
+    if args.backend == "http":
+        from http_backend import HTTPBackend
+        if args.stub:
+            from stub_llm_server import start_stub_server
+            server = start_stub_server(latency=args.stub_latency, chunk_delay=args.chunk_delay)
+            backend = HTTPBackend(f"http://127.0.0.1:{server.server_port}/v1", max_concurrency=args.concurrency)
+        else:
+            backend = HTTPBackend.from_env()
+        with backend:
+            report(f"http ({backend.base_url})", *bench(backend, args.prompts, args.size, until_block))
+    else:
+        from grok_browser import open_grok
+        from llm_backend import BrowserBackend
+        from session_pool import GrokSession, create_driver
+        driver = create_driver()
+        try:
+            open_grok(driver)
+            report("browser", *bench(BrowserBackend(GrokSession(0, driver)), args.prompts, args.size, until_block))
+        finally:
+            driver.quit()
@@ -0,0 +1,139 @@
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+from code_blocks import fenced_blocks
+from generate_designs import PLANTUML_BLOCK
+from generate_code import CODE_BLOCK
+from generate_tests import TEST_BLOCK
+
+EXPORTS_DIR = "Downloads"
+# Stage -> (block spec, the regex the stage used before the tokenizer, fence tag, artifacts to embed)
+STAGES = {
+    "design": (PLANTUML_BLOCK, r"(?:```plantuml\s*|plantuml\s*)(.*?)(?:```|\Z)", "plantuml", "designs/*.puml"),
+    "code": (CODE_BLOCK, r"(?:```(?:javascript|js)\s*|javascript\s*|js\s*)(.*?)(?:```|\Z)", "javascript",
+             "src/*.js"),
+    "tests": (TEST_BLOCK, r"(?:```(?:javascript|js)?\s*|\bdescribe\s*\()(.+?)(?:```|\Z)", "javascript",
+              "tests/*.test.js"),
+}
+DECOY = "```bash\nnpm install --save-dev jest\n```\n"
+
+def load_answers(exports_dir=EXPORTS_DIR):
+    """The assistant messages of every exported chat (the exports keep the prose, not the code blocks)."""
+    answers = []
+    for path in sorted(glob.glob(os.path.join(exports_dir, "*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            answers += [m["content"] for m in json.load(f) if m["role"] == "assistant" and m["content"] != "..."]
+    return answers
+
+def load_artifacts(pattern):
+    bodies = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, "r", encoding="utf-8") as f:
+            bodies.append(f.read().strip())
+    return bodies
+
+def build_cases(stage, answers):
+    """[(case kind, response, code expected back or None)] for one stage.
+
+    Each exported answer is split in two and a stored artifact of the stage
+    put between the halves in the ways Grok has been seen to answer: tagged,
+    untagged, after an unrelated block, cut off before its closing fence, and
+    for tests after a repeat of the source. The untouched answers have no
+    block at all, so a stage must find nothing in them.
+    """
+    spec, _, lang, pattern = STAGES[stage]
+    bodies = load_artifacts(pattern)
+    sources = load_artifacts(STAGES["code"][3])
+    cases = []
+    for n, answer in enumerate(answers):
+        cases.append(("prose only", answer, None))
+        if not bodies:
+            continue
+        body = bodies[n % len(bodies)]
+        # The exports flatten answers to few lines, so split at a sentence and give the block lines of its own
+        cut = answer.find(". ", len(answer) // 2)
+        head, tail = (f"{answer}\n", "") if cut == -1 else (f"{answer[:cut + 1]}\n", f"{answer[cut + 2:]}\n")
+        cases.append(("tagged", f"{head}```{lang}\n{body}\n```\n{tail}", body))
+        cases.append(("untagged", f"{head}```\n{body}\n```\n{tail}", body))
+        cases.append(("after other block", f"{head}{DECOY}```{lang}\n{body}\n```\n{tail}", body))
+        cases.append(("cut off", f"{head}```{lang}\n{body}\n", body))
+        if stage == "tests" and sources:
+            source = sources[n % len(sources)]
+            cases.append(("after source", f"{head}```javascript\n{source}\n```\n```javascript\n{body}\n```\n{tail}",
+                          body))
+    return cases
+
+def legacy_extract(pattern, response):
+    match = re.search(pattern, response, re.DOTALL)
+    return (match.group(1).strip() or None) if match else None
+
+def check(answers, verbose=False):
+    """Run every stage's cases through the tokenizer and the old regex; True when the tokenizer gets them all."""
+    ok = True
+    for stage, (spec, pattern, _, _) in STAGES.items():
+        results = {}
+        for kind, response, expected in build_cases(stage, answers):
+            new = spec.extract(response) == expected
+            old = legacy_extract(pattern, response) == expected
+            counts = results.setdefault(kind, [0, 0, 0])
+            counts[0] += 1
+            counts[1] += new
+            counts[2] += old
+            if not new:
+                ok = False
+                if verbose:
+                    print(f"  {stage}/{kind} wrong: {spec.extract(response)!r:.120} instead of {expected!r:.120}")
+        for kind, (total, new, old) in results.items():
+            print(f"{stage:<7}{kind:<19}{total:>5} cases  tokenizer {new:>5} right  old regex {old:>5} right")
+    return ok
+
+def time_per_call(func, responses, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for response in responses:
+            func(response)
+    return (time.perf_counter() - start) / (repeat * len(responses))
+
+def bench(answers, repeat, sizes):
+    """Time extraction over the check cases, then over answers padded to the given sizes."""
+    for stage, (spec, pattern, _, _) in STAGES.items():
+        responses = [response for _, response, _ in build_cases(stage, answers)]
+        compiled = re.compile(pattern, re.DOTALL)
+        old = time_per_call(compiled.search, responses, repeat)
+        new = time_per_call(spec.extract, responses, repeat)
+        print(f"{stage:<7}{len(responses):>5} responses  old regex {old * 1e6:8.1f} us  tokenizer {new * 1e6:8.1f} us")
+
+    _, pattern, lang, artifacts = STAGES["tests"]
+    body = (load_artifacts(artifacts) or ["describe('x', () => {});"])[0]
+    prose = "\n".join(answers) or "Plain prose without any code.\n"
+    for size in sizes:
+        # A long answer with one block in the middle plus plain ``` lines, the shape that costs regexes the most
+        filler = (prose * (size // len(prose) + 1))[:size // 2]
+        response = f"{filler}\n```{lang}\n{body}\n```\n{filler}\n```\n"
+        compiled = re.compile(pattern, re.DOTALL)
+        count = max(1, repeat // 10)
+        old = time_per_call(compiled.search, [response], count)
+        new = time_per_call(fenced_blocks, [response], count)
+        print(f"{len(response) // 1024:>6} KB answer  old regex {old * 1e3:8.2f} ms  tokenizer {new * 1e3:8.2f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check and time the code block tokenizer against the old extraction regexes")
+    parser.add_argument("command", nargs="?", choices=["check", "bench", "all"], default="all")
+    parser.add_argument("--exports", default=EXPORTS_DIR, help="directory of exported Grok chats (chat_export.py)")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--sizes", default="10,100,1000", help="padded answer sizes in KB for the bench")
+    parser.add_argument("--verbose", action="store_true", help="print every case the tokenizer gets wrong")
+    args = parser.parse_args()
+
+    answers = load_answers(args.exports)
+    print(f"{len(answers)} exported answers from {args.exports}")
+    ok = True
+    if args.command in ("check", "all"):
+        ok = check(answers, args.verbose)
+    if args.command in ("bench", "all"):
+        bench(answers, args.repeat, [int(size) * 1024 for size in args.sizes.split(",")])
+    sys.exit(0 if ok else 1)
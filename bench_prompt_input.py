@@ -0,0 +1,51 @@
+import argparse
+import statistics
+import time
+from urllib.parse import quote
+from selenium.webdriver.common.by import By
+from grok_browser import PROMPT_INPUT_MODES, PROMPT_INPUT_XPATH, enter_prompt, get_fresh_element, open_grok
+from session_pool import create_driver
+
+# Offline page with the same textarea, for timing entry without logging in
+LOCAL_PAGE = "data:text/html," + quote("<textarea placeholder='Ask anything' rows='10' cols='80'></textarea>")
+
+SAMPLE_LINE = "    const result = repository.save({ id: item.id, name: item.name }); // sample line\n"
+
+def make_prompt(size):
+    return ("Generate Jest tests for this code:\n" + SAMPLE_LINE * (size // len(SAMPLE_LINE) + 1))[:size]
+
+def time_entry(driver, mode, prompt, repeats):
+    """Seconds per entry of prompt in the given mode (the textarea is cleared, not submitted)."""
+    timings = []
+    for _ in range(repeats):
+        text_input = get_fresh_element(driver, By.XPATH, PROMPT_INPUT_XPATH)
+        start = time.perf_counter()
+        used = enter_prompt(driver, text_input, prompt, mode)
+        timings.append(time.perf_counter() - start)
+        if used != mode:
+            print(f"  {mode} fell back to {used}")
+        enter_prompt(driver, text_input, "", "js")
+    return statistics.median(timings)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare prompt entry time of the input modes across prompt sizes")
+    parser.add_argument("--sizes", default="200,2000,8000,32000", help="comma-separated prompt lengths in characters")
+    parser.add_argument("--modes", default=",".join(PROMPT_INPUT_MODES))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--local", action="store_true", help="use a local page with a plain textarea instead of Grok")
+    args = parser.parse_args()
+
+    driver = create_driver()
+    try:
+        if args.local:
+            driver.get(LOCAL_PAGE)
+        else:
+            open_grok(driver)
+        modes = args.modes.split(",")
+        print(f"{'size':>8}" + "".join(f"{mode:>12}" for mode in modes))
+        for size in (int(value) for value in args.sizes.split(",")):
+            prompt = make_prompt(size)
+            row = [time_entry(driver, mode, prompt, args.repeats) for mode in modes]
+            print(f"{size:>8}" + "".join(f"{seconds:>11.3f}s" for seconds in row))
+    finally:
+        driver.quit()
@@ -0,0 +1,313 @@
+import argparse
+import json
+import logging
+import os
+import socket
+import socketserver
+import subprocess
+import threading
+import time
+import urllib.request
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from grok_browser import GROK_URL, open_grok
+from session_pool import CLONE_BASE_DIR, PROFILE_DIRECTORY, USER_DATA_DIR, clone_profile, create_driver, session_count_from_env
+
+CHROME_BINARY = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
+# host:port of the daemon's control socket; BROWSER_DAEMON=off never attaches
+DEFAULT_DAEMON_ADDRESS = "127.0.0.1:8765"
+DEBUG_PORT_BASE = 9222
+HEALTH_CHECK_INTERVAL = 30
+
+def daemon_address():
+    value = os.getenv("BROWSER_DAEMON", DEFAULT_DAEMON_ADDRESS)
+    if value.lower() in ("", "0", "off", "none"):
+        return None
+    host, port = value.rsplit(":", 1)
+    return host, int(port)
+
+def attach_driver(debugger_address):
+    """WebDriver on an already running Chrome; quit() detaches without closing the browser."""
+    chrome_options = Options()
+    chrome_options.add_experimental_option("debuggerAddress", debugger_address)
+    return webdriver.Chrome(options=chrome_options)
+
+class ManagedBrowser:
+    """One Chrome process with a remote debugging port, kept on a logged-in Grok page."""
+
+    def __init__(self, index, user_data_dir, profile_directory=PROFILE_DIRECTORY, port=None):
+        self.index = index
+        self.user_data_dir = user_data_dir
+        self.profile_directory = profile_directory
+        self.port = port or DEBUG_PORT_BASE + index
+        self.debugger_address = f"127.0.0.1:{self.port}"
+        self.process = None
+        self.restarts = 0
+
+    def launch(self, startup_timeout=30):
+        self.process = subprocess.Popen([
+            CHROME_BINARY,
+            f"--remote-debugging-port={self.port}",
+            f"--user-data-dir={self.user_data_dir}",
+            f"--profile-directory={self.profile_directory}",
+            "--no-first-run",
+            "--no-default-browser-check",
+            GROK_URL
+        ])
+        deadline = time.time() + startup_timeout
+        while not self.devtools_responding():
+            if self.process.poll() is not None or time.time() > deadline:
+                self.stop()
+                raise Exception(f"Chrome session {self.index} did not open its debugging port {self.port}")
+            time.sleep(0.5)
+
+        # Log in once here so stage scripts never block on the login prompt
+        driver = attach_driver(self.debugger_address)
+        try:
+            open_grok(driver)
+        finally:
+            driver.quit()
+        logging.info(f"Chrome session {self.index} ready on {self.debugger_address}")
+
+    def devtools_responding(self, timeout=2):
+        try:
+            with urllib.request.urlopen(f"http://{self.debugger_address}/json/version", timeout=timeout) as response:
+                return response.status == 200
+        except OSError:
+            return False
+
+    def is_healthy(self):
+        return self.process is not None and self.process.poll() is None and self.devtools_responding()
+
+    def relaunch(self):
+        logging.warning(f"Chrome session {self.index} is not responding, relaunching it")
+        self.stop()
+        self.restarts += 1
+        self.launch()
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process = None
+
+class BrowserDaemon:
+    """Warm Chrome sessions leased to stage scripts over a local control socket.
+
+    A client sends {"cmd": "acquire"} and holds the connection open while it
+    works; the session is released on {"cmd": "release"} or when the
+    connection drops, so a crashed stage cannot keep a session forever. A
+    health thread relaunches idle browsers that died, and every session is
+    checked again before it is handed out.
+    """
+
+    def __init__(self, size=1, health_interval=HEALTH_CHECK_INTERVAL):
+        # Every session runs on a clone: Chrome 136+ ignores --remote-debugging-port on the default user data dir
+        self.browsers = [ManagedBrowser(i, clone_profile(i)) for i in range(size)]
+        self.leased = set()
+        self.health_interval = health_interval
+        self._condition = threading.Condition()
+        self._stopped = threading.Event()
+        self.server = None
+
+    def start(self):
+        for browser in self.browsers:
+            browser.launch()
+        threading.Thread(target=self._health_loop, name="browser-health", daemon=True).start()
+        return self
+
+    def _ensure_healthy(self, browser):
+        if not browser.is_healthy():
+            browser.relaunch()
+
+    def _health_loop(self):
+        while not self._stopped.wait(self.health_interval):
+            for browser in self.browsers:
+                with self._condition:
+                    if browser.index in self.leased:
+                        continue
+                    self.leased.add(browser.index)  # Keep it from being handed out mid-relaunch
+                try:
+                    self._ensure_healthy(browser)
+                except Exception as e:
+                    logging.error(f"Health check of Chrome session {browser.index} failed: {e}")
+                finally:
+                    self._release(browser)
+
+    def acquire(self, timeout=600):
+        deadline = time.time() + timeout
+        with self._condition:
+            while True:
+                free = [b for b in self.browsers if b.index not in self.leased]
+                if free:
+                    browser = free[0]
+                    self.leased.add(browser.index)
+                    break
+                remaining = deadline - time.time()
+                if remaining <= 0 or not self._condition.wait(remaining):
+                    raise Exception("No browser session became free in time")
+        try:
+            self._ensure_healthy(browser)
+        except Exception:
+            self._release(browser)
+            raise
+        logging.info(f"Leased Chrome session {browser.index}")
+        return browser
+
+    def _release(self, browser):
+        with self._condition:
+            self.leased.discard(browser.index)
+            self._condition.notify()
+
+    def release(self, browser):
+        self._release(browser)
+        logging.info(f"Released Chrome session {browser.index}")
+
+    def status(self):
+        return [{"index": b.index, "debugger_address": b.debugger_address, "leased": b.index in self.leased,
+                 "healthy": b.is_healthy(), "restarts": b.restarts} for b in self.browsers]
+
+    def serve(self, address):
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                browser = None
+                try:
+                    for line in self.rfile:
+                        request = json.loads(line)
+                        cmd = request.get("cmd")
+                        if cmd == "acquire" and browser is None:
+                            try:
+                                browser = daemon.acquire(request.get("timeout", 600))
+                                reply = {"ok": True, "index": browser.index, "debugger_address": browser.debugger_address}
+                            except Exception as e:
+                                reply = {"ok": False, "error": str(e)}
+                        elif cmd == "release" and browser is not None:
+                            daemon.release(browser)
+                            browser = None
+                            reply = {"ok": True}
+                        elif cmd == "status":
+                            reply = {"ok": True, "sessions": daemon.status()}
+                        elif cmd == "shutdown":
+                            reply = {"ok": True}
+                            threading.Thread(target=daemon.shutdown).start()
+                        else:
+                            reply = {"ok": False, "error": f"Unexpected command {cmd}"}
+                        self.wfile.write((json.dumps(reply) + "\n").encode("utf-8"))
+                        self.wfile.flush()
+                except (OSError, ValueError) as e:
+                    logging.warning(f"Control connection dropped: {e}")
+                finally:
+                    if browser is not None:
+                        daemon.release(browser)
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self.server = socketserver.ThreadingTCPServer(address, Handler)
+        self.server.daemon_threads = True
+        logging.info(f"Browser daemon listening on {address[0]}:{address[1]} with {len(self.browsers)} sessions")
+        self.server.serve_forever()
+
+    def shutdown(self):
+        self._stopped.set()
+        if self.server is not None:
+            self.server.shutdown()
+        for browser in self.browsers:
+            browser.stop()
+        logging.info("Browser daemon stopped")
+
+class BrowserLease:
+    """A session leased from the daemon; held for as long as the control connection is open."""
+
+    def __init__(self, address, timeout=600):
+        self._socket = socket.create_connection(address, timeout=5)
+        self._socket.settimeout(timeout + 5)
+        self._file = self._socket.makefile("rw", encoding="utf-8")
+        reply = self._request({"cmd": "acquire", "timeout": timeout})
+        if not reply.get("ok"):
+            self._socket.close()
+            raise Exception(f"Browser daemon refused the lease: {reply.get('error')}")
+        self.index = reply["index"]
+        self.debugger_address = reply["debugger_address"]
+
+    def _request(self, payload):
+        self._file.write(json.dumps(payload) + "\n")
+        self._file.flush()
+        return json.loads(self._file.readline())
+
+    def release(self):
+        try:
+            self._request({"cmd": "release"})
+        except (OSError, ValueError):
+            pass  # The daemon releases on disconnect anyway
+        finally:
+            self._file.close()
+            self._socket.close()
+
+def send_command(cmd, address=None):
+    with socket.create_connection(address or daemon_address(), timeout=5) as sock:
+        sock.sendall((json.dumps({"cmd": cmd}) + "\n").encode("utf-8"))
+        return json.loads(sock.makefile("r", encoding="utf-8").readline())
+
+def lease_browser(download_dir=None):
+    """(driver, lease) on a warm daemon session, or None when no daemon is running."""
+    address = daemon_address()
+    if address is None:
+        return None
+    try:
+        lease = BrowserLease(address)
+    except ConnectionRefusedError:
+        logging.info(f"No browser daemon at {address[0]}:{address[1]}")
+        return None
+    try:
+        driver = attach_driver(lease.debugger_address)
+        if download_dir:
+            driver.execute_cdp_cmd("Browser.setDownloadBehavior", {"behavior": "allow", "downloadPath": download_dir})
+    except Exception:
+        lease.release()
+        raise
+    logging.info(f"Attached to daemon Chrome session {lease.index} at {lease.debugger_address}")
+    return driver, lease
+
+def connect_browser(user_data_dir=USER_DATA_DIR, profile_directory=PROFILE_DIRECTORY, download_dir=None):
+    """Return (driver, lease): a warm daemon session when the daemon runs, else a freshly started Chrome (lease None)."""
+    leased = lease_browser(download_dir)
+    if leased:
+        return leased
+    # Clone the profile for the other sessions now: once Chrome runs on it, its files are locked on Windows
+    for index in range(1, session_count_from_env()):
+        clone_profile(index, user_data_dir, profile_directory)
+    driver = create_driver(user_data_dir, profile_directory, download_dir)
+    logging.info("Initialized Chrome driver")
+    return driver, None
+
+def release_browser(driver, lease):
+    """Detach from a leased session, or close a Chrome this process started."""
+    if lease is None:
+        time.sleep(2)
+    driver.quit()
+    if lease is not None:
+        lease.release()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep warm, logged-in Grok browser sessions for the stage scripts")
+    parser.add_argument("command", nargs="?", choices=["serve", "status", "stop"], default="serve")
+    parser.add_argument("--sessions", type=int, default=int(os.getenv("GROK_SESSIONS", "1")))
+    parser.add_argument("--health-interval", type=int, default=HEALTH_CHECK_INTERVAL)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    address = daemon_address() or tuple(DEFAULT_DAEMON_ADDRESS.split(":"))
+    address = (address[0], int(address[1]))
+    if args.command == "serve":
+        os.makedirs(CLONE_BASE_DIR, exist_ok=True)
+        daemon = BrowserDaemon(args.sessions, args.health_interval).start()
+        try:
+            daemon.serve(address)
+        except KeyboardInterrupt:
+            daemon.shutdown()
+    else:
+        print(json.dumps(send_command("status" if args.command == "status" else "shutdown", address), indent=2))
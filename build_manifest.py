@@ -0,0 +1,75 @@
+import hashlib
+import time
+from datetime import datetime
+from result_store import ResultStore
+from structured_log import log_context, log_event
+
+MANIFEST_PATH = "build_manifest.jsonl"
+STAGES = ("analyze", "design", "code", "tests")
+
+def hash_file(path):
+    """sha256 of a file's bytes, or None when it does not exist."""
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+def artifact_stem(issue):
+    """'Issue #4' -> 'Issue_4', the name of the issue's .puml/.js/.test.js files."""
+    return issue.replace('#', '').replace(' ', '_')
+
+def issue_from_stem(stem):
+    """'Issue_4' -> 'Issue #4'"""
+    return stem.replace("_", " #", 1)
+
+class BuildManifest:
+    """Make-style record of what each stage of each issue was built from.
+
+    Every record holds the hashes of a stage's inputs (upstream artifact,
+    prompt version) and of the files it wrote. A stage is fresh while its
+    inputs hash the same and its outputs are still on disk unchanged. Since a
+    stage's inputs are its upstream outputs, a change reruns everything
+    downstream of it, and stops early where a rerun produced the same output.
+    """
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.store = ResultStore(path)
+
+    @staticmethod
+    def key(issue, stage):
+        return f"{issue}/{stage}"
+
+    def fresh(self, issue, stage, inputs):
+        """The stage's record when it can be skipped for these inputs, else None."""
+        record = self.store.get(self.key(issue, stage))
+        if not record or record["inputs"] != inputs:
+            return None
+        if any(hash_file(path) != digest for path, digest in record["outputs"].items()):
+            return None
+        return record
+
+    def record(self, issue, stage, inputs, outputs=()):
+        self.store.put(self.key(issue, stage), issue=issue, stage=stage, inputs=inputs,
+                       outputs={path: hash_file(path) for path in outputs},
+                       timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+
+    def build(self, issue, stage, inputs, build, force=False):
+        """Return the stage's output paths, running build() only when the stage is stale (or forced).
+
+        build() returns the paths it wrote, or None when the result should not
+        count as built (e.g. tests that still fail), so the stage reruns next time.
+        """
+        with log_context(stage, issue):
+            record = None if force else self.fresh(issue, stage, inputs)
+            if record:
+                log_event("skipped", f"{issue} {stage} is up to date, skipping")
+                return list(record["outputs"])
+            start = time.perf_counter()
+            outputs = build()
+            if outputs is not None:
+                self.record(issue, stage, inputs, outputs)
+            duration = time.perf_counter() - start
+            log_event("built", f"{issue} {stage} {'built' if outputs is not None else 'not built'} in {duration:.1f}s",
+                      duration)
+            return outputs
@@ -0,0 +1,112 @@
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from selenium.webdriver.common.by import By
+from grok_browser import get_fresh_element
+from result_store import ResultStore
+from structured_log import log_event
+
+EXPORT_DIR = r"D:\Documents\AutoSDLC\Downloads"
+# Which export file each run produced (.jsonl, so it never matches the *.json exports)
+EXPORT_MANIFEST = os.path.join(EXPORT_DIR, "export_manifest.jsonl")
+
+EXPORT_BUTTON_XPATH = "//span[normalize-space()='Export session']"
+JSON_OPTION_XPATHS = [
+    "//div[contains(@class, 'export-option') and @data-format='json']",
+    "//div[contains(@class, 'export-option') and contains(text(), 'JSON')]"
+]
+
+def list_exports(export_dir=EXPORT_DIR):
+    return {name for name in os.listdir(export_dir) if name.endswith(".json")}
+
+def wait_for_new_export(export_dir, before, timeout=30):
+    """Return the path of a .json export that was not in before, once it parses; None on timeout."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        for name in sorted(list_exports(export_dir) - before):
+            path = os.path.join(export_dir, name)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    json.load(f)
+                return path
+            except (OSError, json.JSONDecodeError):
+                pass  # Still being written
+        time.sleep(0.5)
+    return None
+
+def export_chat(driver, run_id, export_dir=EXPORT_DIR, manifest_path=EXPORT_MANIFEST, max_retries=3):
+    """Export the current chat through the Grok Chat Exporter and return the new file's path.
+
+    Only files that appear after the click count, so an older export is never
+    mistaken for this one. The file is recorded against run_id in the manifest.
+    """
+    for attempt in range(max_retries):
+        try:
+            before = list_exports(export_dir)
+            if not get_fresh_element(driver, By.XPATH, EXPORT_BUTTON_XPATH):
+                raise Exception("Export session button not found")
+
+            json_button = None
+            for xpath in JSON_OPTION_XPATHS:
+                json_button = get_fresh_element(driver, By.XPATH, xpath, timeout=10, max_retries=1, click=False)
+                if json_button:
+                    break
+            if not json_button:
+                raise Exception("JSON export option not found")
+            driver.execute_script("arguments[0].click();", json_button)
+
+            path = wait_for_new_export(export_dir, before)
+            if not path:
+                raise Exception("No new JSON file in Downloads after export")
+            ResultStore(manifest_path).put(run_id, file=os.path.basename(path),
+                                           timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            logging.info(f"Exported session to {path}")
+            return path
+        except Exception as e:
+            logging.error(f"Export attempt {attempt + 1} failed: {e}")
+            if attempt == max_retries - 1:
+                log_event("export_failure", f"Export of run {run_id} failed, page source kept as a blob",
+                          payload=driver.page_source, level=logging.ERROR, run_id=run_id)
+                driver.save_screenshot(f'D:\\Documents\\AutoSDLC\\logs\\export_failure_{run_id}.png')
+                return None
+            time.sleep(2)
+    return None
+
+def export_for_run(run_id, export_dir=EXPORT_DIR, manifest_path=EXPORT_MANIFEST):
+    """Path of the export recorded for run_id, or None."""
+    record = ResultStore(manifest_path).get(run_id) if os.path.exists(manifest_path) else None
+    return os.path.join(export_dir, record["file"]) if record else None
+
+def normalize_prompt(text):
+    return " ".join(text.split())
+
+class ExportIndex:
+    """Assistant responses of one export, looked up by the prompt that produced them.
+
+    The export is read once; each user message is paired with the assistant
+    message that follows it. When a prompt was sent more than once the latest
+    answer wins.
+    """
+
+    def __init__(self, messages):
+        self.responses = {}
+        prompt = None
+        for message in messages:
+            if message.get("role") == "user":
+                prompt = normalize_prompt(message.get("content", ""))
+            elif message.get("role") == "assistant" and prompt is not None:
+                self.responses[prompt] = message.get("content", "")
+                prompt = None
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def response_for(self, prompt):
+        return self.responses.get(normalize_prompt(prompt))
+
+    def __len__(self):
+        return len(self.responses)
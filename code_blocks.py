@@ -0,0 +1,152 @@
+import os
+
+FENCE_MARKERS = ("```", "~~~")
+
+def streaming_capture_enabled():
+    """STREAM_CAPTURE=0 always waits for the full answer before extracting code blocks."""
+    return os.getenv("STREAM_CAPTURE", "1") != "0"
+
+class CodeBlock:
+    """One fenced block of a response: its language tag, code and where both sit in the text.
+
+    start/end span the block fences included; code_start/code_end span only
+    the code. closed is False for a block the response ended inside of.
+    """
+
+    __slots__ = ("lang", "start", "end", "code_start", "code_end", "closed", "_text")
+
+    def __init__(self, text, lang, start, end, code_start, code_end, closed):
+        self._text = text
+        self.lang = lang
+        self.start = start
+        self.end = end
+        self.code_start = code_start
+        self.code_end = code_end
+        self.closed = closed
+
+    @property
+    def code(self):
+        return self._text[self.code_start:self.code_end]
+
+    @property
+    def fenced(self):
+        return self._text[self.start:self.end]
+
+    def __repr__(self):
+        state = "closed" if self.closed else "open"
+        return f"CodeBlock({self.lang or 'untagged'!r}, {self.start}-{self.end}, {state})"
+
+def fenced_blocks(text):
+    """Every fenced code block in text, in order, from one pass over its lines.
+
+    A block closes at the first fence of the same character at least as long
+    as the one that opened it (so ```` can wrap code containing ```), and a
+    block still open when the text ends runs to the end with closed=False.
+    Fence markers are found with str.find and no part of the text is searched
+    twice, so the cost is linear in the length of the response however it is
+    shaped.
+    """
+    blocks = []
+    length = len(text)
+    opening = None  # (fence, lang, start, code_start) of the block being read
+    position = 0
+    upcoming = {marker: text.find(marker) for marker in FENCE_MARKERS}
+    while True:
+        for marker, found in upcoming.items():
+            if -1 < found < position:
+                upcoming[marker] = text.find(marker, position)
+        candidates = [found for found in upcoming.values() if found != -1]
+        if not candidates:
+            break
+        fence_start = min(candidates)
+        line_start = text.rfind("\n", 0, fence_start) + 1
+        line_end = text.find("\n", fence_start)
+        line_end = length if line_end == -1 else line_end
+        position = line_end + 1
+        if text[line_start:fence_start].strip(" \t"):
+            continue  # Indented or not (Grok nests blocks in list items), a fence starts its line
+        fence_end = fence_start
+        while fence_end < line_end and text[fence_end] == text[fence_start]:
+            fence_end += 1
+        fence, info = text[fence_start:fence_end], text[fence_end:line_end].strip()
+        if opening is None:
+            if fence[0] == "`" and "`" in info:
+                continue  # ```inline``` code, not a fence
+            lang = info.split(None, 1)[0].lower() if info else ""
+            opening = (fence, lang, line_start, min(position, length))
+        elif not info and fence[0] == opening[0][0] and len(fence) >= len(opening[0]):
+            _, lang, start, code_start = opening
+            # The code's last line break belongs to the closing fence
+            blocks.append(CodeBlock(text, lang, start, line_end, code_start, max(code_start, line_start - 1), True))
+            opening = None
+    if opening is not None:
+        _, lang, start, code_start = opening
+        blocks.append(CodeBlock(text, lang, start, length, code_start, length, False))
+    return blocks
+
+class BlockSpec:
+    """Which block of a response a stage wants, declared once per stage.
+
+    languages: tags that count (the first is also what the backends stop
+    streaming on); untagged: whether a fence without a tag counts too;
+    prefer: text the right block contains, to choose between several
+    candidates (e.g. 'describe(' over a repeat of the source); bare: a
+    (start, end) marker pair to cut the code out by when the response has no
+    usable fence at all, end None meaning the rest of the response.
+    """
+
+    def __init__(self, languages, untagged=False, prefer=None, bare=None):
+        self.languages = tuple(languages)
+        self.untagged = untagged
+        self.prefer = prefer
+        self.bare = bare
+
+    def matches(self, block):
+        return block.lang in self.languages or (self.untagged and not block.lang)
+
+    def select(self, text, blocks=None):
+        """The chosen CodeBlock of text (tokenized once, or pass its blocks), or None."""
+        candidates = [block for block in (fenced_blocks(text) if blocks is None else blocks) if self.matches(block)]
+        if not candidates:
+            return None
+        # A closed block beats one the response was cut off in; among those the preferred text wins
+        candidates.sort(key=lambda block: not block.closed)
+        if self.prefer:
+            for block in candidates:
+                if self.prefer in block.code:
+                    return block
+        return candidates[0]
+
+    def extract(self, text):
+        """The stripped code this stage takes from a response, or None when there is none."""
+        block = self.select(text)
+        if block is not None and block.code.strip():
+            return block.code.strip()
+        if self.bare:
+            start_marker, end_marker = self.bare
+            start = text.find(start_marker)
+            if start != -1:
+                end = text.find(end_marker, start) if end_marker else -1
+                end = len(text) if end == -1 else end + len(end_marker)
+                return text[start:end].strip() or None
+        return None
+
+def block_spec(until_block):
+    """until_block as a BlockSpec; a plain list of languages is one with no preferred text."""
+    return until_block if isinstance(until_block, BlockSpec) else BlockSpec(until_block)
+
+def first_closed_block(text, until_block):
+    """Return the first complete ```lang ... ``` block in text that until_block wants, fences included.
+
+    until_block is a BlockSpec or a list of languages. When the spec has
+    prefer, only a block containing that text counts, so a stage is not cut
+    off at an earlier block it would not pick. None while no such block has
+    been closed yet, so it can be called on a response that is still
+    streaming in.
+    """
+    spec = block_spec(until_block)
+    languages = {language.lower() for language in spec.languages}
+    for block in fenced_blocks(text):
+        if block.closed and block.lang in languages and (not spec.prefer or spec.prefer in block.code):
+            return block.fenced
+    return None
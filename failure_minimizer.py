@@ -0,0 +1,129 @@
+import argparse
+import json
+import logging
+import os
+import re
+
+# Characters of failure output a debug prompt may carry (DEBUG_OUTPUT_BUDGET overrides)
+DEFAULT_BUDGET = 3000
+# Characters one assertion message may keep before it is cut, so a huge diff cannot crowd out the others
+MESSAGE_LIMIT = 1200
+FRAME_PATTERN = re.compile(r"^\s*at (?:(.*?) \()?(.+?):(\d+):(\d+)\)?\s*$")
+# Jest's advice on configuring transforms, printed before the real error of a test file it could not parse
+PARSE_ADVICE = re.compile(r"(Jest encountered an unexpected token)\n.*?\n\s*Details:\n", re.DOTALL)
+
+def budget_from_env():
+    return max(200, int(os.getenv("DEBUG_OUTPUT_BUDGET", str(DEFAULT_BUDGET))))
+
+def in_project(path):
+    normalized = path.replace("\\", "/")
+    return "/node_modules/" not in normalized and not normalized.startswith(("node:", "internal/", "<anonymous>"))
+
+def project_path(path, root=None):
+    """path relative to the project: workspace paths lose their directory, Jest's ../-paths their prefix."""
+    normalized = path.replace("\\", "/")
+    if root and os.path.isabs(path):
+        normalized = os.path.relpath(path, root).replace("\\", "/")
+    if normalized.startswith("../"):
+        for marker in ("/src/", "/tests/"):
+            if marker in normalized:
+                return normalized[normalized.rfind(marker) + 1:]
+    return normalized
+
+def split_failure(message, root=None):
+    """(assertion text, first in-project stack frame or None) of one Jest failure message.
+
+    The assertion text is everything before the stack (for expect() failures
+    the matcher line with its Expected/Received diff, for suites the error and
+    its code frame); of the stack only the first frame outside node_modules
+    is kept.
+    """
+    text, frame = [], None
+    message = PARSE_ADVICE.sub(r"\1\n", message)
+    if root:
+        message = message.replace(os.path.join(os.path.abspath(root), ""), "")
+    for line in message.splitlines():
+        match = FRAME_PATTERN.match(line)
+        if not match:
+            if frame is None and not line.lstrip().startswith("at "):
+                text.append(line.rstrip())
+            continue
+        function, path, line_number, column = match.groups()
+        if frame is None and in_project(path):
+            frame = f"at {function + ' ' if function else ''}({project_path(path, root)}:{line_number}:{column})"
+    assertion = "\n".join(text).strip()
+    assertion = re.sub(r"\n{3,}", "\n\n", assertion)
+    if len(assertion) > MESSAGE_LIMIT:
+        assertion = assertion[:MESSAGE_LIMIT].rstrip() + "\n[... diff cut ...]"
+    return assertion, frame
+
+def minimize_failures(run, budget=None, root=None):
+    """Failure output of a JestRun cut down for a debug prompt; returns (text, stats).
+
+    Keeps the failing test names, their assertion diffs and the first
+    in-project stack frame of each, with identical assertions reported once
+    under all the tests that hit them, and stops at budget characters. stats
+    holds the full report's size, the minimized size and their ratio.
+    """
+    budget = budget or budget_from_env()
+    root = root or run.root
+    # assertion -> (first frame, names of the tests or suites failing that way); the same assertion failing
+    # at two lines is one failure to explain, so frames do not split groups
+    groups = {}
+    failures = [(f"{file or 'test file'} failed to run", message) for file, message in run.errors]
+    failures += [(test["name"], message) for test in run.failed for message in test["failures"] or ["(no failure message)"]]
+    for name, message in failures:
+        assertion, frame = split_failure(message, root)
+        names = groups.setdefault(assertion, (frame, []))[1]
+        if name not in names:
+            names.append(name)
+
+    passed = sum(1 for test in run.tests if test["status"] == "passed")
+    header = f"{len(run.failed)} failing, {passed} passing, {len(run.errors)} test files failed to run"
+    sections = []  # (text, failures it covers)
+    for assertion, (frame, names) in groups.items():
+        title = f"● {names[0]}" + (f" (and {len(names) - 1} more with the same failure: {', '.join(names[1:])})"
+                                   if len(names) > 1 else "")
+        sections.append(("\n".join(part for part in (title, assertion, frame) if part), len(names)))
+    kept, omitted = [section for section, _ in sections], 0
+    if len(header) + sum(len(section) + 2 for section in kept) > budget:
+        # Keep what fits in order, leaving room for the note on what was left out
+        total = sum(count for _, count in sections)
+        used = len(header) + len(f"[{total} more failures left out to stay within {budget} characters]") + 2
+        kept = []
+        for section, count in sections:
+            if used + len(section) + 2 > budget:
+                omitted += count
+                continue
+            kept.append(section)
+            used += len(section) + 2
+        if not kept:
+            # A debug prompt needs at least one failure to work on, cut down if it must be
+            section, count = sections[0]
+            kept, omitted = [section[:max(0, budget - used - 2)].rstrip()], omitted - count
+    text = "\n\n".join([header] + kept + ([f"[{omitted} more failures left out to stay within {budget} characters]"]
+                                          if omitted else []))
+    original = len(run.output())
+    stats = {"original": original, "minimized": len(text), "ratio": len(text) / original if original else 1.0,
+             "failures": sum(len(names) for _, names in groups.values()), "distinct": len(groups), "omitted": omitted}
+    return text, stats
+
+def log_reduction(label, stats):
+    logging.info(f"Failure output for {label}: {stats['original']} -> {stats['minimized']} chars "
+                 f"({(1 - stats['ratio']) * 100:.0f}% smaller, {stats['distinct']} distinct of {stats['failures']} failures"
+                 + (f", {stats['omitted']} left out" if stats["omitted"] else "") + ")")
+
+if __name__ == "__main__":
+    from jest_runner import JestRun
+    parser = argparse.ArgumentParser(description="Shrink a `jest --json` result file to what a debug prompt needs")
+    parser.add_argument("results", help="JSON written by `jest --json` (or --outputFile)")
+    parser.add_argument("--budget", type=int, default=None, help=f"character budget (default: DEBUG_OUTPUT_BUDGET or {DEFAULT_BUDGET})")
+    parser.add_argument("--root", default=None, help="project directory, for relative frame paths")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    with open(args.results, "r", encoding="utf-8") as f:
+        run = JestRun(json.load(f), 0.0, args.root or os.getcwd())
+    text, stats = minimize_failures(run, args.budget, args.root)
+    print(text)
+    log_reduction(args.results, stats)
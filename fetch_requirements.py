@@ -1,25 +1,141 @@
-import requests
+import argparse
+import json
 import os
-
-# Get GitHub token from environment variable
-github_token = os.getenv("GITHUB_TOKEN")
-if not github_token:
-    raise ValueError("GitHub token not found. Set GITHUB_TOKEN environment variable.")
+import requests
+from requests.adapters import HTTPAdapter
 
 # GitHub repository details
 repo = "sespear86/auto-sdlc"
-headers = {"Authorization": f"token {github_token}"}
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+STATE_FILE = "issue_sync_state.json"
+DELTA_FILE = "requirements_delta.json"
+
+def create_session(github_token, pool_size=10):
+    """Create a pooled session so every page reuses the same connection."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=3)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({
+        "Authorization": f"token {github_token}",
+        "Accept": "application/vnd.github+json"
+    })
+    return session
+
+def load_sync_state(state_file):
+    """Load the last sync state (ETag, since cursor and known issues)."""
+    if not os.path.exists(state_file):
+        return {"etag": None, "since": None, "issues": {}}
+    with open(state_file, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    state.setdefault("etag", None)
+    state.setdefault("since", None)
+    state.setdefault("issues", {})
+    return state
+
+def save_sync_state(state, state_file):
+    tmp_file = f"{state_file}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_file, state_file)
+
+def fetch_issue_pages(session, url, params, etag=None):
+    """Fetch every page of issues following the Link header.
+
+    Returns (issues, etag); issues is None when the server answered 304.
+    """
+    headers = {"If-None-Match": etag} if etag else {}
+    response = session.get(url, params=params, headers=headers)
+    if response.status_code == 304:
+        return None, etag
+    if response.status_code != 200:
+        raise Exception(f"Failed to fetch issues: {response.status_code} - {response.text}")
+
+    new_etag = response.headers.get("ETag")
+    issues = response.json()
+    while "next" in response.links:
+        # The next URL already carries the query string
+        response = session.get(response.links["next"]["url"])
+        if response.status_code != 200:
+            raise Exception(f"Failed to fetch issues: {response.status_code} - {response.text}")
+        issues.extend(response.json())
+    return issues, new_etag
+
+def format_requirement(number, title):
+    return f"Issue #{number}: {title}"
+
+def sync_issues(session, state, api_url=GITHUB_API_URL):
+    """Bring state["issues"] up to date and return the per-issue delta."""
+    # Most recently updated first: any change lands on page 1, so page 1's ETag stands for every page
+    params = {"per_page": 100, "sort": "updated", "direction": "desc"}
+    if state["since"]:
+        # Closed issues only come back when asking for all states
+        params.update({"since": state["since"], "state": "all"})
+    else:
+        params["state"] = "open"
+
+    issues, etag = fetch_issue_pages(session, f"{api_url}/repos/{repo}/issues", params, state["etag"])
+    if issues is None:
+        return []
+
+    known = state["issues"]
+    delta = []
+    for issue in issues:
+        key = str(issue["number"])
+        previous = known.get(key)
+        if issue.get("state", "open") != "open":
+            if previous:
+                del known[key]
+                delta.append({"number": issue["number"], "title": issue["title"], "change": "closed"})
+            continue
+        if previous and previous["updated_at"] == issue["updated_at"] and previous["title"] == issue["title"]:
+            continue
+        known[key] = {"title": issue["title"], "updated_at": issue["updated_at"]}
+        delta.append({
+            "number": issue["number"],
+            "title": issue["title"],
+            "updated_at": issue["updated_at"],
+            "change": "edited" if previous else "new",
+            "requirement": format_requirement(issue["number"], issue["title"])
+        })
+
+    updated = [info["updated_at"] for info in known.values()]
+    state["since"] = max(updated) if updated else state["since"]
+    state["etag"] = etag
+    return delta
+
+def write_requirements(state, output_file="requirements.txt"):
+    numbers = sorted((int(n) for n in state["issues"]), reverse=True)
+    requirements = [format_requirement(n, state["issues"][str(n)]["title"]) for n in numbers]
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(requirements))
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync GitHub issues into requirements.txt")
+    parser.add_argument("--full", action="store_true", help="ignore the saved sync state and refetch all open issues")
+    parser.add_argument("--state-file", default=STATE_FILE)
+    parser.add_argument("--delta-file", default=DELTA_FILE)
+    parser.add_argument("--api-url", default=GITHUB_API_URL, help="GitHub API base URL (point at a stand-in server for testing)")
+    args = parser.parse_args()
+
+    # Get GitHub token from environment variable
+    github_token = os.getenv("GITHUB_TOKEN")
+    if not github_token:
+        raise ValueError("GitHub token not found. Set GITHUB_TOKEN environment variable.")
 
-# Fetch issues
-response = requests.get(f"https://api.github.com/repos/{repo}/issues", headers=headers)
-if response.status_code != 200:
-    raise Exception(f"Failed to fetch issues: {response.status_code} - {response.text}")
+    state = {"etag": None, "since": None, "issues": {}} if args.full else load_sync_state(args.state_file)
+    with create_session(github_token) as session:
+        delta = sync_issues(session, state, args.api_url)
 
-issues = response.json()
-requirements = [f"Issue #{issue['number']}: {issue['title']}" for issue in issues]
+    save_sync_state(state, args.state_file)
+    with open(args.delta_file, "w", encoding="utf-8") as f:
+        json.dump(delta, f, indent=2)
 
-# Save requirements to a file
-with open("requirements.txt", "w", encoding="utf-8") as f:
-    f.write("\n".join(requirements))
+    if delta or not os.path.exists("requirements.txt"):
+        write_requirements(state)
+        print(f"Requirements synced to requirements.txt ({len(delta)} changed issues in {args.delta_file})")
+    else:
+        print("No issue changes since last sync")
 
-print("Requirements fetched and saved to requirements.txt")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
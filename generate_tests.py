@@ -1,177 +1,63 @@
+import argparse
 import logging
 import os
 import re
 import time
-import subprocess
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
-import pyperclip
-
-# Ensure directories exist
-os.makedirs('D:\\Documents\\AutoSDLC\\logs', exist_ok=True)
-os.makedirs('D:\\Documents\\AutoSDLC\\tests', exist_ok=True)
-
-# Set up logging
-logging.basicConfig(
-    filename='D:\\Documents\\AutoSDLC\\logs\\generate_tests.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
-console = logging.StreamHandler()
-console.setLevel(logging.INFO)
-formatter = logging.Formatter('%(levelname)s - %(message)s')
-console.setFormatter(formatter)
-logging.getLogger('').addHandler(console)
-
-logging.info("Starting test generation process")
-
-# Chrome options
-chrome_options = Options()
+from grok_browser import open_grok
+from llm_cache import LLMCache, hash_text
+from build_manifest import BuildManifest, hash_file, issue_from_stem
+from artifact_store import ArtifactStore
+from session_pool import GrokSession
+from llm_backend import backend_kind, create_backend, run_with_backend
+from browser_daemon import connect_browser, release_browser
+from code_blocks import BlockSpec
+from jest_sandbox import TestSandbox
+from failure_minimizer import log_reduction, minimize_failures
+from structured_log import log_event, setup_logging
+
+SRC_DIR = "D:\\Documents\\AutoSDLC\\src"
+TESTS_DIR = "D:\\Documents\\AutoSDLC\\tests"
+
+# Bump when the initial test prompt changes so cached responses are not reused
+TEST_PROMPT_VERSION = 1
+
+# Chrome profile, used when no browser daemon is running (see browser_daemon.py)
 user_data_dir = r"C:\Users\Irika\AppData\Local\Google\Chrome\User Data"  # Adjust to your username
 profile_directory = "Default"
-chrome_options.add_argument(f"--user-data-dir={user_data_dir}")
-chrome_options.add_argument(f"--profile-directory={profile_directory}")
-
-# Initialize driver
-driver = webdriver.Chrome(options=chrome_options)
-logging.info("Initialized Chrome driver")
-
-def get_fresh_element(driver, by, value, timeout=20, max_retries=3):
-    for attempt in range(max_retries):
-        try:
-            element = WebDriverWait(driver, timeout).until(
-                EC.element_to_be_clickable((by, value))
-            )
-            if element.is_displayed() and element.is_enabled():
-                driver.execute_script("arguments[0].scrollIntoView(true);", element)
-                logging.info(f"Located element: {value}")
-                return element
-            raise TimeoutException("Element not interactable")
-        except (TimeoutException, StaleElementReferenceException):
-            logging.warning(f"Retry {attempt + 1}/{max_retries} for element {value}")
-            if attempt == max_retries - 1:
-                logging.error(f"Failed to locate interactable element: {value}")
-                return None
-            time.sleep(2)
-    return None
-
-def check_for_login_page(driver):
-    if "login" in driver.current_url.lower():
-        logging.warning("Detected login page. Manual login required.")
-        print("Login page detected. Please log in manually, then press Enter...")
-        input("Press Enter after logging in...")
-        WebDriverWait(driver, 20).until(
-            lambda d: "grok" in d.current_url.lower()
-        )
-        logging.info("Redirected to Grok Chat UI after login")
-
-def wait_for_copy_text_button(driver, prompt_count, max_wait=120):
-    start_time = time.time()
-    last_log_time = start_time
-    while time.time() - start_time < max_wait:
-        try:
-            buttons = driver.find_elements(By.XPATH, "//button[@aria-label]")
-            copy_text_buttons = [btn for btn in buttons if "copy text" in btn.get_attribute("aria-label").lower()]
-            if len(copy_text_buttons) >= prompt_count:
-                logging.info(f"Found {len(copy_text_buttons)} Copy text buttons, selecting button for prompt {prompt_count}")
-                return copy_text_buttons[prompt_count - 1]  # Pick the button corresponding to the latest prompt
-            current_time = time.time()
-            if current_time - last_log_time >= 10:
-                logging.info(f"Found {len(copy_text_buttons)} Copy text buttons, waiting for {prompt_count}")
-                last_log_time = current_time
-            time.sleep(1)
-        except StaleElementReferenceException:
-            logging.warning("Stale element in button check, retrying")
-            time.sleep(1)
-    logging.error("Copy text button not found within max wait time")
-    return None
-
-def start_new_chat(driver):
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            new_chat_button = get_fresh_element(driver, By.XPATH, "//button[contains(@aria-label, 'New Chat') or contains(normalize-space(), 'New Chat')]")
-            if not new_chat_button:
-                raise Exception("New Chat button not found")
-            new_chat_button.click()
-            logging.info("Clicked New Chat button")
-            WebDriverWait(driver, 20).until(
-                EC.presence_of_element_located((By.XPATH, "//textarea[@placeholder='Ask anything']"))
-            )
-            logging.info("New chat session initialized")
-            return
-        except (StaleElementReferenceException, TimeoutException) as e:
-            logging.warning(f"Retry {attempt + 1}/{max_retries} for starting new chat: {str(e)}")
-            if attempt == max_retries - 1:
-                logging.error("Failed to start new chat after retries")
-                raise
-            time.sleep(2)
-    raise Exception("Failed to start new chat after retries")
-
-def send_prompt_and_get_response(driver, prompt, prompt_count):
-    text_input = get_fresh_element(driver, By.XPATH, "//textarea[@placeholder='Ask anything']")
-    if not text_input:
-        raise Exception("Text input field not found")
-
-    logging.info(f"Sending prompt: {prompt[:100]}...")
-    text_input.clear()
-    prompt_parts = prompt.split("\n")
-    for i, part in enumerate(prompt_parts):
-        text_input.send_keys(part)
-        if i < len(prompt_parts) - 1:
-            text_input.send_keys(Keys.SHIFT + Keys.RETURN)
-    text_input.send_keys(Keys.RETURN)
-    logging.info("Prompt submitted")
 
-    try:
-        WebDriverWait(driver, 30).until(
-            EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'r-a8ghvy')]"))
-        )
-        logging.info("Chat message detected")
-    except TimeoutException:
-        logging.error("Prompt verification timed out")
-        raise
-
-    copy_button = wait_for_copy_text_button(driver, prompt_count)
-    if not copy_button:
-        raise Exception("Failed to locate Copy text button")
-
-    pyperclip.copy("")
-    driver.execute_script("arguments[0].scrollIntoView(true);", copy_button)
-    copy_button.click()
-    time.sleep(3)
-    response = pyperclip.paste()
-
-    test_pattern = r"(?:```(?:javascript|js)?\s*|\bdescribe\s*\()(.+?)(?:```|\Z)"
-    match = re.search(test_pattern, response, re.DOTALL)
-    if match:
-        test_code = match.group(1).strip()
-        logging.info(f"Extracted test code length: {len(test_code)} chars")
-        if not test_code.startswith('describe'):
+# The Jest block of a test response, preferring the one with the suite over a repeat of the source;
+# it can be handed on as soon as it is complete (see code_blocks.py)
+TEST_BLOCK = BlockSpec(("javascript", "js"), untagged=True, prefer="describe(", bare=("describe(", None))
+
+def send_prompt_and_get_response(backend, prompt, issue):
+    start = time.perf_counter()
+    response = backend.complete(prompt, until_block=TEST_BLOCK)
+    duration = time.perf_counter() - start
+
+    test_code = TEST_BLOCK.extract(response)
+    if test_code:
+        log_event("response", f"Extracted test code length: {len(test_code)} chars", duration, response)
+        # Blocks now come whole, requires first, so only a bare list of tests still needs a suite around it
+        if not re.search(r"\bdescribe\s*\(", test_code):
             test_code = f"describe('{issue} Tests', () => {{\n{test_code}\n}});"
         return test_code
     else:
-        logging.error(f"No Jest test code found in response: {response[:200]}...")
+        log_event("response", f"No Jest test code found in response ({len(response)} chars)", duration, response,
+                  logging.ERROR)
         raise Exception("No Jest test code found in response")
 
-def run_tests(test_file):
-    try:
-        result = subprocess.run(
-            ['python', 'run_tests.py'],
-            capture_output=True,
-            text=True,
-            check=True
-        )
+def run_tests(js_path, test_file, sandbox=None):
+    """Run test_file against js_path in the issue's own workspace (on sandbox's pool, when given) and return the JestRun."""
+    if sandbox is None:
+        with TestSandbox(workers=1, warm=False) as sandbox:
+            run = sandbox.run(js_path, test_file)
+    else:
+        run = sandbox.run(js_path, test_file)
+    if run.success:
         logging.info("Tests executed successfully")
-        return True, result.stdout
-    except subprocess.CalledProcessError as e:
-        logging.error(f"Tests failed: {e.stderr}")
-        return False, e.stderr
+    else:
+        logging.error(f"Tests failed: {run.summary()}")
+    return run
 
 def get_exported_name(js_code):
     export_match = re.search(r"module\.exports\s*=\s*([^;]+);", js_code)
@@ -189,60 +75,140 @@ def save_test(test_code, output_file, issue, js_code):
     with open(output_file, 'w', encoding='utf-8') as f:
         f.write(full_test_code)
     logging.info(f"Saved test to {output_file}")
-
-try:
-    driver.get("https://x.com/i/grok")
-    logging.info("Opened Grok Chat UI")
-    check_for_login_page(driver)
-
-    WebDriverWait(driver, 20).until(
-        EC.presence_of_element_located((By.XPATH, "//textarea[@placeholder='Ask anything']"))
-    )
-
-    src_dir = "D:\\Documents\\AutoSDLC\\src"
-    js_files = [f for f in os.listdir(src_dir) if f.endswith('.js') and '.test' not in f]
-    if not js_files:
-        raise Exception("No source .js files found in src directory")
-
-    for idx, js_file in enumerate(js_files, 1):
-        issue = js_file.replace('.js', '')
-        with open(os.path.join(src_dir, js_file), "r", encoding="utf-8") as f:
-            js_code = f.read().strip()
-
-        logging.info(f"Processing {issue}")
-        if idx > 1:  # Only start a new chat for issues after the first one
-            start_new_chat(driver)
-        prompt_count = 0
-
-        # Initial test generation
-        prompt_count += 1
-        initial_prompt = f"Generate valid Jest test cases for this JavaScript code. Ensure the code is complete, uses proper Jest syntax (e.g., describe, it, expect), includes necessary imports and mocks, and tests the main functionality:\n{js_code}"
-        test_code = send_prompt_and_get_response(driver, initial_prompt, prompt_count)
-        output_file = os.path.join("D:\\Documents\\AutoSDLC\\tests", f"{issue}.test.js")
-        save_test(test_code, output_file, issue, js_code)
-
-        # Debug loop
-        max_iterations = 3
-        for iteration in range(max_iterations):
-            success, output = run_tests(output_file)
-            if success:
-                logging.info(f"Tests for {issue} passed on iteration {iteration + 1}")
-                print(f"Tests for '{issue}' passed at {output_file}")
-                break
-            else:
-                logging.info(f"Tests failed on iteration {iteration + 1}, refining...")
-                prompt_count += 1
-                debug_prompt = f"The following Jest test code was generated:\n```javascript\n{test_code}\n```\nIt produced these errors when run:\n{output}\nPlease fix the test code to resolve the errors and ensure it works correctly."
-                test_code = send_prompt_and_get_response(driver, debug_prompt, prompt_count)
-                save_test(test_code, output_file, issue, js_code)
-        
-        if not success:
-            logging.warning(f"Tests for {issue} failed after {max_iterations} iterations, moving to next issue")
-            print(f"Tests for '{issue}' failed after max iterations, saved best effort at {output_file}")
-
-finally:
-    if 'driver' in locals():
-        logging.info("Closing browser")
-        time.sleep(2)
-        driver.quit()
-        logging.info("Browser closed")
\ No newline at end of file
+    return full_test_code
+
+def tests_inputs(js_path):
+    """What a test file is built from, for the build manifest."""
+    return {"code": hash_file(js_path), "version": TEST_PROMPT_VERSION}
+
+def test_path(js_path):
+    return os.path.join(TESTS_DIR, os.path.basename(js_path).replace('.js', '.test.js'))
+
+def build_tests(backend, js_path, cache, store=None, sandbox=None):
+    """generate_tests_for() as a manifest build: the test file counts as built only once it passes."""
+    return [test_path(js_path)] if generate_tests_for(backend, js_path, cache, store, sandbox) else None
+
+def generate_tests_for(backend, js_path, cache, store=None, sandbox=None):
+    """Generate tests for one source file, refine them until they pass and return whether they do.
+
+    The final test file is recorded in store (when given), passing or not,
+    with the LLM time and the number of prompts it took.
+    """
+    issue = os.path.basename(js_path).replace('.js', '')
+    with open(js_path, "r", encoding="utf-8") as f:
+        js_code = f.read().strip()
+
+    logging.info(f"Processing {issue}")
+    chat_ready = False
+    prompts = 0
+    latency = 0.0
+
+    def send(prompt):
+        nonlocal chat_ready, prompts, latency
+        if not chat_ready:
+            backend.new_chat()  # Each issue gets its own conversation
+            chat_ready = True
+        start = time.perf_counter()
+        response = send_prompt_and_get_response(backend, prompt, issue)
+        prompts += 1
+        latency += time.perf_counter() - start
+        return response
+
+    # Initial test generation; only the debug loop depends on run output, so only this is cached
+    test_code = cache.get("tests", TEST_PROMPT_VERSION, js_code)
+    initial_prompt = f"Generate valid Jest test cases for this JavaScript code. Ensure the code is complete, uses proper Jest syntax (e.g., describe, it, expect), includes necessary imports and mocks, and tests the main functionality:\n{js_code}"
+    if test_code is None:
+        test_code = send(initial_prompt)
+    output_file = test_path(js_path)
+    test_file = save_test(test_code, output_file, issue, js_code)
+
+    # Debug loop
+    max_iterations = 3
+    for iteration in range(max_iterations):
+        run = run_tests(js_path, output_file, sandbox)
+        success = run.success
+        if success:
+            cache.put("tests", TEST_PROMPT_VERSION, js_code, test_code)
+            logging.info(f"Tests for {issue} passed on iteration {iteration + 1}")
+            print(f"Tests for '{issue}' passed at {output_file}")
+            break
+        else:
+            logging.info(f"Tests failed on iteration {iteration + 1}, refining...")
+            failures, stats = minimize_failures(run)
+            log_reduction(f"{issue} iteration {iteration + 1}", stats)
+            debug_prompt = f"The following Jest test code was generated:\n```javascript\n{test_code}\n```\nIt produced these errors when run:\n{failures}\nPlease fix the test code to resolve the errors and ensure it works correctly."
+            test_code = send(debug_prompt)
+            test_file = save_test(test_code, output_file, issue, js_code)
+
+    if store is not None:
+        store.put(issue_from_stem(issue), "tests", test_file, path=output_file, prompt_hash=hash_text(initial_prompt),
+                  latency=latency if prompts else None, attempts=prompts)
+    if not success:
+        logging.warning(f"Tests for {issue} failed after {max_iterations} iterations, moving to next issue")
+        print(f"Tests for '{issue}' failed after max iterations, saved best effort at {output_file}")
+    return success
+
+def main(changed=False):
+    """Generate and refine tests for every module; changed only for modules whose tests a change since their last run affects."""
+    # Ensure directories exist
+    os.makedirs('D:\\Documents\\AutoSDLC\\logs', exist_ok=True)
+    os.makedirs(TESTS_DIR, exist_ok=True)
+
+    # JSONL records, rotated by size and written off the prompt loop (see structured_log.py)
+    setup_logging("tests", "generate_tests")
+
+    logging.info("Starting test generation process")
+
+    # Attach to a warm daemon session or start Chrome; the HTTP backend (LLM_BACKEND=http) does not need a browser
+    driver, lease = None, None
+    if backend_kind() == "browser":
+        driver, lease = connect_browser(user_data_dir, profile_directory)
+
+    backend = None
+    try:
+        if driver is not None:
+            open_grok(driver)
+        backend = create_backend(GrokSession(0, driver, lease) if driver is not None else None)
+
+        store = ArtifactStore()
+        if not store.rows("code") and os.path.isdir(SRC_DIR):
+            # Code generated before the artifact store existed
+            store.import_files("code", [os.path.join(SRC_DIR, f) for f in os.listdir(SRC_DIR) if f.endswith('.js') and '.test' not in f])
+        # The .js files are views of the stored code; write any that are missing or stale
+        js_files = [store.export(row) for row in store.rows("code")]
+        if not js_files:
+            raise Exception("No code in the artifact store, run generate_code.py first")
+
+        cache = LLMCache()
+        manifest = BuildManifest()
+
+        affected = set()  # test file names to refine again although their own module did not change
+
+        def build(backend, js_path):
+            issue = issue_from_stem(os.path.basename(js_path).replace('.js', ''))
+            manifest.build(issue, "tests", tests_inputs(js_path),
+                           lambda: build_tests(backend, js_path, cache, store, sandbox),
+                           force=os.path.basename(test_path(js_path)) in affected)
+
+        with TestSandbox() as sandbox:
+            if changed:
+                # Tests that failed or reach a module changed since their last run, and modules with no test yet
+                affected = {os.path.basename(test) for test in sandbox.graph.changed_tests()}
+                js_files = [js for js in js_files if os.path.basename(test_path(js)) in affected or not os.path.exists(test_path(js))]
+                logging.info(f"{len(js_files)} modules have tests affected by changes since the last run")
+            run_with_backend(backend, build, js_files)
+        cache.log_stats()
+        store.close()
+
+    finally:
+        if backend is not None:
+            backend.close()
+        if driver is not None:
+            release_browser(driver, lease)
+            logging.info("Browser closed")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate Jest tests for the generated modules and refine them until they pass")
+    parser.add_argument("--changed", action="store_true",
+                        help="only modules whose tests failed or reach code changed since their last run")
+    main(parser.parse_args().changed)
@@ -0,0 +1,452 @@
+import logging
+import os
+import time
+from code_blocks import block_spec, streaming_capture_enabled
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, JavascriptException, StaleElementReferenceException
+
+GROK_URL = "https://x.com/i/grok"
+PROMPT_INPUT_XPATH = "//textarea[@placeholder='Ask anything']"
+
+def get_fresh_element(driver, by, value, timeout=20, max_retries=3, click=True):
+    """Locate an element with retries, ensuring it is interactable (and focused when click is set)."""
+    for attempt in range(max_retries):
+        try:
+            element = WebDriverWait(driver, timeout).until(
+                EC.element_to_be_clickable((by, value))
+            )
+            if element.is_displayed() and element.is_enabled():
+                driver.execute_script("arguments[0].scrollIntoView(true);", element)
+                if click:
+                    element.click()  # Ensure focus for textareas
+                logging.info(f"Located element: {value}")
+                return element
+            raise TimeoutException("Element not interactable")
+        except (TimeoutException, StaleElementReferenceException):
+            logging.warning(f"Retry {attempt + 1}/{max_retries} for element {value}")
+            if attempt == max_retries - 1:
+                logging.error(f"Failed to locate interactable element: {value}")
+                return None
+            time.sleep(2)
+    return None
+
+def check_for_login_page(driver):
+    """Check for login page and prompt for manual login."""
+    if "login" in driver.current_url.lower():
+        logging.warning("Detected login page. Manual login required.")
+        print("Login page detected. Please log in manually, then press Enter...")
+        input("Press Enter after logging in...")
+        WebDriverWait(driver, 20).until(
+            lambda d: "grok" in d.current_url.lower()
+        )
+        logging.info("Redirected to Grok Chat UI after login")
+
+def open_grok(driver):
+    """Open Grok Chat, handle a login redirect and wait for the prompt box."""
+    driver.get(GROK_URL)
+    logging.info("Opened Grok Chat UI")
+    check_for_login_page(driver)
+    WebDriverWait(driver, 20).until(
+        EC.presence_of_element_located((By.XPATH, PROMPT_INPUT_XPATH))
+    )
+
+# Copy text buttons, matched in CSS so lookups stay inside the browser
+COPY_TEXT_SELECTOR = 'button[aria-label*="copy text" i]'
+# Elements Grok wraps one chat message in, the boundary when the message list itself is not found
+MESSAGE_ROW_SELECTOR = '.message-bubble, [data-testid*="message" i]'
+
+# Finds the element holding the chat's messages (user and assistant turns are
+# its children) and remembers it on the page. It is located once per chat from
+# a response whose previous sibling is the user message starting with the
+# prompt; a new chat replaces it, so a disconnected list is looked up again.
+FIND_MESSAGE_LIST_JS = """
+function findMessageList(probe) {
+    let list = window.__autosdlcMessageList;
+    if (list && list.isConnected) return list;
+    if (!probe) return null;
+    for (const button of document.querySelectorAll('%s')) {
+        for (let el = button; el.parentElement; el = el.parentElement) {
+            const sibling = el.previousElementSibling;
+            if (sibling && sibling.textContent.includes(probe)) {
+                window.__autosdlcMessageList = el.parentElement;
+                return el.parentElement;
+            }
+        }
+    }
+    return null;
+}
+""" % COPY_TEXT_SELECTOR
+
+# Remembers the current last message before a prompt is submitted, so the
+# wait below can tell the new response from the previous one. If the previous
+# response was handed over while still streaming, it first waits for that
+# response to finish, since Grok takes no new prompt until then.
+MARK_LAST_MESSAGE_JS = FIND_MESSAGE_LIST_JS + """
+const maxWaitMs = arguments[0];
+const done = arguments[arguments.length - 1];
+function mark() {
+    const list = findMessageList(null);
+    window.__autosdlcSeenMessage = list ? list.lastElementChild : null;
+    window.__autosdlcStreaming = null;
+    done(true);
+}
+const streaming = window.__autosdlcStreaming;
+if (!streaming || !streaming.isConnected || streaming.querySelector('%s')) {
+    mark();
+} else {
+    const observer = new MutationObserver(() => {
+        if (streaming.querySelector('%s')) {
+            observer.disconnect();
+            mark();
+        }
+    });
+    observer.observe(streaming, {childList: true, subtree: true, attributes: true, attributeFilter: ['aria-label']});
+    setTimeout(() => { observer.disconnect(); mark(); }, maxWaitMs);
+}
+""" % (COPY_TEXT_SELECTOR, COPY_TEXT_SELECTOR)
+
+# Resolves with {button, message, block} for the new response as soon as its
+# Copy text button exists. Once the message list is known only its last child
+# is inspected, so the cost does not grow with the chat. Mutations are
+# coalesced so a streaming answer triggers at most one check every 50 ms.
+# Until the list is found (or if it cannot be) the expected-th button of the
+# page is used, as before.
+#
+# With languages given it resolves earlier, with block set, as soon as the
+# streaming answer has a code block in one of those languages followed by
+# more rendered content: the markdown renderer only starts the next block
+# once the closing fence has arrived.
+WAIT_FOR_COPY_BUTTON_JS = FIND_MESSAGE_LIST_JS + """
+const probe = arguments[0];
+const expected = arguments[1];
+const maxWaitMs = arguments[2];
+const languages = arguments[3] || [];
+const prefer = arguments[4] || null;
+const done = arguments[arguments.length - 1];
+const seen = window.__autosdlcSeenMessage || null;
+const BLOCK_SELECTOR = 'pre, p, li, h1, h2, h3, h4, h5, h6, table, blockquote';
+let observer = null;
+let timer = null;
+let pending = false;
+let finished = false;
+
+function finish(result) {
+    if (finished) return;
+    finished = true;
+    if (observer) observer.disconnect();
+    clearTimeout(timer);
+    done(result);
+}
+function closedBlock(message) {
+    const blocks = Array.from(message.querySelectorAll(BLOCK_SELECTOR));
+    for (let i = 0; i < blocks.length; i++) {
+        if (blocks[i].tagName !== 'PRE') continue;
+        const code = blocks[i].querySelector('code') || blocks[i];
+        const lang = ((code.className || '').match(/language-(\\S+)/) || [])[1] || '';
+        if (!languages.includes(lang.toLowerCase())) continue;
+        if (prefer && !code.textContent.includes(prefer)) continue;  // Not the block the stage would pick
+        const followed = blocks.slice(i + 1).some(b => !blocks[i].contains(b) && b.textContent.trim());
+        if (followed) return '```' + lang + '\\n' + code.textContent.replace(/\\n$/, '') + '\\n```';
+    }
+    return null;
+}
+function check() {
+    pending = false;
+    const list = findMessageList(probe);
+    if (list) {
+        const last = list.lastElementChild;
+        if (!last || last === seen) return;
+        const button = last.querySelector('%s');
+        if (button) {
+            finish({button: button, message: last, block: null});
+            return;
+        }
+        const user = last.previousElementSibling;
+        if (languages.length && user && user.textContent.includes(probe)) {
+            const block = closedBlock(last);
+            if (block) {
+                window.__autosdlcStreaming = last;
+                finish({button: null, message: last, block: block});
+            }
+        }
+        return;
+    }
+    const buttons = document.querySelectorAll('%s');
+    if (buttons.length >= expected) finish({button: buttons[expected - 1], message: null, block: null});
+}
+
+check();
+if (!finished) {
+    observer = new MutationObserver(() => {
+        if (!pending) {
+            pending = true;
+            setTimeout(check, 50);
+        }
+    });
+    observer.observe(document.body, {childList: true, subtree: true, attributes: true, attributeFilter: ['aria-label']});
+    timer = setTimeout(() => finish(null), maxWaitMs);
+}
+""" % (COPY_TEXT_SELECTOR, COPY_TEXT_SELECTOR)
+
+def prompt_probe(prompt):
+    """Start of the prompt's first line, used to recognise the user message in the page."""
+    return prompt.strip().split("\n", 1)[0][:40].strip()
+
+def mark_last_message(driver, max_wait=120):
+    driver.set_script_timeout(max_wait + 5)
+    driver.execute_async_script(MARK_LAST_MESSAGE_JS, int(max_wait * 1000))
+
+def wait_for_response(driver, prompt, prompt_count, languages=(), max_wait=120, prefer=None):
+    """Wait in the page for the response to prompt and return (Copy text button, message element, block).
+
+    One execute_async_script call replaces polling every button over
+    WebDriver. The message is None when the chat's message list could not be
+    located and the button was found by position (response number prompt_count).
+    With languages, block is the first finished code block in one of them
+    (containing prefer, when given), returned while the rest of the answer
+    may still be generating (button None).
+    """
+    driver.set_script_timeout(max_wait + 5)
+    try:
+        result = driver.execute_async_script(WAIT_FOR_COPY_BUTTON_JS, prompt_probe(prompt), prompt_count,
+                                             int(max_wait * 1000), [language.lower() for language in languages], prefer)
+    except (TimeoutException, JavascriptException) as e:
+        logging.error(f"Copy text button wait failed: {e}")
+        return None, None, None
+    if result is None:
+        logging.error("Copy text button not found within max wait time")
+        return None, None, None
+    if result["block"]:
+        logging.info(f"Captured a finished {'/'.join(languages)} block of prompt {prompt_count} while streaming")
+    else:
+        logging.info(f"Found Copy text button for prompt {prompt_count}")
+    return result["button"], result["message"], result["block"]
+
+# Grok's stop button, shown in place of send while an answer is generating
+STOP_GENERATION_SELECTOR = 'button[aria-label*="stop" i]'
+
+def stop_after_block():
+    """STOP_AFTER_BLOCK=1 stops generation once the needed code block has been captured."""
+    return os.getenv("STOP_AFTER_BLOCK") == "1"
+
+def stop_generation(driver):
+    stopped = driver.execute_script(
+        "const b = document.querySelector(arguments[0]); if (b) { b.click(); return true; } return false;",
+        STOP_GENERATION_SELECTOR)
+    if stopped:
+        logging.info("Stopped generation after the needed code block")
+    else:
+        logging.warning("Stop button not found, letting the answer finish")
+
+# Serialises the assistant message that owns the given Copy text button in a
+# single call. Code blocks come back fenced with their language tag, the
+# per-block header (language label + copy button) and all buttons are skipped.
+# When the message element is already known the climb from the button is skipped.
+EXTRACT_RESPONSE_JS = """
+const button = arguments[0];
+let container = arguments[1];
+const probe = arguments[2];
+if (!container) {
+    // Climb from the button to its message: the element right after the user's prompt, or a message row.
+    // Never above one message (a second Copy text button) or to the body, so the page is never returned.
+    const copyCount = el => el.querySelectorAll('%s').length;
+    for (let el = button.parentElement; el && el !== document.body && copyCount(el) <= 1; el = el.parentElement) {
+        const user = el.previousElementSibling;
+        if (el.matches('%s') || (probe && user && user.textContent.includes(probe))) {
+            container = el;
+            break;
+        }
+    }
+    if (!container) return '';
+}
+
+const BLOCKS = new Set(['DIV', 'P', 'LI', 'UL', 'OL', 'H1', 'H2', 'H3', 'H4', 'H5', 'H6', 'TABLE', 'TR', 'BLOCKQUOTE']);
+const lines = [];
+let current = '';
+function flush() {
+    if (current.trim()) lines.push(current.replace(/\\s+$/, ''));
+    current = '';
+}
+function walk(node) {
+    if (node.nodeType === Node.TEXT_NODE) {
+        current += node.nodeValue;
+        return;
+    }
+    if (node.nodeType !== Node.ELEMENT_NODE) return;
+    const tag = node.tagName.toUpperCase();
+    if (tag === 'BUTTON' || tag === 'SVG') return;
+    const next = node.nextElementSibling;
+    if (next && next.tagName === 'PRE' && node.querySelector('button')) return;
+    if (tag === 'PRE') {
+        flush();
+        const code = node.querySelector('code') || node;
+        const lang = ((code.className || '').match(/language-(\\S+)/) || [])[1] || '';
+        lines.push('```' + lang);
+        lines.push(code.textContent.replace(/\\n$/, ''));
+        lines.push('```');
+        return;
+    }
+    if (tag === 'TD' || tag === 'TH') current += ' ';
+    const block = BLOCKS.has(tag);
+    if (block) flush();
+    for (const child of node.childNodes) walk(child);
+    if (block) flush();
+}
+walk(container);
+flush();
+return lines.join('\\n');
+""" % (COPY_TEXT_SELECTOR, MESSAGE_ROW_SELECTOR)
+
+def extract_response_text(driver, copy_button, message=None, prompt=None):
+    """Return the full text of the response owning copy_button with one execute_script call.
+
+    Without message the response is found from the button, bounded by the
+    prompt's user turn or a message row; "" when neither is found.
+    """
+    return driver.execute_script(EXTRACT_RESPONSE_JS, copy_button, message, prompt_probe(prompt) if prompt else None) or ""
+
+def wait_for_clipboard_update(initial_content, max_wait=10):
+    """Poll for clipboard update instead of fixed delay."""
+    import pyperclip  # Only the clipboard fallback needs a desktop session
+    start_time = time.time()
+    while time.time() - start_time < max_wait:
+        current_content = pyperclip.paste()
+        if current_content != initial_content:
+            logging.info("Clipboard updated successfully")
+            return current_content
+        time.sleep(0.5)
+    raise Exception("Clipboard did not update within max wait time")
+
+def copy_response_via_clipboard(driver, copy_button):
+    """Legacy capture path: click Copy text and read the OS clipboard."""
+    import pyperclip
+    pyperclip.copy("")
+    driver.execute_script("arguments[0].scrollIntoView(true); arguments[0].click();", copy_button)
+    return wait_for_clipboard_update("")
+
+def capture_response(driver, copy_button, message=None, prompt=None):
+    """Capture a response from the DOM, falling back to the clipboard only if that comes back empty."""
+    response = extract_response_text(driver, copy_button, message, prompt)
+    if response.strip():
+        logging.info(f"Captured response from DOM: {len(response)} chars")
+        return response
+    logging.warning("DOM extraction returned no text, falling back to clipboard")
+    return copy_response_via_clipboard(driver, copy_button)
+
+def start_new_chat(driver):
+    max_retries = 3
+    for attempt in range(max_retries):
+        try:
+            new_chat_button = get_fresh_element(driver, By.XPATH, "//button[contains(@aria-label, 'New Chat') or contains(normalize-space(), 'New Chat')]", click=False)
+            if not new_chat_button:
+                raise Exception("New Chat button not found")
+            new_chat_button.click()
+            logging.info("Clicked New Chat button")
+            WebDriverWait(driver, 20).until(
+                EC.presence_of_element_located((By.XPATH, PROMPT_INPUT_XPATH))
+            )
+            logging.info("New chat session initialized")
+            return
+        except (StaleElementReferenceException, TimeoutException) as e:
+            logging.warning(f"Retry {attempt + 1}/{max_retries} for starting new chat: {str(e)}")
+            if attempt == max_retries - 1:
+                logging.error("Failed to start new chat after retries")
+                raise
+            time.sleep(2)
+    raise Exception("Failed to start new chat after retries")
+
+# Sets the textarea through the native value setter so React's value tracker
+# sees the change, then fires the input event the UI listens to.
+# Returns the value the textarea ends up with.
+SET_PROMPT_JS = """
+const textarea = arguments[0];
+const setter = Object.getOwnPropertyDescriptor(HTMLTextAreaElement.prototype, 'value').set;
+textarea.focus();
+setter.call(textarea, arguments[1]);
+textarea.dispatchEvent(new Event('input', { bubbles: true }));
+textarea.dispatchEvent(new Event('change', { bubbles: true }));
+return textarea.value;
+"""
+
+# Prompt entry: "js" (one script call), "cdp" (Input.insertText) or "keys" (typing)
+PROMPT_INPUT_MODES = ("js", "cdp", "keys")
+
+def prompt_input_mode():
+    mode = os.getenv("PROMPT_INPUT_MODE", "js").lower()
+    if mode not in PROMPT_INPUT_MODES:
+        raise ValueError(f"Unknown PROMPT_INPUT_MODE '{mode}', expected one of {', '.join(PROMPT_INPUT_MODES)}")
+    return mode
+
+def type_prompt(text_input, prompt):
+    """Type the prompt line by line, with SHIFT+RETURN between lines."""
+    text_input.clear()
+    prompt_parts = prompt.split("\n")
+    for i, part in enumerate(prompt_parts):
+        text_input.send_keys(part)
+        if i < len(prompt_parts) - 1:
+            text_input.send_keys(Keys.SHIFT + Keys.RETURN)
+
+def inject_prompt(driver, text_input, prompt, mode):
+    """Put the whole prompt into the textarea in one call; returns False if the value did not take."""
+    try:
+        if mode == "cdp":
+            driver.execute_script(SET_PROMPT_JS, text_input, "")
+            driver.execute_cdp_cmd("Input.insertText", {"text": prompt})
+            value = text_input.get_attribute("value")
+        else:
+            value = driver.execute_script(SET_PROMPT_JS, text_input, prompt)
+    except Exception as e:  # e.g. execute_cdp_cmd on a non-Chromium driver
+        logging.warning(f"Prompt injection ({mode}) failed: {e}")
+        return False
+    return (value or "").replace("\r\n", "\n") == prompt.replace("\r\n", "\n")
+
+def enter_prompt(driver, text_input, prompt, mode=None):
+    """Fill the prompt textarea without submitting; falls back to typing when injection fails."""
+    mode = mode or prompt_input_mode()
+    if mode != "keys":
+        if inject_prompt(driver, text_input, prompt, mode):
+            return mode
+        logging.warning(f"Prompt injection ({mode}) did not take, falling back to typing")
+    type_prompt(text_input, prompt)
+    return "keys"
+
+def chat_dom_size(driver):
+    """Number of elements in the page, which grows with the chat."""
+    return driver.execute_script("return document.getElementsByTagName('*').length;")
+
+def send_prompt(driver, prompt, prompt_count, until_block=None):
+    """Enter a prompt into Grok, wait for its response (number prompt_count in this chat) and return the text.
+
+    until_block is the stage's BlockSpec (or a list of code block languages);
+    when given (and streaming capture is on) the first finished block it wants
+    is returned, fenced, as soon as it is complete instead of after the whole
+    answer.
+    """
+    text_input = get_fresh_element(driver, By.XPATH, PROMPT_INPUT_XPATH)
+    if not text_input:
+        raise Exception("Text input field not found")
+
+    logging.info(f"Sending prompt: {prompt[:100]}...")
+    mark_last_message(driver)
+    enter_prompt(driver, text_input, prompt)
+    text_input.send_keys(Keys.RETURN)
+    logging.info("Prompt submitted")
+
+    spec = block_spec(until_block) if until_block and streaming_capture_enabled() else None
+    copy_button, message, block = wait_for_response(driver, prompt, prompt_count, spec.languages if spec else (),
+                                                    prefer=spec.prefer if spec else None)
+    if block:
+        if stop_after_block():
+            stop_generation(driver)
+        return block
+    if not copy_button:
+        raise Exception("Failed to locate Copy text button")
+
+    response = capture_response(driver, copy_button, message, prompt)
+    if not response:
+        raise Exception("Failed to capture response text")
+    logging.info(f"Captured response text length: {len(response)} chars")
+    return response
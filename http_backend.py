@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import os
+import json
+import threading
+import httpx
+from code_blocks import first_closed_block, streaming_capture_enabled
+
+# Transient statuses worth another attempt
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+class HTTPBackend:
+    """OpenAI/xAI-compatible chat completions client.
+
+    Requests run on a private asyncio loop through one pooled AsyncClient. A
+    semaphore caps the requests in flight, and timeouts, connection errors and
+    retryable statuses are retried with exponential backoff. complete() can be
+    called from any thread; complete_many() sends a list of prompts concurrently.
+
+    With until_block (a stage's BlockSpec, or a list of languages) the answer
+    is streamed and the request closed as soon as the first code block the
+    stage wants is complete; that block is returned on its own and the rest
+    of the answer is never generated.
+    """
+
+    name = "http"
+
+    def __init__(self, base_url, api_key=None, model="grok-3", max_concurrency=4, max_retries=3, timeout=120, backoff=1.0):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="http-backend", daemon=True)
+        self._thread.start()
+
+        async def setup():
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=headers,
+                timeout=timeout,
+                limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+            )
+            self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._run(setup())
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            os.getenv("LLM_API_URL", "https://api.x.ai/v1"),
+            api_key=os.getenv("LLM_API_KEY") or os.getenv("XAI_API_KEY"),
+            model=os.getenv("LLM_MODEL", "grok-3"),
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+        )
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    async def _stream_until_block(self, payload, until_block):
+        """Stream one completion; return (status, text or error body, headers), text cut at the first finished block."""
+        async with self._client.stream("POST", "/chat/completions", json=dict(payload, stream=True)) as response:
+            if response.status_code != 200:
+                return response.status_code, (await response.aread()).decode("utf-8", "replace"), response.headers
+            text = ""
+            lines = response.aiter_lines()
+            async for line in lines:
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                if not delta:
+                    continue
+                text += delta
+                if "\n" in delta:
+                    # Only whole lines, so a closing ``` is not mistaken for the start of ```lang
+                    block = first_closed_block(text[:text.rfind("\n")], until_block)
+                    if block:
+                        await lines.aclose()
+                        return 200, block, response.headers  # Leaving the context closes the stream
+            return 200, text, response.headers
+
+    async def acomplete(self, prompt, until_block=None):
+        payload = {"model": self.model, "messages": [{"role": "user", "content": prompt}]}
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                retry_after = None
+                try:
+                    if until_block and streaming_capture_enabled():
+                        status, text, headers = await self._stream_until_block(payload, until_block)
+                        if status == 200:
+                            return text
+                        response = httpx.Response(status, text=text, headers=headers)
+                    else:
+                        response = await self._client.post("/chat/completions", json=payload)
+                except httpx.TransportError as e:  # Includes timeouts
+                    error = f"{type(e).__name__}: {e}"
+                else:
+                    if response.status_code == 200:
+                        return response.json()["choices"][0]["message"]["content"]
+                    if response.status_code not in RETRYABLE_STATUS:
+                        raise Exception(f"LLM API request failed: {response.status_code} - {response.text[:500]}")
+                    error = f"{response.status_code} - {response.text[:200]}"
+                    retry_after = response.headers.get("Retry-After")
+
+                if attempt == self.max_retries:
+                    raise Exception(f"LLM API request failed after {attempt + 1} attempts: {error}")
+                delay = float(retry_after) if retry_after and retry_after.isdigit() else self.backoff * 2 ** attempt
+                logging.warning(f"LLM API attempt {attempt + 1} failed ({error}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    def complete(self, prompt, until_block=None):
+        return self._run(self.acomplete(prompt, until_block))
+
+    def complete_many(self, prompts):
+        async def gather():
+            return await asyncio.gather(*(self.acomplete(prompt) for prompt in prompts))
+        return self._run(gather())
+
+    def new_chat(self):
+        pass  # Every request is its own conversation
+
+    def close(self):
+        if self._loop.is_closed():
+            return
+        self._run(self._client.aclose())
+        self._run(self._loop.shutdown_asyncgens())  # Streams closed early leave their line iterators behind
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,194 @@
+import argparse
+import logging
+import os
+import re
+import sys
+from datetime import datetime
+from build_manifest import hash_file
+from result_store import ResultStore
+from jest_runner import JEST_ROOT
+
+IMPORT_GRAPH_PATH = "import_graph.jsonl"
+TEST_RUNS_PATH = "test_runs.jsonl"
+# Directories of the project whose modules are tracked
+SOURCE_DIRS = ("src", "tests")
+# Configuration every test depends on; package.json also stands in for every npm package a module requires
+PROJECT_FILES = ("package.json", ".babelrc", "babel.config.js", "jest.config.js")
+IMPORT_PATTERN = re.compile(
+    r"""\brequire\s*\(\s*(['"`])([^'"`\n]+)\1\s*\)"""  # require('../src/Issue_1')
+    r"""|\bimport\s*\(\s*(['"`])([^'"`\n]+)\3\s*\)"""  # import('./lazy')
+    r"""|(?:^|[;\n])\s*(?:import|export)\s+(?:[\w*${}\s,]+?\s+from\s+)?(['"])([^'"\n]+)\5"""  # import x from './x'
+)
+
+def parse_imports(text):
+    """The module specifiers a JavaScript source requires or imports, in order, without repeats."""
+    specifiers = []
+    for match in IMPORT_PATTERN.finditer(text):
+        specifier = match.group(2) or match.group(4) or match.group(6)
+        if specifier not in specifiers:
+            specifiers.append(specifier)
+    return specifiers
+
+def is_test(path):
+    return path.startswith("tests/") and path.endswith(".test.js")
+
+class ImportGraph:
+    """require/import graph of a Jest project's src/ and tests/, for running only the tests a change can affect.
+
+    Each file's specifiers are parsed once per content hash and kept in
+    import_graph.jsonl. Relative specifiers are resolved the way Node does
+    (the path, then .js, .json and /index.js); npm packages and builtins are
+    covered by package.json, which every test depends on along with the
+    other project files. Paths are kept relative to root with forward
+    slashes, so the graph reads the same on Windows and in a workspace copy.
+
+    Every run of a test file is recorded in test_runs.jsonl with the hashes
+    of everything it reached, so changed_tests() can name the tests whose
+    code changed since their last run, plus those that failed it.
+    """
+
+    def __init__(self, root=JEST_ROOT, graph_path=IMPORT_GRAPH_PATH, runs_path=TEST_RUNS_PATH):
+        self.root = root
+        self.cache = ResultStore(graph_path)
+        self.runs = ResultStore(runs_path)
+
+    def files(self):
+        """Relative paths of every .js file under src/ and tests/."""
+        found = []
+        for directory in SOURCE_DIRS:
+            for parent, dirs, names in os.walk(os.path.join(self.root, directory)):
+                dirs[:] = [d for d in dirs if d != "node_modules"]
+                found.extend(self.relative(os.path.join(parent, name)) for name in names if name.endswith(".js"))
+        return sorted(found)
+
+    def tests(self):
+        return [path for path in self.files() if is_test(path)]
+
+    def relative(self, path):
+        return os.path.relpath(os.path.join(self.root, path), self.root).replace("\\", "/")
+
+    def absolute(self, path):
+        return os.path.join(self.root, *path.split("/"))
+
+    def imports(self, path):
+        """path's specifiers, parsed again only when its content changed."""
+        file_hash = hash_file(self.absolute(path))
+        if file_hash is None:
+            return []
+        record = self.cache.get(path)
+        if record is not None and record["hash"] == file_hash:
+            return record["imports"]
+        with open(self.absolute(path), "r", encoding="utf-8", errors="replace") as f:
+            specifiers = parse_imports(f.read())
+        self.cache.put(path, hash=file_hash, imports=specifiers)
+        return specifiers
+
+    def resolve(self, specifier, importer):
+        """The project file a relative specifier in importer names, or None for packages and paths outside src/ and tests/.
+
+        A module that does not exist (yet, or any more) still resolves, to its
+        .js path, so a test keeps depending on a module that was deleted.
+        """
+        if not specifier.startswith(("./", "../")):
+            return None
+        base = os.path.normpath(os.path.join(os.path.dirname(self.absolute(importer)), specifier))
+        candidates = [base, base + ".js", base + ".json", os.path.join(base, "index.js")]
+        resolved = next((c for c in candidates if os.path.isfile(c)), base if os.path.splitext(base)[1] else base + ".js")
+        path = self.relative(resolved)
+        return path if path.startswith(tuple(f"{d}/" for d in SOURCE_DIRS)) else None
+
+    def dependencies(self, path):
+        return [dep for dep in (self.resolve(s, path) for s in self.imports(path)) if dep is not None]
+
+    def closure(self, path):
+        """path and every project file it reaches through require/import."""
+        seen, stack = {path}, [path]
+        while stack:
+            for dep in self.dependencies(stack.pop()):
+                if dep not in seen:
+                    seen.add(dep)
+                    stack.append(dep)
+        return seen
+
+    def affected_tests(self, changed):
+        """Absolute paths of the tests that reach any of the changed files (every test when a project file changed)."""
+        changed = {self.relative(path) for path in changed}
+        tests = self.tests()
+        if changed & set(PROJECT_FILES):
+            affected = tests
+        else:
+            affected = [test for test in tests if self.closure(test) & changed]
+        return [self.absolute(test) for test in affected]
+
+    def fingerprint(self, test):
+        """{path: hash} of everything test depends on: its closure and the project files (None where missing)."""
+        paths = sorted(self.closure(self.relative(test))) + list(PROJECT_FILES)
+        return {path: hash_file(self.absolute(path)) for path in paths}
+
+    def changed_tests(self):
+        """Absolute paths of the tests that never ran, failed their last run or depend on a file changed since."""
+        changed = []
+        for test in self.tests():
+            record = self.runs.get(test)
+            if record is None or not record["success"] or record["fingerprint"] != self.fingerprint(test):
+                changed.append(self.absolute(test))
+        return changed
+
+    def test_path(self, file, run_root):
+        """The tests/ path of a file as a JestRun reports it, or None when it names no test of the project.
+
+        Jest names suites relative to the directory it ran in (a workspace
+        copy of the project, or the project itself), or absolute.
+        """
+        if os.path.isabs(file):
+            try:
+                file = os.path.relpath(file, run_root)
+            except ValueError:  # Another drive on Windows
+                return None
+        path = os.path.normpath(file).replace("\\", "/")
+        return path if is_test(path) else None
+
+    def record_run(self, run):
+        """Remember, for each test file in a JestRun, what it ran against and whether it passed."""
+        outcomes = {}
+        for test in run.tests:
+            outcomes[test["file"]] = outcomes.get(test["file"], True) and test["status"] != "failed"
+        for file, _ in run.errors:
+            if file:
+                outcomes[file] = False
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        for file, success in outcomes.items():
+            test = self.test_path(file, run.root)
+            if test is None:
+                logging.warning(f"Not recording {file}: not a test file of {self.root}")
+                continue
+            self.runs.put(test, success=success, fingerprint=self.fingerprint(test), timestamp=timestamp)
+
+    def close(self):
+        self.cache.compact()
+        self.runs.compact()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List the Jest test files a change can affect")
+    parser.add_argument("files", nargs="*", help="changed files (default: whatever changed since each test's last run)")
+    parser.add_argument("--root", default=JEST_ROOT, help="project directory holding src/ and tests/")
+    parser.add_argument("--graph", action="store_true", help="print each file's in-project dependencies instead")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    with ImportGraph(args.root) as graph:
+        if args.graph:
+            for path in graph.files():
+                print(f"{path} -> {', '.join(graph.dependencies(path)) or '(nothing in the project)'}")
+            sys.exit(0)
+        tests = graph.affected_tests([os.path.abspath(f) for f in args.files]) if args.files else graph.changed_tests()
+        total = len(graph.tests())
+    for test in tests:
+        print(test)
+    logging.info(f"{len(tests)} of {total} test files to run")
@@ -0,0 +1,200 @@
+import argparse
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+
+NODE_PATH = shutil.which("node") or r"D:\Program Files\nodejs\node.exe"
+JEST_ROOT = "D:\\Documents\\AutoSDLC"
+JEST_WORKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "jest_worker.js")
+# Seconds one run may take before the worker is killed and the run repeated on its own
+JEST_TIMEOUT = 300
+ANSI_PATTERN = re.compile(r"\x1b\[[0-9;]*m")
+
+def strip_ansi(text):
+    return ANSI_PATTERN.sub("", text or "")
+
+class JestRun:
+    """The outcome of one Jest run, parsed from the object `jest --json` prints.
+
+    tests holds one record per test: {"file", "name", "status" (passed,
+    failed, pending, ...), "duration" (ms), "failures" (messages)}; errors
+    holds (file, message) for suites that failed before any test ran, such as
+    a syntax error or a bad require in the test file.
+    """
+
+    def __init__(self, results, seconds, root=JEST_ROOT):
+        self.results = results
+        self.seconds = seconds
+        self.root = root
+        self.success = bool(results.get("success"))
+        self.tests = []
+        self.errors = []
+        for suite in results.get("testResults", []):
+            file = os.path.relpath(suite["name"], root) if os.path.isabs(suite["name"]) else suite["name"]
+            for test in suite.get("assertionResults", []):
+                self.tests.append({"file": file, "name": test["fullName"], "status": test["status"],
+                                   "duration": test.get("duration"),
+                                   "failures": [strip_ansi(m) for m in test.get("failureMessages", [])]})
+            if suite.get("status") == "failed" and not suite.get("assertionResults"):
+                self.errors.append((file, strip_ansi(suite.get("message")).strip()))
+        if not results.get("testResults") and not self.success:
+            self.errors.append(("", "No tests found"))
+
+    @property
+    def failed(self):
+        return [test for test in self.tests if test["status"] == "failed"]
+
+    def summary(self):
+        passed = sum(1 for test in self.tests if test["status"] == "passed")
+        return (f"{passed} passed, {len(self.failed)} failed, {len(self.errors)} suites failed to run "
+                f"of {len(self.tests)} tests in {self.seconds:.2f}s")
+
+    def output(self):
+        """Plain-text report: every test with its status, then the failures in full."""
+        lines = []
+        for test in self.tests:
+            mark = {"passed": "PASS", "failed": "FAIL"}.get(test["status"], test["status"].upper())
+            duration = f" ({test['duration']} ms)" if test["duration"] is not None else ""
+            lines.append(f"{mark} {test['file']} > {test['name']}{duration}")
+        for test in self.failed:
+            lines.append(f"\n● {test['name']}\n\n" + "\n".join(test["failures"]))
+        for file, message in self.errors:
+            lines.append(f"\n● {file} failed to run\n\n{message}")
+        lines.append(f"\nTests: {self.summary()}")
+        return "\n".join(lines)
+
+class JestWorker:
+    """One warm jest_worker.js process: test files in on stdin, their `--json` results out on stdout."""
+
+    def __init__(self, root=JEST_ROOT, node_path=NODE_PATH, timeout=JEST_TIMEOUT):
+        self.timeout = timeout
+        self.requests = 0
+        self.process = subprocess.Popen([node_path, JEST_WORKER, root], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL, text=True, encoding="utf-8")
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def run(self, root, files):
+        self.requests += 1
+        watchdog = threading.Timer(self.timeout, self.process.kill)
+        watchdog.start()
+        try:
+            self.process.stdin.write(json.dumps({"id": self.requests, "root": root, "files": files}) + "\n")
+            self.process.stdin.flush()
+            line = self.process.stdout.readline()
+        finally:
+            watchdog.cancel()
+        if not line:
+            raise Exception(f"Jest worker exited or timed out after {self.timeout}s")
+        reply = json.loads(line)
+        if "error" in reply:
+            raise Exception(f"Jest worker failed: {reply['error'][:500]}")
+        return reply
+
+    def close(self):
+        if self.alive():
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=10)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+
+def run_jest_once(files=(), root=JEST_ROOT, node_path=NODE_PATH, timeout=JEST_TIMEOUT):
+    """Run Jest in a process of its own (node jest.js --json, no shell) and return its results object."""
+    jest_bin = os.path.join(root, "node_modules", "jest", "bin", "jest.js")
+    command = [node_path, jest_bin, "--json", "--ci", "--silent"] + (["--runTestsByPath", *files] if files else [])
+    result = subprocess.run(command, cwd=root, capture_output=True, text=True, encoding="utf-8", timeout=timeout,
+                            env={**os.environ, "FORCE_COLOR": "0"})
+    try:
+        return json.loads(result.stdout)
+    except json.JSONDecodeError:
+        raise Exception(f"Jest did not report results (exit code {result.returncode}): {result.stderr.strip()[:500]}")
+
+class JestRunner:
+    """Runs chosen test files on a warm Jest process and returns a JestRun per run.
+
+    Jest is loaded once, so a run of one test file costs the tests rather
+    than node, npx and Jest startup. Runs are serialized, since they share the
+    process. A worker that dies, hangs or leaves handles open after a run is
+    replaced; when it cannot run at all the files are run by a one-off
+    `node jest.js --json` instead. warm=False always runs that way.
+    """
+
+    def __init__(self, root=JEST_ROOT, node_path=NODE_PATH, warm=True):
+        self.root = root
+        self.node_path = node_path
+        self.warm = warm
+        self.worker = None
+        self._lock = threading.Lock()
+
+    def run(self, files=(), root=None):
+        """Run the given test files (every test under root when empty) and return the JestRun.
+
+        root overrides the runner's project directory for this run, so one warm
+        worker can serve several workspaces (see jest_sandbox.py).
+        """
+        root = root or self.root
+        files = [os.path.abspath(file) for file in files]
+        start = time.perf_counter()
+        with self._lock:
+            results = None
+            if self.warm:
+                try:
+                    if self.worker is None or not self.worker.alive():
+                        self.worker = JestWorker(self.root, self.node_path)
+                    reply = self.worker.run(root, files)
+                    results = reply["results"]
+                    if reply.get("recycle"):
+                        logging.info("Jest run left handles open, replacing the worker")
+                        self._drop_worker()
+                        self.worker = JestWorker(self.root, self.node_path)  # Warms up while the next prompt runs
+                except Exception as e:
+                    logging.warning(f"Warm Jest worker failed ({e}), running Jest on its own")
+                    self._drop_worker()
+            if results is None:
+                results = run_jest_once(files, root, self.node_path)
+        run = JestRun(results, time.perf_counter() - start, root)
+        names = ", ".join(os.path.basename(file) for file in files) or "all tests"
+        logging.info(f"Jest on {names}: {run.summary()}")
+        return run
+
+    def _drop_worker(self):
+        if self.worker is not None:
+            self.worker.process.kill()
+            self.worker = None
+
+    def close(self):
+        with self._lock:
+            if self.worker is not None:
+                self.worker.close()
+                self.worker = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run Jest test files on a warm worker and print per-test results")
+    parser.add_argument("files", nargs="*", help="test files (default: every test)")
+    parser.add_argument("--root", default=JEST_ROOT, help="project directory holding package.json and node_modules")
+    parser.add_argument("--json", action="store_true", help="print the per-test records as JSON lines")
+    parser.add_argument("--repeat", type=int, default=1, help="run again to time the warm worker")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    with JestRunner(args.root) as runner:
+        for _ in range(args.repeat):
+            run = runner.run(args.files)
+    if args.json:
+        for test in run.tests:
+            print(json.dumps(test))
+    else:
+        print(run.output())
@@ -0,0 +1,198 @@
+import argparse
+import glob
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from build_manifest import hash_file
+from llm_cache import hash_text
+from result_store import ResultStore
+from jest_runner import JEST_ROOT, JestRun, JestRunner
+from jest_impact import PROJECT_FILES, ImportGraph
+
+TEST_RESULTS_PATH = "test_results.jsonl"
+# One workspace per issue, kept for the run so Jest's haste map and transform cache stay warm for its path
+SANDBOX_DIR = os.path.join(tempfile.gettempdir(), "autosdlc_sandboxes")
+
+def sandbox_workers_from_env():
+    """Issues to test at once, from TEST_WORKERS (default: one per CPU core)."""
+    return max(1, int(os.getenv("TEST_WORKERS", str(os.cpu_count() or 1))))
+
+def link_directory(target, link):
+    """Symlink link to the directory target, or a junction where Windows does not allow symlinks."""
+    try:
+        os.symlink(target, link, target_is_directory=True)
+    except OSError:
+        import _winapi  # Junctions need no privileges; only reached on Windows
+        _winapi.CreateJunction(target, link)
+
+def remove_workspace(workspace):
+    # Unlink node_modules first: removing the tree through a junction would delete the real packages
+    link = os.path.join(workspace, "node_modules")
+    if os.path.islink(link):
+        os.unlink(link)
+    elif os.path.isdir(link):
+        os.rmdir(link)
+    shutil.rmtree(workspace, ignore_errors=True)
+
+class TestSandbox:
+    """Runs each issue's source/test pair in a workspace of its own, several issues at once.
+
+    A workspace is a temporary directory holding the project files, the src/
+    modules and only this issue's test file, with node_modules linked in, so
+    another issue's broken test can no longer fail this one's run. It is
+    refreshed for every run of the issue and removed on close(). Runs go to
+    a pool of warm Jest workers (TEST_WORKERS, default one per core). Results
+    are kept in test_results.jsonl by the hashes of the source, the test,
+    every module the test reaches and the project files (see jest_impact.py),
+    so a pair none of whose code has changed is never run twice. Every run is
+    recorded in the import graph for `--changed` runs.
+    """
+
+    __test__ = False  # A name pytest would otherwise try to collect
+
+    def __init__(self, root=JEST_ROOT, workers=None, results_path=TEST_RESULTS_PATH, warm=True, keep=False,
+                 sandbox_dir=SANDBOX_DIR):
+        self.root = root
+        self.sandbox_dir = sandbox_dir
+        self.warm = warm
+        self.keep = keep
+        self.workers = workers or sandbox_workers_from_env()
+        self.results = ResultStore(results_path)
+        self.graph = ImportGraph(root)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="jest")
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._runners = []
+        self._workspaces = {}  # workspace path -> lock, so one issue never runs twice at once
+        self._lock = threading.Lock()
+
+    def key(self, src_path, test_path):
+        fingerprint = self.graph.fingerprint(test_path)
+        return hash_text(f"{hash_file(src_path)}\0{hash_file(test_path)}\0{json.dumps(fingerprint, sort_keys=True)}")
+
+    def submit(self, src_path, test_path):
+        """Queue one pair; the future resolves to its JestRun."""
+        return self.executor.submit(self.run, src_path, test_path)
+
+    def run(self, src_path, test_path):
+        """The JestRun of test_path against src_path, from the results cache when the pair is unchanged."""
+        key = self.key(src_path, test_path)
+        workspace = os.path.join(self.sandbox_dir, os.path.basename(test_path).split(".")[0])
+        cached = self.results.get(key)
+        if cached is not None:
+            with self._lock:
+                self.hits += 1
+            # Jest reported the suites under the workspace the run used, so their paths are relative to it
+            run = JestRun(cached["results"], 0.0, cached.get("root", workspace))
+            logging.info(f"{os.path.basename(test_path)} unchanged since {cached['timestamp']}, reusing: {run.summary()}")
+            self.graph.record_run(run)
+            return run
+        with self._lock:
+            self.misses += 1
+
+        with self._lock:
+            workspace_lock = self._workspaces.setdefault(workspace, threading.Lock())
+        with workspace_lock:
+            self.prepare(workspace, src_path, test_path)
+            run = self._runner().run([os.path.join(workspace, "tests", os.path.basename(test_path))], workspace)
+        self.results.put(key, src=os.path.basename(src_path), test=os.path.basename(test_path),
+                         success=run.success, seconds=round(run.seconds, 3), results=run.results,
+                         root=workspace, timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        self.graph.record_run(run)
+        return run
+
+    def run_all(self, pairs):
+        """Run every (src, test) pair on the pool and return {test path: JestRun} (a run that raised is left out)."""
+        futures = {test_path: self.submit(src_path, test_path) for src_path, test_path in pairs}
+        runs = {}
+        for test_path, future in futures.items():
+            try:
+                runs[test_path] = future.result()
+            except Exception as e:
+                logging.error(f"Running {test_path} failed: {e}")
+        return runs
+
+    def prepare(self, workspace, src_path, test_path):
+        """Create workspace, or bring it up to date: project files, every src/ module and only this test."""
+        if not os.path.isdir(workspace):
+            os.makedirs(workspace)
+            link_directory(os.path.join(os.path.abspath(self.root), "node_modules"), os.path.join(workspace, "node_modules"))
+        for name in PROJECT_FILES:
+            if os.path.exists(os.path.join(self.root, name)):
+                shutil.copy2(os.path.join(self.root, name), workspace)
+        # Every module is copied, since generated modules may require each other; tests are this issue's only
+        for directory in ("src", "tests"):
+            shutil.rmtree(os.path.join(workspace, directory), ignore_errors=True)
+            os.makedirs(os.path.join(workspace, directory))
+        src_dir = os.path.dirname(os.path.abspath(src_path))
+        for name in os.listdir(src_dir):
+            if name.endswith(".js"):
+                shutil.copy2(os.path.join(src_dir, name), os.path.join(workspace, "src"))
+        shutil.copy2(test_path, os.path.join(workspace, "tests"))
+
+    def _runner(self):
+        runner = getattr(self._local, "runner", None)
+        if runner is None:
+            runner = JestRunner(self.root, warm=self.warm)
+            self._local.runner = runner
+            with self._lock:
+                self._runners.append(runner)
+        return runner
+
+    def log_stats(self):
+        logging.info(f"Test results cache: {self.hits} reused, {self.misses} run")
+
+    def close(self):
+        """Wait for queued runs, stop the Jest workers and drop superseded cache lines."""
+        self.executor.shutdown(wait=True)
+        for runner in self._runners:
+            runner.close()
+        if not self.keep:
+            for workspace in self._workspaces:
+                remove_workspace(workspace)
+        self.results.compact()
+        self.graph.close()
+        self.log_stats()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def issue_pairs(src_dir, tests_dir):
+    """(src, test) for every test file in tests_dir whose module is in src_dir."""
+    pairs = []
+    for test_path in sorted(glob.glob(os.path.join(tests_dir, "*.test.js"))):
+        src_path = os.path.join(src_dir, os.path.basename(test_path).replace(".test.js", ".js"))
+        if os.path.exists(src_path):
+            pairs.append((src_path, test_path))
+    return pairs
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run every issue's tests in its own workspace, several at once")
+    parser.add_argument("--root", default=JEST_ROOT, help="project directory holding package.json, src/, tests/ and node_modules")
+    parser.add_argument("--workers", type=int, default=None, help="issues at once (default: TEST_WORKERS or one per core)")
+    parser.add_argument("--no-cache", action="store_true", help="run unchanged pairs again")
+    parser.add_argument("--keep", action="store_true", help=f"leave the workspaces in {SANDBOX_DIR}")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(threadName)s - %(levelname)s - %(message)s')
+
+    pairs = issue_pairs(os.path.join(args.root, "src"), os.path.join(args.root, "tests"))
+    start = time.perf_counter()
+    with TestSandbox(args.root, args.workers, keep=args.keep) as sandbox:
+        if args.no_cache:
+            sandbox.results.records.clear()
+        runs = sandbox.run_all(pairs)
+    for test_path, run in runs.items():
+        print(f"{os.path.basename(test_path)}: {'passed' if run.success else 'failed'} ({run.summary()})")
+    print(f"{len(runs)} issues tested in {time.perf_counter() - start:.2f}s with {sandbox.workers} workers")
+    sys.exit(0 if runs and all(run.success for run in runs.values()) else 1)
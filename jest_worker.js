@@ -0,0 +1,60 @@
+// Warm Jest worker for jest_runner.py: one JSON request per stdin line, one JSON result per stdout line.
+//
+// Request:  {"id": 1, "root": "D:\\Documents\\AutoSDLC", "files": ["D:\\...\\tests\\Issue_3.test.js"]}
+// Result:   {"id": 1, "results": <the same object `jest --json` prints>, "recycle": false, "ms": 812.4}
+//
+// Jest is loaded once and runCLI() is called per request on just the given files, so a run costs the
+// tests themselves instead of node, npx and Jest startup. Tests run in this process (one file runs in
+// band anyway); when a run leaves handles open (a server that was never closed) the result asks for
+// the worker to be replaced so the next run does not inherit them.
+process.env.FORCE_COLOR = '0';
+const path = require('path');
+const readline = require('readline');
+
+const write = process.stdout.write.bind(process.stdout);
+// Anything Jest or the tests print goes to stderr, so stdout only carries results
+process.stdout.write = process.stderr.write.bind(process.stderr);
+
+const jest = {};
+function load(root) {
+    if (!jest[root]) {
+        const resolve = (name) => require.resolve(name, { paths: [root] });
+        jest[root] = { runCLI: require(resolve('jest')).runCLI, format: require(resolve('@jest/test-result')).formatTestResults };
+    }
+    return jest[root];
+}
+
+async function run({ root, files }) {
+    const { runCLI, format } = load(root);
+    const argv = {
+        _: files.map((file) => path.resolve(root, file)), $0: 'jest', runTestsByPath: files.length > 0,
+        runInBand: true, ci: true, watchman: false, silent: true, reporters: [], passWithNoTests: false
+    };
+    const handles = process._getActiveHandles().length;
+    const { results } = await runCLI(argv, [root]);
+    return { results: format(results), recycle: process._getActiveHandles().length > handles };
+}
+
+// Started with the project root, Jest is loaded before the first request arrives
+if (process.argv[2]) load(process.argv[2]);
+
+let queue = Promise.resolve();
+const lines = readline.createInterface({ input: process.stdin });
+lines.on('line', (line) => {
+    if (!line.trim()) return;
+    const request = JSON.parse(line);
+    // One run at a time: runCLI shares the process, its cwd and its module cache
+    queue = queue.then(async () => {
+        const start = process.hrtime.bigint();
+        let result;
+        try {
+            result = await run(request);
+        } catch (error) {
+            result = { error: String(error && error.stack || error), recycle: true };
+        }
+        result.id = request.id;
+        result.ms = Number(process.hrtime.bigint() - start) / 1e6;
+        write(JSON.stringify(result) + '\n');
+    });
+});
+lines.on('close', () => queue.then(() => process.exit(0)));
@@ -0,0 +1,159 @@
+import argparse
+import json
+import logging
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+NODE_PATH = shutil.which("node") or r"D:\Program Files\nodejs\node.exe"
+CHECK_WORKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "node_check_worker.js")
+# Milliseconds a module's top-level code may run, and seconds a whole check may take before the worker is replaced
+LOAD_TIMEOUT_MS = 1000
+CHECK_TIMEOUT = 10
+
+def check_workers_from_env():
+    """Warm Node processes to check with, from NODE_CHECK_WORKERS (default 1)."""
+    return max(1, int(os.getenv("NODE_CHECK_WORKERS", "1")))
+
+class JSCheckError(Exception):
+    """Generated JavaScript that does not compile or load; errors are the worker's {kind, message, line, column} dicts."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("JavaScript check failed:\n" + format_errors(errors))
+
+def format_errors(errors):
+    return "\n".join(f"line {e['line']}: {e['message']}" if e.get("line") else e["message"] for e in errors)
+
+class NodeWorker:
+    """One warm node_check_worker.js process: a module's source in on stdin, its errors and exports out on stdout."""
+
+    def __init__(self, node_path=NODE_PATH, timeout=CHECK_TIMEOUT):
+        self.timeout = timeout
+        self.requests = 0
+        self.process = subprocess.Popen([node_path, CHECK_WORKER], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL, text=True, encoding="utf-8")
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def check(self, source, filename, load_timeout=LOAD_TIMEOUT_MS):
+        self.requests += 1
+        request = {"id": self.requests, "filename": os.path.abspath(filename), "source": source,
+                   "timeout": load_timeout}
+        watchdog = threading.Timer(self.timeout, self.process.kill)
+        watchdog.start()
+        try:
+            self.process.stdin.write(json.dumps(request) + "\n")
+            self.process.stdin.flush()
+            line = self.process.stdout.readline()
+        finally:
+            watchdog.cancel()
+        if not line:
+            raise Exception(f"Node check worker exited or timed out after {self.timeout}s")
+        return json.loads(line)
+
+    def close(self):
+        if self.alive():
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+
+class NodeChecker:
+    """Syntax and load gate for generated modules, on a pool of warm Node workers.
+
+    check() compiles a module, resolves its requires from where it will be
+    saved and runs its top-level code in a fresh V8 context with inert
+    stand-ins for every required module, all in a few milliseconds, so broken
+    code is sent back to the LLM by the code stage instead of failing a Jest
+    run later. A worker that crashes or hangs is replaced.
+    """
+
+    def __init__(self, workers=None, node_path=NODE_PATH):
+        self.node_path = node_path
+        self.size = workers or check_workers_from_env()
+        self.idle = queue.LifoQueue()
+        self.started = 0
+        self._workers = []
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self.started < self.size:
+                self.started += 1
+                worker = NodeWorker(self.node_path)
+                self._workers.append(worker)
+                return worker
+        return self.idle.get()
+
+    def _release(self, worker):
+        if not worker.alive():
+            worker = NodeWorker(self.node_path)
+            with self._lock:
+                self._workers.append(worker)
+        self.idle.put(worker)
+
+    def check(self, source, filename):
+        """{"errors": [...], "exports": [...], "ms": ...} for source as if saved at filename."""
+        worker = self._acquire()
+        try:
+            return worker.check(source, filename)
+        except Exception as e:
+            worker.process.kill()
+            return {"errors": [{"kind": "timeout", "message": str(e), "line": None, "column": None}], "exports": [],
+                    "ms": worker.timeout * 1000}
+        finally:
+            self._release(worker)
+
+    def errors(self, source, filename):
+        """The check's errors, plus one when the module exports nothing for its tests to require."""
+        start = time.perf_counter()
+        result = self.check(source, filename)
+        errors = result["errors"]
+        if not errors and not result["exports"]:
+            errors = [{"kind": "exports", "line": None, "column": None,
+                       "message": "The module exports nothing (no module.exports), so its tests cannot require it"}]
+        logging.info(f"Checked {os.path.basename(filename)} in {(time.perf_counter() - start) * 1000:.1f} ms "
+                     f"(node {result['ms']:.1f} ms): {len(errors)} errors")
+        return errors
+
+    def close(self):
+        for worker in self._workers:
+            worker.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Syntax- and load-check generated JavaScript modules")
+    parser.add_argument("files", nargs="+", help=".js files to check")
+    parser.add_argument("--json", action="store_true", help="print the structured results")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    failed = 0
+    with NodeChecker() as checker:
+        for path in args.files:
+            with open(path, "r", encoding="utf-8") as f:
+                errors = checker.errors(f.read(), path)
+            failed += bool(errors)
+            if args.json:
+                print(json.dumps({"file": path, "errors": errors}))
+            elif errors:
+                print(f"{path}:\n  " + format_errors(errors).replace("\n", "\n  "))
+            else:
+                print(f"{path}: ok")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,85 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from grok_browser import chat_dom_size, open_grok, send_prompt, start_new_chat
+from session_pool import run_on_sessions
+
+def backend_kind():
+    """'browser' (Grok chat UI, the default) or 'http' (OpenAI/xAI-compatible API), from LLM_BACKEND."""
+    kind = os.getenv("LLM_BACKEND", "browser").lower()
+    if kind not in ("browser", "http"):
+        raise ValueError(f"Unknown LLM_BACKEND '{kind}', expected 'browser' or 'http'")
+    return kind
+
+def chat_limits():
+    """(prompts, page elements) after which a chat is rotated, from CHAT_MAX_PROMPTS / CHAT_MAX_DOM_NODES; 0 disables either."""
+    return int(os.getenv("CHAT_MAX_PROMPTS", "20")), int(os.getenv("CHAT_MAX_DOM_NODES", "20000"))
+
+class BrowserBackend:
+    """complete() through the Grok chat UI on one browser session.
+
+    A long chat slows every prompt and grows the tab's memory, so a new chat
+    is started once the current one holds max_prompts responses or the page
+    has more than max_dom_nodes elements.
+    """
+
+    name = "browser"
+
+    def __init__(self, session, max_prompts=None, max_dom_nodes=None):
+        self.session = session
+        default_prompts, default_nodes = chat_limits()
+        self.max_prompts = default_prompts if max_prompts is None else max_prompts
+        self.max_dom_nodes = default_nodes if max_dom_nodes is None else max_dom_nodes
+
+    def chat_full(self):
+        count = self.session.prompt_count
+        if not count:
+            return False
+        if self.max_prompts and count >= self.max_prompts:
+            logging.info(f"Chat on session {self.session.index} reached {count} prompts, rotating")
+            return True
+        if self.max_dom_nodes:
+            size = chat_dom_size(self.session.driver)
+            if size > self.max_dom_nodes:
+                logging.info(f"Chat on session {self.session.index} has {size} page elements, rotating")
+                return True
+        return False
+
+    def complete(self, prompt, until_block=None):
+        if self.chat_full():
+            self.new_chat()
+        self.session.prompt_count += 1
+        return send_prompt(self.session.driver, prompt, self.session.prompt_count, until_block)
+
+    def new_chat(self):
+        """Start a fresh conversation, unless nothing has been sent in the current one."""
+        if self.session.prompt_count:
+            if self.session.before_new_chat:
+                self.session.before_new_chat()
+            start_new_chat(self.session.driver)
+            self.session.prompt_count = 0
+
+    def close(self):
+        pass  # The stage script owns the driver
+
+def create_backend(primary_session=None):
+    """Build the backend selected by LLM_BACKEND; the browser one needs the stage's open session."""
+    if backend_kind() == "http":
+        from http_backend import HTTPBackend  # httpx is only needed for the API path
+        backend = HTTPBackend.from_env()
+        logging.info(f"Using HTTP LLM backend at {backend.base_url} (model {backend.model})")
+        return backend
+    if primary_session is None:
+        raise ValueError("The browser backend needs an open Grok session")
+    return BrowserBackend(primary_session)
+
+def run_with_backend(backend, func, items):
+    """Run func(backend, item) over items and return the results in item order.
+
+    The browser backend fans out over the Chrome session pool (GROK_SESSIONS);
+    the HTTP backend runs up to its own concurrency limit at once.
+    """
+    if isinstance(backend, BrowserBackend):
+        return run_on_sessions(backend.session, open_grok, lambda session, item: func(BrowserBackend(session), item), items)
+    with ThreadPoolExecutor(max_workers=backend.max_concurrency) as executor:
+        return list(executor.map(lambda item: func(backend, item), items))
@@ -0,0 +1,107 @@
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+CACHE_DIR = 'D:\\Documents\\AutoSDLC\\cache\\llm'
+
+def cache_bypass_requested():
+    """True when the run was started with --no-cache or LLM_CACHE_BYPASS=1."""
+    return "--no-cache" in sys.argv or os.getenv("LLM_CACHE_BYPASS") == "1"
+
+def hash_text(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class LLMCache:
+    """Content-addressed on-disk cache of LLM responses.
+
+    Entries are keyed by (stage, prompt template version, sha256 of the input),
+    so a stage only goes back to Grok when its input or prompt changed. Old
+    entries are evicted by age and, oldest first, by total size.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_age_days=30, max_bytes=200 * 1024 * 1024, bypass=None):
+        self.cache_dir = cache_dir
+        self.max_age_days = max_age_days
+        self.max_bytes = max_bytes
+        self.bypass = cache_bypass_requested() if bypass is None else bypass
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()  # Stages may share one cache across pooled sessions
+        os.makedirs(cache_dir, exist_ok=True)
+        self.evict()
+
+    def _entry_path(self, stage, version, input_text):
+        key = hash_text(f"{stage}\0{version}\0{hash_text(input_text)}")
+        return os.path.join(self.cache_dir, f"{stage}_{key}.json")
+
+    def get(self, stage, version, input_text):
+        """Return the cached response or None. Always a miss when bypassed."""
+        path = self._entry_path(stage, version, input_text)
+        if self.bypass or not os.path.exists(path):
+            self._count(hit=False)
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logging.warning(f"Discarding unreadable cache entry {path}: {e}")
+            self._count(hit=False)
+            return None
+        os.utime(path)  # Recently used entries survive size eviction longest
+        self._count(hit=True)
+        logging.info(f"LLM cache hit for {stage} (input hash {entry['input_hash'][:12]})")
+        return entry["response"]
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def put(self, stage, version, input_text, response):
+        path = self._entry_path(stage, version, input_text)
+        entry = {
+            "stage": stage,
+            "version": version,
+            "input_hash": hash_text(input_text),
+            "created": time.time(),
+            "response": response
+        }
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def evict(self):
+        """Drop entries older than max_age_days, then the least recently used until under max_bytes."""
+        cutoff = time.time() - self.max_age_days * 86400
+        entries = []
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            stat = os.stat(path)
+            if stat.st_mtime < cutoff:
+                os.remove(path)
+                removed += 1
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+        if removed:
+            logging.info(f"Evicted {removed} LLM cache entries")
+
+    def log_stats(self):
+        logging.info(f"LLM cache: {self.hits} hits, {self.misses} misses" + (" (bypassed)" if self.bypass else ""))
@@ -0,0 +1,175 @@
+// Warm Node.js worker for js_checker.py: one JSON request per stdin line, one JSON result per stdout line.
+//
+// Request:  {"id": 1, "filename": "D:\\...\\src\\Issue_3.js", "source": "...", "timeout": 1000}
+// Result:   {"id": 1, "errors": [{"kind", "message", "line", "column"}], "exports": ["Calculator"], "ms": 2.1}
+//
+// Each module is compiled (syntax), its requires resolved from its own directory (missing files and
+// packages), then run in a fresh V8 context with Node's usual globals. Builtins such as events and crypto
+// are the real modules and process is the real one, minus exiting, listening and writing to stdout. fs
+// reads for real, but its calls that write, delete or open files are stand-ins; project files, npm
+// packages and the builtins that open sockets or processes are inert stand-ins too, so top-level code such
+// as app.listen(), client.connect() or fs.writeFileSync() runs without opening or changing anything.
+const vm = require('vm');
+const path = require('path');
+const readline = require('readline');
+const { createRequire, isBuiltin } = require('module');
+
+const write = process.stdout.write.bind(process.stdout);
+// Builtins that reach outside the process; a module gets stand-ins for these like for packages
+const OPENING_BUILTINS = new Set(['child_process', 'cluster', 'dgram', 'http', 'http2', 'https', 'net', 'tls', 'worker_threads']);
+// fs calls that change or open something; the read calls are the real ones
+const FS_WRITES = /^(?:append|chmod|chown|copy|cp|createWriteStream|fchmod|fchown|fdatasync|fsync|ftruncate|futimes|lchmod|lchown|link|lutimes|mkdir|mkdtemp|open|rename|rm|symlink|truncate|unlink|utimes|watch|write)/;
+// Node's globals besides the module-scope ones, shared with the module as they are
+const GLOBALS = ['URL', 'URLSearchParams', 'TextEncoder', 'TextDecoder', 'AbortController', 'AbortSignal',
+                 'queueMicrotask', 'structuredClone', 'setImmediate', 'clearImmediate', 'performance', 'Buffer'];
+
+// A callable, constructable object whose every property is another stand-in
+function standIn(name) {
+    const cache = new Map();
+    const target = function () {};
+    return new Proxy(target, {
+        get(t, property) {
+            if (property === 'then') return undefined;  // Awaiting a stand-in must not hang
+            if (property === 'prototype') return t.prototype;
+            if (property === Symbol.toPrimitive) return () => `[${name}]`;
+            if (typeof property === 'symbol') return undefined;
+            if (!cache.has(property)) cache.set(property, standIn(`${name}.${property}`));
+            return cache.get(property);
+        },
+        set() { return true; },
+        apply() { return standIn(`${name}()`); },
+        construct() { return standIn(`new ${name}`); }
+    });
+}
+
+// A builtin file system module whose writing calls are stand-ins
+function readOnly(module, name) {
+    return new Proxy(module, {
+        get(target, property) {
+            if (property === 'promises' && target.promises) return readOnly(target.promises, `${name}.promises`);
+            if (typeof property === 'string' && FS_WRITES.test(property)) return standIn(`${name}.${property}`);
+            return Reflect.get(target, property);
+        },
+        set() { return true; }
+    });
+}
+const READ_ONLY_BUILTINS = { fs: readOnly(require('fs'), 'fs'), 'fs/promises': readOnly(require('fs/promises'), 'fs/promises') };
+
+// The worker's process, except that the module cannot end it, listen on it, write to its stdout or change it
+function sandboxProcess(quiet) {
+    const stream = { write(chunk) { quiet(String(chunk)); return true; }, isTTY: false, columns: 80, on() { return this; } };
+    let proxy;
+    const listen = () => proxy;
+    const overrides = {
+        env: { ...process.env }, argv: [process.argv[0], 'module'], stdout: stream, stderr: stream,
+        exit() {}, abort() {}, kill() { return true; }, chdir() {}, nextTick() {},
+        on: listen, once: listen, off: listen, addListener: listen, removeListener: listen, prependListener: listen
+    };
+    proxy = new Proxy(process, {
+        get: (target, property) => (property in overrides ? overrides[property] : Reflect.get(target, property)),
+        set() { return true; }
+    });
+    return proxy;
+}
+
+// What setTimeout and setInterval return; the callbacks never run
+function timer() {
+    return { ref() { return this; }, unref() { return this; }, hasRef() { return false; }, refresh() { return this; },
+             [Symbol.toPrimitive]() { return 0; } };
+}
+
+function position(error, filename) {
+    // SyntaxErrors start their stack with "filename:line"; runtime errors have "filename:line:column" frames
+    const stack = String(error && error.stack || '');
+    const escaped = filename.replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
+    const match = stack.match(new RegExp(`${escaped}:(\\d+):(\\d+)`)) || stack.match(new RegExp(`${escaped}:(\\d+)`));
+    return match ? { line: Number(match[1]), column: match[2] ? Number(match[2]) : null } : { line: null, column: null };
+}
+
+// The names a test can require from module.exports; anything but undefined, null or a still-empty plain object counts
+function exportNames(value) {
+    if (value === undefined || value === null) return [];
+    if (typeof value !== 'object' && typeof value !== 'function') return ['(default)'];
+    const names = Object.keys(value);
+    const proto = Object.getPrototypeOf(value);
+    // Plain objects of either realm have a prototype whose own prototype is null
+    const plain = proto === null || Object.getPrototypeOf(proto) === null;
+    if (typeof value === 'function') names.unshift(value.name || '(default)');
+    else if (!names.length && !plain) names.push('(default)');
+    return names;
+}
+
+function check({ filename, source, timeout }) {
+    const errors = [];
+    const header = '(function (exports, require, module, __filename, __dirname) {';
+    let script;
+    try {
+        script = new vm.Script(`${header}${source}\n}).call(module.exports, module.exports, require, module, __filename, __dirname);`,
+                               { filename, columnOffset: -header.length });
+    } catch (error) {
+        const kind = /import statement|Unexpected token 'export'/.test(error.message) ? 'esm' : 'syntax';
+        const message = kind === 'esm' ? `${error.message} (use require/module.exports, not import/export)` : error.message;
+        const at = position(error, filename);
+        // Unclosed brackets are reported on the wrapper's closing line, one past the module's end
+        if (at.line !== null) at.line = Math.min(at.line, source.split('\n').length);
+        errors.push({ kind, message: `${error.name}: ${message}`, ...at });
+        return { errors, exports: [] };
+    }
+
+    const resolve = createRequire(filename).resolve;
+    const sandboxRequire = (specifier) => {
+        if (isBuiltin(specifier)) {
+            const name = specifier.replace(/^node:/, '');
+            if (OPENING_BUILTINS.has(name)) return standIn(specifier);
+            return READ_ONLY_BUILTINS[name] || require(specifier);
+        }
+        try {
+            resolve(specifier);
+        } catch (error) {
+            errors.push({ kind: 'require', message: `Cannot find module '${specifier}'`, ...position(new Error(), filename) });
+        }
+        return standIn(specifier);
+    };
+    const module = { exports: {} };
+    const output = [];
+    const quiet = (...args) => { output.push(args.map(String).join(' ')); };
+    const context = vm.createContext({
+        module, require: sandboxRequire, __filename: filename, __dirname: path.dirname(filename),
+        console: new Proxy({}, { get: () => quiet }),
+        process: sandboxProcess(quiet),
+        setTimeout: timer, setInterval: timer, clearTimeout() {}, clearInterval() {},
+        ...Object.fromEntries(GLOBALS.map((name) => [name, globalThis[name]]))
+    });
+    context.global = vm.runInContext('globalThis', context);
+    try {
+        script.runInContext(context, { timeout });
+    } catch (error) {
+        const timedOut = error && error.code === 'ERR_SCRIPT_EXECUTION_TIMEOUT';
+        errors.push({
+            kind: timedOut ? 'timeout' : 'load',
+            message: timedOut ? `Loading the module did not finish within ${timeout} ms` : `${error && error.name}: ${error && error.message}`,
+            ...position(error, filename)
+        });
+    }
+    return { errors, exports: exportNames(module.exports) };
+}
+
+// A module's setImmediate or promise callbacks run after its check; their errors must not end the worker
+process.on('uncaughtException', () => {});
+process.on('unhandledRejection', () => {});
+
+const lines = readline.createInterface({ input: process.stdin });
+lines.on('line', (line) => {
+    if (!line.trim()) return;
+    const request = JSON.parse(line);
+    const start = process.hrtime.bigint();
+    let result;
+    try {
+        result = check(request);
+    } catch (error) {
+        result = { errors: [{ kind: 'internal', message: String(error && error.stack || error), line: null, column: null }], exports: [] };
+    }
+    result.id = request.id;
+    result.ms = Number(process.hrtime.bigint() - start) / 1e6;
+    write(JSON.stringify(result) + '\n');
+});
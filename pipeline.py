@@ -0,0 +1,298 @@
+import argparse
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from grok_browser import open_grok
+from result_store import issue_key
+from artifact_store import ArtifactStore
+from llm_cache import LLMCache
+from build_manifest import BuildManifest, STAGES, artifact_stem
+from session_pool import GrokSession, SessionPool, session_count_from_env
+from llm_backend import BrowserBackend, backend_kind, create_backend
+from browser_daemon import connect_browser, release_browser
+import analyze_requirements
+import generate_designs
+from plantuml_renderer import PlantUMLRenderer
+from js_checker import NodeChecker
+from jest_sandbox import TestSandbox
+from structured_log import log_context, log_event, setup_logging
+import generate_code
+import generate_tests
+
+# Workers per stage; each issue's tests run in a workspace of their own, so several can be debugged at once
+DEFAULT_CONCURRENCY = {"analyze": 2, "design": 2, "code": 2, "tests": 2}
+DEFAULT_QUEUE_SIZE = 2
+
+_DONE = object()
+
+def parse_concurrency(value):
+    """'analyze=3,tests=1' -> DEFAULT_CONCURRENCY with those stages overridden."""
+    concurrency = dict(DEFAULT_CONCURRENCY)
+    for part in filter(None, (value or "").split(",")):
+        stage, count = part.split("=")
+        if stage.strip() not in concurrency:
+            raise ValueError(f"Unknown stage '{stage}', expected one of {', '.join(STAGES)}")
+        concurrency[stage.strip()] = max(1, int(count))
+    return concurrency
+
+class Pipeline:
+    """Runs every issue through a chain of stages, each issue moving on as soon as its previous stage is done.
+
+    Stages are (name, func, workers); func(job) does one issue's work and
+    stores its output on the job dict. Stages are connected by bounded queues,
+    so a fast stage blocks instead of piling up work ahead of a slow one. An
+    issue that fails a stage is logged and dropped from the later stages.
+    """
+
+    def __init__(self, stages, queue_size=DEFAULT_QUEUE_SIZE):
+        self.stages = stages
+        self.queue_size = queue_size
+
+    def run(self, jobs):
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        lock = threading.Lock()
+        running = [workers for _, _, workers in self.stages]
+        start = time.perf_counter()
+
+        def finish_stage_worker(index):
+            with lock:
+                running[index] -= 1
+                last = running[index] == 0
+            if last and index + 1 < len(self.stages):
+                for _ in range(self.stages[index + 1][2]):
+                    queues[index + 1].put(_DONE)
+
+        def worker(index):
+            name, func, _ = self.stages[index]
+            while True:
+                job = queues[index].get()
+                if job is _DONE:
+                    break
+                stage_start = time.perf_counter()
+                with log_context(name, job["key"]):
+                    try:
+                        func(job)
+                    except Exception as e:
+                        job["error"] = f"{name}: {e}"
+                        log_event("stage_failed", f"{job['key']} failed in {name}: {e}", time.perf_counter() - stage_start,
+                                  level=logging.ERROR)
+                        continue
+                    finally:
+                        job["durations"][name] = time.perf_counter() - stage_start
+                    job["finished"][name] = time.perf_counter() - start
+                    log_event("stage_done", f"{job['key']} finished {name} in {job['durations'][name]:.1f}s",
+                              job["durations"][name])
+                if index + 1 < len(self.stages):
+                    queues[index + 1].put(job)  # Blocks while the next stage is behind
+            finish_stage_worker(index)
+
+        threads = [threading.Thread(target=worker, args=(index,), name=f"{name}-{n}", daemon=True)
+                   for index, (name, _, workers) in enumerate(self.stages) for n in range(workers)]
+        for thread in threads:
+            thread.start()
+        for job in jobs:
+            queues[0].put(job)
+        for _ in range(self.stages[0][2]):
+            queues[0].put(_DONE)
+        for thread in threads:
+            thread.join()
+        return jobs
+
+def new_job(requirement):
+    return {"key": issue_key(requirement), "requirement": requirement, "error": None, "durations": {}, "finished": {}}
+
+def plan(requirements, store, manifest, force=()):
+    """[(issue, {stage: reason it would rerun, or None when up to date})] from what is on disk now.
+
+    Once a stage reruns, everything after it is listed as rerunning too, since
+    its inputs are not known until then.
+    """
+    rows = []
+    for req in requirements:
+        issue = issue_key(req)
+        stem = artifact_stem(issue)
+        record = store.get(issue, "analyze")
+        inputs = {
+            "analyze": lambda: analyze_requirements.analysis_inputs(req) if record else None,
+            "design": lambda: generate_designs.design_inputs(record["content"]),
+            "code": lambda: generate_code.code_inputs(os.path.join(generate_designs.DESIGNS_DIR, f"{stem}.puml")),
+            "tests": lambda: generate_tests.tests_inputs(os.path.join(generate_code.SRC_DIR, f"{stem}.js"))
+        }
+        reasons = {}
+        upstream = "forced" if issue in force else None
+        for stage in STAGES:
+            if upstream:
+                reasons[stage] = upstream if upstream == "forced" else f"after {upstream}"
+                continue
+            stage_inputs = inputs[stage]()
+            reasons[stage] = None if stage_inputs and manifest.fresh(issue, stage, stage_inputs) else "stale"
+            if reasons[stage]:
+                upstream = stage
+        rows.append((issue, reasons))
+    return rows
+
+def print_plan(rows):
+    print(f"{'issue':<12}" + "".join(f"{stage:>16}" for stage in STAGES))
+    for issue, reasons in rows:
+        print(f"{issue:<12}" + "".join(f"{reasons[stage] or 'up to date':>16}" for stage in STAGES))
+    reruns = sum(1 for _, reasons in rows for reason in reasons.values() if reason)
+    print(f"{reruns} of {len(rows) * len(STAGES)} stages would run")
+
+def report(jobs, stages):
+    last = stages[-1]
+    for job in jobs:
+        progress = ", ".join(f"{name} {job['durations'][name]:.1f}s" for name in stages if name in job["durations"])
+        outcome = job["error"] or ("tests passed" if job.get("tests_passed") else "done")
+        print(f"{job['key']}: {outcome} ({progress})")
+    finished = sorted(job["finished"][last] for job in jobs if last in job["finished"])
+    if finished:
+        print(f"First issue through {last} after {finished[0]:.1f}s, last after {finished[-1]:.1f}s")
+
+class BackendProvider:
+    """Hands each task a backend: a borrowed pool session for the browser, the shared client for HTTP."""
+
+    def __init__(self, backend, pool=None):
+        self.shared = backend
+        self.pool = pool
+
+    @contextmanager
+    def backend(self):
+        if self.pool is None:
+            yield self.shared
+        else:
+            with self.pool.session() as session:
+                yield BrowserBackend(session)
+
+def build_stages(provider, store, cache, manifest, concurrency, force=(), renderer=None, checker=None,
+                 sandbox=None):
+    def analyze(job):
+        req = job["requirement"]
+        # The analysis lives in the result store, so it only counts as built while the store has it
+        stale = job["key"] in force or store.get(job["key"], "analyze") is None
+
+        def build():
+            analysis = analyze_requirements.reuse_cached_analysis(req, store, cache)
+            if analysis is None:
+                with provider.backend() as backend:
+                    analyze_requirements.analyze_requirement(backend, req, store, cache)
+            return []
+
+        manifest.build(job["key"], "analyze", analyze_requirements.analysis_inputs(req), build, stale)
+        job["analysis"] = store.get(job["key"], "analyze")["content"]
+
+    def design(job):
+        def build():
+            with provider.backend() as backend:
+                return generate_designs.generate_design(backend, job["requirement"], job["analysis"], cache, store)
+
+        outputs = manifest.build(job["key"], "design", generate_designs.design_inputs(job["analysis"]), build,
+                                 job["key"] in force)
+        job["puml_path"] = outputs[0]
+        if renderer is not None:
+            renderer.submit(job["puml_path"], job["key"] in force)  # Renders beside the later stages; unchanged diagrams are skipped
+
+    def code(job):
+        def build():
+            with provider.backend() as backend:
+                return [generate_code.generate_code(backend, job["puml_path"], cache, store, checker)]
+
+        job["js_path"] = manifest.build(job["key"], "code", generate_code.code_inputs(job["puml_path"]), build,
+                                        job["key"] in force)[0]
+
+    def tests(job):
+        def build():
+            with provider.backend() as backend:
+                return generate_tests.build_tests(backend, job["js_path"], cache, store, sandbox)
+
+        job["tests_passed"] = manifest.build(job["key"], "tests", generate_tests.tests_inputs(job["js_path"]), build,
+                                             job["key"] in force) is not None
+
+    funcs = {"analyze": analyze, "design": design, "code": code, "tests": tests}
+    return [(name, funcs[name], concurrency[name]) for name in STAGES]
+
+def main():
+    parser = argparse.ArgumentParser(description="Run analyze -> design -> code -> tests per issue, pipelined across issues")
+    parser.add_argument("command", nargs="?", choices=["run", "plan"], default="run",
+                        help="run the pipeline, or only list which stages would rerun")
+    parser.add_argument("--issues", help="comma-separated issue keys to run, e.g. 'Issue #1,Issue #4' (default: all)")
+    parser.add_argument("--concurrency", default=os.getenv("PIPELINE_CONCURRENCY"),
+                        help="workers per stage, e.g. 'analyze=3,design=2' (default: %s)" %
+                             ",".join(f"{k}={v}" for k, v in DEFAULT_CONCURRENCY.items()))
+    parser.add_argument("--force", action="append", default=[], metavar="ISSUE",
+                        help="rebuild every stage of this issue (e.g. --force 'Issue #3'), may be repeated")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE, help="issues waiting between two stages")
+    args = parser.parse_args()
+    force = {key.strip() for value in args.force for key in value.split(",")}
+
+    with open("requirements.txt", "r", encoding="utf-8") as f:
+        requirements = [line for line in f.read().splitlines() if line.strip()]
+    if args.issues:
+        wanted = {key.strip() for key in args.issues.split(",")}
+        requirements = [req for req in requirements if issue_key(req) in wanted]
+
+    if args.command == "plan":
+        print_plan(plan(requirements, ArtifactStore(), BuildManifest(), force))
+        return
+
+    os.makedirs('D:\\Documents\\AutoSDLC\\logs', exist_ok=True)
+    for directory in (generate_designs.DESIGNS_DIR, generate_code.SRC_DIR, generate_tests.TESTS_DIR):
+        os.makedirs(directory, exist_ok=True)
+    # Records carry the stage and issue of the worker that logged them (see structured_log.py)
+    setup_logging("pipeline")
+
+    generate_designs.check_plantuml_jar()
+    concurrency = parse_concurrency(args.concurrency)
+
+    logging.info(f"Pipelining {len(requirements)} issues with {concurrency} workers per stage")
+
+    driver, lease = None, None
+    if backend_kind() == "browser":
+        driver, lease = connect_browser(analyze_requirements.user_data_dir, analyze_requirements.profile_directory)
+
+    backend, pool, renderer, checker, sandbox = None, None, None, None, None
+    try:
+        primary = None
+        if driver is not None:
+            open_grok(driver)
+            primary = GrokSession(0, driver, lease)
+        backend = create_backend(primary)
+        if primary is not None:
+            # Size the browser pool with GROK_SESSIONS; tasks borrow a session per prompt chain
+            pool = SessionPool(session_count_from_env(), open_grok, primary=primary).start()
+        provider = BackendProvider(backend, pool)
+
+        store = ArtifactStore()
+        cache = LLMCache()
+        manifest = BuildManifest()
+        renderer = PlantUMLRenderer(manifest=manifest)
+        checker = NodeChecker(concurrency["code"])
+        sandbox = TestSandbox()
+        jobs = Pipeline(build_stages(provider, store, cache, manifest, concurrency, force, renderer, checker, sandbox),
+                        args.queue_size).run([new_job(req) for req in requirements])
+
+        cache.log_stats()
+        manifest.store.compact()
+        with open("requirements.txt", "r", encoding="utf-8") as f:
+            store.export_analysis_views(f.read().splitlines())
+        store.close()
+        report(jobs, STAGES)
+    finally:
+        if renderer is not None:
+            renderer.close()
+        if checker is not None:
+            checker.close()
+        if sandbox is not None:
+            sandbox.close()
+        if pool is not None:
+            pool.close()
+        if backend is not None:
+            backend.close()
+        if driver is not None:
+            release_browser(driver, lease)
+            logging.info("Browser closed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+import argparse
+import json
+import re
+import sys
+
+# Class-like declarations: class Foo<T> as F <<Entity>> #color extends Bar implements Baz {
+CLASS_PATTERN = re.compile(
+    r'^(?P<kind>abstract\s+class|abstract|class|interface|enum|annotation|entity|exception|struct|record|protocol)\s+'
+    r'(?P<name>"[^"]+"|[\w.$]+)'
+    r'(?:\s*<(?P<generics>[^<>]*(?:<[^<>]*>[^<>]*)*)>)?'
+    r'(?:\s+as\s+(?P<alias>[\w.$]+))?'
+    r'(?:\s*<<(?P<stereotype>[^>]+)>>)?'
+    r'(?:\s*#[\w#.;:-]+)?'
+    r'(?:\s+extends\s+(?P<extends>[\w.$]+(?:\s*,\s*[\w.$]+)*))?'
+    r'(?:\s+implements\s+(?P<implements>[\w.$]+(?:\s*,\s*[\w.$]+)*))?'
+    r'\s*(?P<brace>\{\s*\}?)?$'
+)
+NAME = r'(?:"[^"]+"|[\w.$]+)'
+# A "1" <|-- "*" B : label, with the arrow split into its heads and line (direction hints allowed)
+RELATIONSHIP_PATTERN = re.compile(
+    rf'^(?P<left>{NAME})(?:\s+"(?P<left_cardinality>[^"]*)")?\s*'
+    r'(?P<left_head><\||<|\*|o|#|x|\}|\+|\^)?'
+    r'(?P<line>[-.]+(?:\[[^\]]*\])?(?:(?:left|right|up|down|le|ri|do|l|r|u|d)[-.]+)?)'
+    r'(?P<right_head>\|>|>|\*|o|#|x|\{|\+|\^)?'
+    rf'\s*(?:"(?P<right_cardinality>[^"]*)"\s+)?(?P<right>{NAME})'
+    r'\s*(?::\s*(?P<label>.*))?$'
+)
+# Member of a class body, or of "Foo : member" outside one
+MEMBER_PATTERN = re.compile(
+    r'^(?P<modifiers>(?:\{(?:static|abstract|classifier|field|method)\}\s*)*)'
+    r'(?P<visibility>[-+#~])?\s*'
+    r'(?P<modifiers_after>(?:\{(?:static|abstract|classifier)\}\s*)*)'
+    r'(?P<text>.+)$'
+)
+METHOD_PATTERN = re.compile(r'^(?:(?P<prefix>[\w<>\[\],.? ]+?)\s+)?(?P<name>[\w$]+)\s*\((?P<params>.*)\)\s*(?::\s*(?P<type>.+))?$')
+FIELD_PATTERN = re.compile(r'^(?:(?P<name>[\w$]+)\s*(?::\s*(?P<type>(?:[^=]|=>)+?))?|(?P<prefix_type>[\w<>\[\].?]+)\s+(?P<prefixed_name>[\w$]+))(?:\s*=(?!>)\s*.+)?$')
+ENUM_VALUES_PATTERN = re.compile(r'^[\w$]+(?:\s*\([^)]*\))?(?:\s*,\s*[\w$]+(?:\s*\([^)]*\))?)*\s*[,;]?$')
+PACKAGE_PATTERN = re.compile(r'^(?:package|namespace|together|rectangle|frame|folder|node|cloud|database)\b[^{]*\{$')
+OUTER_MEMBER_PATTERN = re.compile(rf'^(?P<owner>{NAME})\s*:\s*(?P<member>.+)$')
+# Layout and styling lines that add nothing to the model
+IGNORED_PATTERN = re.compile(
+    r'^(?:skinparam|hide|show|remove|restore|title|header|footer|caption|scale|left to right direction|'
+    r'top to bottom direction|allowmixing|allow_mixing|set\s|!|newpage|center\s+footer|right\s+footer|left\s+footer)',
+    re.IGNORECASE
+)
+NOTE_PATTERN = re.compile(r'^(?:note|hnote|rnote)\b', re.IGNORECASE)
+# skinparam class { ... } and style blocks, skipped up to their matching }
+STYLE_BLOCK_PATTERN = re.compile(r'^(?:skinparam|style)\b.*\{$', re.IGNORECASE)
+BLOCK_END = {"note": re.compile(r'^end\s?note$', re.IGNORECASE), "legend": re.compile(r'^end\s?legend$', re.IGNORECASE),
+             "style": re.compile(r'^</style>$', re.IGNORECASE)}
+
+RELATIONSHIP_KINDS = {"<|": "extension", "|>": "extension", "*": "composition", "o": "aggregation"}
+
+class PlantUMLSyntaxError(Exception):
+    """Raised by parse_class_diagram; errors is a list of (line number, message) pairs."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("; ".join(f"line {line}: {message}" for line, message in errors))
+
+class Member:
+    def __init__(self, name, kind, line, visibility=None, type=None, params=None, static=False, abstract=False):
+        self.name = name
+        self.kind = kind  # 'field' or 'method'
+        self.line = line
+        self.visibility = visibility
+        self.type = type
+        self.params = params
+        self.static = static
+        self.abstract = abstract
+
+class UMLClass:
+    def __init__(self, name, kind, line, stereotype=None, generics=None, extends=(), implements=()):
+        self.name = name
+        self.kind = kind  # class, abstract class, interface, enum, ...
+        self.line = line
+        self.stereotype = stereotype
+        self.generics = generics
+        self.extends = list(extends)
+        self.implements = list(implements)
+        self.fields = []
+        self.methods = []
+        self.values = []  # Enum constants
+
+class Relationship:
+    def __init__(self, source, target, kind, arrow, line, label=None, source_cardinality=None, target_cardinality=None):
+        self.source = source
+        self.target = target  # The end the arrowhead (or diamond) is on
+        self.kind = kind  # extension, realization, composition, aggregation, dependency or association
+        self.arrow = arrow
+        self.line = line
+        self.label = label
+        self.source_cardinality = source_cardinality
+        self.target_cardinality = target_cardinality
+
+class ClassDiagram:
+    """What a class diagram declares: classes by name with their members, and the relationships between them."""
+
+    def __init__(self):
+        self.classes = {}
+        self.relationships = []
+        self.warnings = []  # (line, message) for things PlantUML accepts but the later stages may not expect
+
+    def to_dict(self):
+        return {
+            "classes": {name: dict(vars(c), fields=[vars(m) for m in c.fields], methods=[vars(m) for m in c.methods])
+                        for name, c in self.classes.items()},
+            "relationships": [vars(r) for r in self.relationships],
+            "warnings": self.warnings
+        }
+
+def unquote(name):
+    return name[1:-1] if name.startswith('"') and name.endswith('"') else name
+
+def parse_member(text, line, in_enum=False):
+    """Member for one body line, or an error message string when it cannot be read."""
+    match = MEMBER_PATTERN.match(text)
+    modifiers = match.group("modifiers") + match.group("modifiers_after")
+    body = match.group("text").strip()
+    if body.count("(") != body.count(")"):
+        return f"unbalanced parentheses in member `{text}`"
+    # Arrows in types such as `cb: (x) => void` and a trailing // comment are not brackets
+    brackets = re.sub(r'//.*$', '', body).replace("=>", "").replace("->", "")
+    if brackets.count("<") != brackets.count(">"):
+        return f"unbalanced angle brackets in member `{text}`"
+    if in_enum and ENUM_VALUES_PATTERN.match(body) and not match.group("visibility"):
+        return None
+    common = {"visibility": match.group("visibility"), "static": "{static}" in modifiers or "{classifier}" in modifiers,
+              "abstract": "{abstract}" in modifiers}
+    # name : Type is a field even when the type has parentheses, e.g. VARCHAR(50)
+    if "(" in body and not re.match(r'^[\w$]+\s*:', body):
+        method = METHOD_PATTERN.match(body)
+        if not method:
+            return f"cannot read method `{text}`, expected name(params) : Type"
+        params = [p.strip() for p in method.group("params").split(",") if p.strip()]
+        return Member(method.group("name"), "method", line, type=method.group("type") or method.group("prefix"),
+                      params=params, **common)
+    field = FIELD_PATTERN.match(body)
+    if not field:
+        return f"cannot read field `{text}`, expected name : Type"
+    name = field.group("name") or field.group("prefixed_name")
+    type = field.group("type") or field.group("prefix_type")
+    return Member(name, "field", line, type=type.strip() if type else None, **common)
+
+def add_member(uml_class, text, line, errors):
+    member = parse_member(text, line, uml_class.kind == "enum")
+    if isinstance(member, str):
+        errors.append((line, member))
+    elif member is None:
+        uml_class.values.extend(v.strip().split("(")[0] for v in text.rstrip(",;").split(",") if v.strip())
+    elif member.kind == "method":
+        uml_class.methods.append(member)
+    else:
+        uml_class.fields.append(member)
+
+def relationship_from(match, line):
+    left_head, right_head, arrow_line = match.group("left_head") or "", match.group("right_head") or "", match.group("line")
+    source, target = unquote(match.group("left")), unquote(match.group("right"))
+    source_cardinality, target_cardinality = match.group("left_cardinality"), match.group("right_cardinality")
+    head = right_head
+    if left_head and not right_head:
+        # Arrowhead on the left: the relationship points at the left class
+        source, target = target, source
+        source_cardinality, target_cardinality = target_cardinality, source_cardinality
+        head = left_head
+    kind = RELATIONSHIP_KINDS.get(head)
+    if kind == "extension" and "." in arrow_line:
+        kind = "realization"
+    if kind is None:
+        kind = "dependency" if head in ("<", ">") and "." in arrow_line else "association"
+    label = match.group("label")
+    return Relationship(source, target, kind, left_head + arrow_line + right_head, line,
+                        unquote(label.strip()) if label else None, source_cardinality, target_cardinality)
+
+def parse_class_diagram(text):
+    """Parse the class-diagram subset the design stage generates into a ClassDiagram.
+
+    Raises PlantUMLSyntaxError listing every problem found, with line numbers
+    relative to text, so one re-prompt can fix them all. A leading @startuml
+    and trailing @enduml are optional.
+    """
+    diagram = ClassDiagram()
+    errors = []
+    body = None  # UMLClass whose { ... } is open
+    scopes = []  # Line numbers of open package-like blocks
+    block = None  # 'note', 'legend', 'style', 'skinparam' or 'comment' while inside one
+    depth = 0  # Open braces of a skinparam block
+    started = ended = False
+
+    for number, raw in enumerate(text.splitlines(), 1):
+        line = raw.strip()
+        if block == "comment":
+            if line.endswith("'/"):
+                block = None
+            continue
+        if block == "skinparam":
+            depth += line.count("{") - line.count("}")
+            if depth <= 0:
+                block = None
+            continue
+        if block:
+            if BLOCK_END[block].match(line):
+                block = None
+            continue
+        if not line or line.startswith("'"):
+            continue
+        if line.startswith("/'"):
+            if not line.endswith("'/") or len(line) < 4:
+                block = "comment"
+            continue
+        if ended:
+            errors.append((number, f"text after @enduml: `{line[:80]}`"))
+            break
+        if line.lower().startswith("@startuml"):
+            if started or diagram.classes or diagram.relationships:
+                errors.append((number, "second @startuml, the diagram must be a single @startuml ... @enduml"))
+            started = True
+            continue
+        if line.lower().startswith("@enduml"):
+            ended = True
+            continue
+
+        if body is not None:
+            if line == "}":
+                body = None
+            elif re.match(r'^(?:--|\.\.|==|__)', line):
+                pass  # Section separator
+            elif CLASS_PATTERN.match(line) or (not line.startswith(("-", "+", "#", "~", "{"))
+                                               and RELATIONSHIP_PATTERN.match(line)):
+                errors.append((number, f"class `{body.name}` opened on line {body.line} is not closed before this line"))
+                body = None  # Read the line as a declaration or relationship below
+            else:
+                add_member(body, line, number, errors)
+            if body is not None or line == "}":
+                continue
+
+        if line == "}":
+            if scopes:
+                scopes.pop()
+            else:
+                errors.append((number, "unexpected `}` with no open class or package"))
+            continue
+        if STYLE_BLOCK_PATTERN.match(line):
+            block, depth = "skinparam", line.count("{") - line.count("}")
+            continue
+        if re.match(r'^<style>', line, re.IGNORECASE):
+            if not line.lower().endswith("</style>"):
+                block = "style"
+            continue
+        if IGNORED_PATTERN.match(line):
+            continue
+        if NOTE_PATTERN.match(line):
+            if ":" not in line and not re.search(r'\bas\s+\w+$', line):
+                block = "note"
+            continue
+        if re.match(r'^legend\b', line, re.IGNORECASE):
+            block = "legend"
+            continue
+        if PACKAGE_PATTERN.match(line):
+            scopes.append(number)
+            continue
+
+        declaration = CLASS_PATTERN.match(line)
+        if declaration:
+            name = declaration.group("alias") or unquote(declaration.group("name"))
+            kind = re.sub(r'\s+', ' ', declaration.group("kind"))
+            split = lambda value: [v.strip() for v in value.split(",")] if value else []
+            uml_class = diagram.classes.get(name)
+            if uml_class is None:
+                uml_class = UMLClass(name, "abstract class" if kind == "abstract" else kind, number,
+                                     declaration.group("stereotype"), declaration.group("generics"),
+                                     split(declaration.group("extends")), split(declaration.group("implements")))
+                diagram.classes[name] = uml_class
+            brace = declaration.group("brace") or ""
+            if brace.startswith("{") and not brace.endswith("}"):
+                body = uml_class
+            continue
+
+        relationship = RELATIONSHIP_PATTERN.match(line)
+        if relationship:
+            diagram.relationships.append(relationship_from(relationship, number))
+            continue
+
+        outer = OUTER_MEMBER_PATTERN.match(line)
+        if outer and unquote(outer.group("owner")) in diagram.classes:
+            add_member(diagram.classes[unquote(outer.group("owner"))], outer.group("member"), number, errors)
+            continue
+
+        if "{" in line and not line.endswith("{"):
+            errors.append((number, f"`{{` must end the line in `{line[:80]}`"))
+        else:
+            errors.append((number, f"not a class, member or relationship: `{line[:80]}`"))
+
+    if body is not None:
+        errors.append((body.line, f"`{{` of class `{body.name}` is never closed"))
+    for line in scopes:
+        errors.append((line, "package block is never closed"))
+    if block == "note":
+        errors.append((len(text.splitlines()), "note is never closed with `end note`"))
+    elif block in ("skinparam", "style"):
+        errors.append((len(text.splitlines()), f"{block} block is never closed"))
+    if not diagram.classes and not errors:
+        errors.append((1, "the diagram declares no classes"))
+
+    for relationship in diagram.relationships:
+        for name in (relationship.source, relationship.target):
+            if name not in diagram.classes:
+                diagram.warnings.append((relationship.line, f"`{name}` is used in a relationship but never declared"))
+    if errors:
+        raise PlantUMLSyntaxError(sorted(errors))
+    return diagram
+
+def validate(text):
+    """[(line, message)] for text; empty when it parses."""
+    try:
+        parse_class_diagram(text)
+    except PlantUMLSyntaxError as e:
+        return e.errors
+    return []
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check PlantUML class diagrams without Java and print their model")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--json", action="store_true", help="print the parsed model as JSON")
+    args = parser.parse_args()
+
+    failed = False
+    for path in args.files:
+        with open(path, "r", encoding="utf-8") as f:
+            source = f.read()
+        try:
+            diagram = parse_class_diagram(source)
+        except PlantUMLSyntaxError as e:
+            failed = True
+            for line, message in e.errors:
+                print(f"{path}:{line}: {message}")
+            continue
+        if args.json:
+            print(json.dumps({path: diagram.to_dict()}, indent=2))
+        else:
+            print(f"{path}: {len(diagram.classes)} classes, {len(diagram.relationships)} relationships")
+        for line, message in diagram.warnings:
+            print(f"{path}:{line}: warning: {message}")
+    sys.exit(1 if failed else 0)
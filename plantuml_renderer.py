@@ -0,0 +1,225 @@
+import argparse
+import glob
+import logging
+import os
+import subprocess
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from build_manifest import BuildManifest, hash_file, issue_from_stem
+
+PLANTUML_JAR_PATH = 'C:\\plantuml\\plantuml.jar'
+DESIGNS_DIR = "D:\\Documents\\AutoSDLC\\designs"
+# Seconds one diagram may take in a warm process before it is killed and the file rendered on its own
+RENDER_TIMEOUT = 60
+PNG_SIGNATURE = b"\x89PNG"
+
+def render_workers_from_env():
+    """Warm PlantUML processes to render with, from PLANTUML_WORKERS (default 2)."""
+    return max(1, int(os.getenv("PLANTUML_WORKERS", "2")))
+
+class PlantUMLPipe:
+    """One warm `plantuml -pipe` JVM: diagram source in on stdin, image out on stdout.
+
+    PlantUML prints the delimiter after every image, so the process renders
+    diagram after diagram without paying JVM startup again. Errors come back
+    on stdout as text instead of an image (-pipeNoStderr).
+    """
+
+    def __init__(self, jar_path=PLANTUML_JAR_PATH, fmt="png", timeout=RENDER_TIMEOUT):
+        self.delimiter = f"__autosdlc_{uuid.uuid4().hex}__"
+        self.fmt = fmt
+        self.timeout = timeout
+        self.process = subprocess.Popen(
+            ["java", "-Djava.awt.headless=true", "-jar", jar_path, "-pipe", f"-t{fmt}",
+             "-pipeNoStderr", "-pipedelimitor", self.delimiter],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def render(self, source):
+        """Image bytes for one @startuml ... @enduml source; raises when PlantUML reports an error."""
+        marker = self.delimiter.encode("ascii")
+        watchdog = threading.Timer(self.timeout, self.process.kill)
+        watchdog.start()
+        try:
+            self.process.stdin.write(source.encode("utf-8").rstrip() + b"\n")
+            self.process.stdin.flush()
+            output = b""
+            while marker not in output:
+                chunk = self.process.stdout.read1(65536)
+                if not chunk:
+                    raise Exception(f"PlantUML process exited or timed out after {self.timeout}s")
+                output += chunk
+        finally:
+            watchdog.cancel()
+        # A line break follows every delimiter and may arrive with the next image, so skip to the image's start
+        image = output[:output.index(marker)]
+        start = image.find(PNG_SIGNATURE if self.fmt == "png" else b"<")
+        if start == -1 or image[:start].lstrip().startswith(b"ERROR") or (self.fmt == "svg" and b"<svg" not in image):
+            message = image[:start] if start > 0 else image
+            raise Exception(f"PlantUML error: {message.decode('utf-8', 'replace').strip()[:500]}")
+        return image[start:]
+
+    def close(self):
+        if self.alive():
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=10)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+
+def render_batch(puml_files, jar_path=PLANTUML_JAR_PATH, fmt="png"):
+    """Render many .puml files in one JVM run, each image next to its source. Returns the seconds it took."""
+    start = time.perf_counter()
+    result = subprocess.run(["java", "-Djava.awt.headless=true", "-jar", jar_path, f"-t{fmt}", *puml_files],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise Exception(f"PlantUML rendering failed: {result.stderr.strip()[:500]}")
+    return time.perf_counter() - start
+
+class PlantUMLRenderer:
+    """Renders .puml files on its own worker pool, one warm PlantUML process per worker.
+
+    submit() returns at once, so prompting for the next design does not wait
+    on the JVM. A diagram whose .puml is unchanged since its image was last
+    written (tracked as the 'render' stage in the build manifest) is skipped.
+    When a warm process fails the file is rendered by a one-off JVM run, so a
+    crashed or hung process costs one diagram's time, not the run.
+    """
+
+    def __init__(self, jar_path=PLANTUML_JAR_PATH, workers=None, fmt="png", manifest=None, force=False):
+        self.jar_path = jar_path
+        self.fmt = fmt
+        self.force = force
+        self.manifest = manifest or BuildManifest()
+        self.workers = workers or render_workers_from_env()
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="plantuml")
+        self.results = {}  # puml path -> {"seconds", "skipped", "error"}
+        self._local = threading.local()
+        self._pipes = []
+        self._lock = threading.Lock()
+
+    def output_path(self, puml_file):
+        return f"{os.path.splitext(puml_file)[0]}.{self.fmt}"
+
+    def submit(self, puml_file, force=False):
+        """Queue puml_file for rendering; the future resolves to the image path (or raises)."""
+        return self.executor.submit(self.render, puml_file, force)
+
+    def _check(self, puml_file, force=False):
+        """(issue, render inputs, True when the image is up to date) for puml_file."""
+        issue = issue_from_stem(os.path.splitext(os.path.basename(puml_file))[0])
+        inputs = {"puml": hash_file(puml_file), "format": self.fmt}
+        fresh = not (self.force or force) and self.manifest.fresh(issue, "render", inputs) is not None
+        if fresh:
+            self.results[puml_file] = {"seconds": 0.0, "skipped": True, "error": None}
+            logging.info(f"{os.path.basename(self.output_path(puml_file))} is up to date, skipping render")
+        return issue, inputs, fresh
+
+    def render(self, puml_file, force=False):
+        issue, inputs, fresh = self._check(puml_file, force)
+        output = self.output_path(puml_file)
+        if fresh:
+            return output
+
+        start = time.perf_counter()
+        try:
+            with open(puml_file, "r", encoding="utf-8") as f:
+                source = f.read()
+            try:
+                image = self._pipe().render(source)
+                with open(output, "wb") as f:
+                    f.write(image)
+            except Exception as e:
+                if str(e).startswith("PlantUML error"):
+                    raise
+                logging.warning(f"Warm PlantUML process failed on {puml_file} ({e}), rendering it on its own")
+                self._drop_pipe()
+                render_batch([puml_file], self.jar_path, self.fmt)
+        except Exception as e:
+            self.results[puml_file] = {"seconds": time.perf_counter() - start, "skipped": False, "error": str(e)}
+            logging.error(f"Rendering {puml_file} failed: {e}")
+            raise
+        seconds = time.perf_counter() - start
+        self.manifest.record(issue, "render", inputs, [output])
+        self.results[puml_file] = {"seconds": seconds, "skipped": False, "error": None}
+        logging.info(f"Rendered {os.path.basename(output)} in {seconds:.2f}s")
+        return output
+
+    def render_all(self, puml_files, batch=False):
+        """Render every stale file: on the warm pool, or with batch in a single JVM run."""
+        if not batch:
+            for future in [self.submit(path) for path in puml_files]:
+                try:
+                    future.result()
+                except Exception:
+                    pass  # Already logged and recorded in results
+            return
+        stale = []
+        for path in puml_files:
+            issue, inputs, fresh = self._check(path)
+            if not fresh:
+                stale.append((path, issue, inputs))
+        if not stale:
+            return
+        seconds = render_batch([path for path, _, _ in stale], self.jar_path, self.fmt)
+        for path, issue, inputs in stale:
+            # One JVM run renders them all, so each diagram is charged an equal share
+            self.manifest.record(issue, "render", inputs, [self.output_path(path)])
+            self.results[path] = {"seconds": seconds / len(stale), "skipped": False, "error": None}
+
+    def _pipe(self):
+        pipe = getattr(self._local, "pipe", None)
+        if pipe is None or not pipe.alive():
+            pipe = PlantUMLPipe(self.jar_path, self.fmt)
+            self._local.pipe = pipe
+            with self._lock:
+                self._pipes.append(pipe)
+        return pipe
+
+    def _drop_pipe(self):
+        pipe = getattr(self._local, "pipe", None)
+        if pipe is not None:
+            pipe.close()
+            self._local.pipe = None
+
+    def report(self):
+        rendered = {path: r for path, r in self.results.items() if not r["skipped"] and not r["error"]}
+        for path, result in sorted(self.results.items()):
+            status = "skipped" if result["skipped"] else f"failed: {result['error']}" if result["error"] else "rendered"
+            logging.info(f"{os.path.basename(path)}: {status} ({result['seconds']:.2f}s)")
+        total = sum(r["seconds"] for r in rendered.values())
+        skipped = sum(1 for r in self.results.values() if r["skipped"])
+        failed = sum(1 for r in self.results.values() if r["error"])
+        logging.info(f"PlantUML: {len(rendered)} rendered in {total:.2f}s, {skipped} unchanged, {failed} failed")
+
+    def close(self):
+        """Wait for queued renders, stop the warm processes and log the per-diagram times."""
+        self.executor.shutdown(wait=True)
+        for pipe in self._pipes:
+            pipe.close()
+        self.report()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render the design diagrams, skipping ones whose .puml is unchanged")
+    parser.add_argument("files", nargs="*", help=".puml files (default: every file in the designs directory)")
+    parser.add_argument("--format", choices=["png", "svg"], default="png")
+    parser.add_argument("--workers", type=int, default=None, help="warm PlantUML processes (default: PLANTUML_WORKERS or 2)")
+    parser.add_argument("--batch", action="store_true", help="render all stale files in one JVM run instead")
+    parser.add_argument("--force", action="store_true", help="render unchanged files too")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(threadName)s - %(levelname)s - %(message)s')
+
+    files = args.files or sorted(glob.glob(os.path.join(DESIGNS_DIR, "*.puml")))
+    with PlantUMLRenderer(workers=args.workers, fmt=args.format, force=args.force) as renderer:
+        renderer.render_all(files, batch=args.batch)
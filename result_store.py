@@ -0,0 +1,55 @@
+import json
+import logging
+import os
+import threading
+
+class ResultStore:
+    """Append-only JSONL store of per-issue results.
+
+    Every put() appends one line; when an issue is written again the newer
+    record replaces the older one in the index, so a corrected response only
+    touches that issue. compact() drops the superseded lines.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.records = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line_number, line in enumerate(f, 1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A crash mid-write can leave a torn last line
+                        logging.warning(f"Skipping unreadable record at {path}:{line_number}")
+                        continue
+                    self.records[record["key"]] = record
+            logging.info(f"Loaded {len(self.records)} records from {path}")
+
+    def put(self, key, **fields):
+        record = {"key": key, **fields}
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.records[key] = record
+        return record
+
+    def get(self, key):
+        return self.records.get(key)
+
+    def __contains__(self, key):
+        return key in self.records
+
+    def compact(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in self.records.values():
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+
+def issue_key(requirement):
+    """'Issue #4: Design a database schema' -> 'Issue #4'"""
+    return requirement.split(":")[0].strip()
@@ -1,64 +1,40 @@
 # run_tests.py
-import subprocess
-import os
+import argparse
 import logging
+import sys
 import pytest
-import shutil
+from jest_runner import JEST_ROOT, JestRunner
+from jest_impact import ImportGraph
+from structured_log import setup_logging
 
-# Set up logging
-logging.basicConfig(
-    filename='D:\\Documents\\AutoSDLC\\logs\\run_tests.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
-console = logging.StreamHandler()
-console.setLevel(logging.INFO)
-formatter = logging.Formatter('%(levelname)s - %(message)s')
-console.setFormatter(formatter)
-logging.getLogger('').addHandler(console)
+setup_logging("tests", "run_tests")
 
-def run_jest_tests():
-    os.chdir('D:\\Documents\\AutoSDLC')
-    
-    # Find PowerShell executable (pwsh.exe or powershell.exe)
-    pwsh_path = shutil.which("pwsh") or shutil.which("powershell")
-    if not pwsh_path:
-        raise FileNotFoundError("PowerShell (pwsh.exe or powershell.exe) not found in PATH. Ensure PowerShell is installed.")
-    logging.info(f"Using PowerShell at: {pwsh_path}")
+def run_jest_tests(test_files=(), changed=False):
+    """Run the given test files (default: every test) with Jest, print the per-test results and return (passed, report).
 
-    # Specify full path to npx.ps1
-    npx_path = r"D:\Program Files\nodejs\npx.ps1"
-    if not os.path.exists(npx_path):
-        raise FileNotFoundError(f"npx.ps1 not found at {npx_path}. Adjust the path in the script.")
-    logging.info(f"Using npx.ps1 at: {npx_path}")
-
-    # Construct the command to run npx with PowerShell
-    # Use PowerShell to execute the .ps1 script
-    jest_command = [pwsh_path, "-File", npx_path, "jest", "--verbose"]
-    
-    try:
-        # Run the command and capture output
-        result = subprocess.run(
-            jest_command,
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        logging.info("Jest tests executed successfully")
-        print("Jest Output:")
-        print(result.stdout)  # Print detailed output
-        if result.stderr:
-            print(f"Warnings/Errors from Jest:\n{result.stderr}")
-            logging.warning(f"Jest warnings/errors: {result.stderr}")
-        return True, result.stdout
-    except subprocess.CalledProcessError as e:
-        logging.error(f"Jest tests failed: {e.stderr}")
-        print(f"Tests failed:\n{e.stderr}")
-        return False, e.stderr
-    except FileNotFoundError as e:
-        logging.error(f"Failed to execute PowerShell command: {e}")
-        print(f"Failed to execute PowerShell command: {e}")
-        raise
+    Jest runs from node directly through jest_runner.py, with no PowerShell or
+    npx in between, and its `--json` results are parsed per test. changed
+    runs only the tests that failed or whose code changed since their last
+    run (see jest_impact.py); every run is recorded for the next one.
+    """
+    with ImportGraph(JEST_ROOT) as graph:
+        if changed:
+            test_files = graph.changed_tests()
+            if not test_files:
+                logging.info("No test affected by a change since the last run")
+                return True, "No test affected by a change since the last run"
+            logging.info(f"Running {len(test_files)} of {len(graph.tests())} test files affected since the last run")
+        with JestRunner(JEST_ROOT, warm=False) as runner:
+            run = runner.run(test_files)
+        graph.record_run(run)
+    output = run.output()
+    print("Jest Output:")
+    print(output)
+    if run.success:
+        logging.info(f"Jest tests executed successfully: {run.summary()}")
+    else:
+        logging.error(f"Jest tests failed: {run.summary()}")
+    return run.success, output
 
 # Pytest test function
 def test_jest_execution():
@@ -67,4 +43,12 @@ def test_jest_execution():
     assert success, f"Jest tests failed with output: {output}"
 
 if __name__ == "__main__":
-    pytest.main(["-s", __file__])
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run Jest test files (default: all) and report each test")
+    parser.add_argument("files", nargs="*", help="test files to run")
+    parser.add_argument("--changed", action="store_true", help="only tests that failed or whose code changed since their last run")
+    parser.add_argument("--pytest", action="store_true", help="run through pytest's test_jest_execution instead")
+    args = parser.parse_args()
+    if args.pytest:
+        sys.exit(pytest.main(["-s", __file__]))
+    success, _ = run_jest_tests(args.files, args.changed)
+    sys.exit(0 if success else 1)
\ No newline at end of file
@@ -0,0 +1,181 @@
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+USER_DATA_DIR = r"C:\Users\Irika\AppData\Local\Google\Chrome\User Data"
+PROFILE_DIRECTORY = "Default"
+CLONE_BASE_DIR = 'D:\\Documents\\AutoSDLC\\chrome_profiles'
+
+# Large, regenerable caches that are not needed to keep the login
+SKIPPED_PROFILE_DIRS = ("Cache", "Code Cache", "GPUCache", "Service Worker", "DawnCache", "GrShaderCache", "ShaderCache")
+# Lock files a running Chrome holds open; Chrome creates them again in the clone
+PROFILE_LOCK_FILES = ("LOCK", "lockfile", "SingletonLock", "SingletonCookie", "SingletonSocket")
+# Attempts at a file Chrome has open, a second apart, before the clone fails
+PROFILE_COPY_ATTEMPTS = 5
+
+def session_count_from_env(name="GROK_SESSIONS", default=1):
+    value = os.getenv(name)
+    return max(1, int(value)) if value else default
+
+def copy_profile_file(source, destination):
+    """shutil.copy2 that waits out a file a running Chrome has locked, then fails naming it."""
+    for attempt in range(PROFILE_COPY_ATTEMPTS):
+        try:
+            return shutil.copy2(source, destination)
+        except PermissionError as e:
+            if attempt == PROFILE_COPY_ATTEMPTS - 1:
+                raise Exception(f"Cannot copy {source}, Chrome has it locked ({e}). Close the Chrome windows "
+                                f"using this profile, or clone before starting them, and try again") from e
+            time.sleep(1)
+
+def clone_profile(index, user_data_dir=USER_DATA_DIR, profile_directory=PROFILE_DIRECTORY, base_dir=CLONE_BASE_DIR):
+    """Copy the logged-in Chrome profile into its own user data dir.
+
+    "Local State" carries the key Chrome uses to decrypt the cookies, so it is
+    copied alongside the profile. Chrome's lock files are left out, and a
+    clone that fails part way is removed so the next call starts over.
+    Existing clones are reused as-is.
+    """
+    clone_dir = os.path.join(base_dir, f"session_{index}")
+    if os.path.isdir(os.path.join(clone_dir, profile_directory)):
+        return clone_dir
+    os.makedirs(clone_dir, exist_ok=True)
+    try:
+        local_state = os.path.join(user_data_dir, "Local State")
+        if os.path.exists(local_state):
+            copy_profile_file(local_state, clone_dir)
+        shutil.copytree(
+            os.path.join(user_data_dir, profile_directory),
+            os.path.join(clone_dir, profile_directory),
+            ignore=shutil.ignore_patterns(*SKIPPED_PROFILE_DIRS, *PROFILE_LOCK_FILES),
+            copy_function=copy_profile_file,
+            dirs_exist_ok=True
+        )
+    except Exception:
+        shutil.rmtree(clone_dir, ignore_errors=True)
+        raise
+    logging.info(f"Cloned Chrome profile to {clone_dir}")
+    return clone_dir
+
+def create_driver(user_data_dir=USER_DATA_DIR, profile_directory=PROFILE_DIRECTORY, download_dir=None):
+    chrome_options = Options()
+    chrome_options.add_argument(f"--user-data-dir={user_data_dir}")
+    chrome_options.add_argument(f"--profile-directory={profile_directory}")
+    if download_dir:
+        chrome_options.add_experimental_option("prefs", {
+            "download.default_directory": download_dir,
+            "download_prompt_for_download": False,
+            "download.directory_upgrade": True,
+            "safebrowsing.enabled": True
+        })
+    return webdriver.Chrome(options=chrome_options)
+
+class GrokSession:
+    """One browser plus the number of prompts sent in its current chat."""
+
+    def __init__(self, index, driver, lease=None):
+        self.index = index
+        self.driver = driver
+        self.lease = lease  # Set when the browser is leased from browser_daemon
+        self.prompt_count = 0
+        self.before_new_chat = None  # Called before the current chat is left, e.g. to export it
+
+class SessionPool:
+    """N Chrome sessions on cloned profiles that work through a queue of items.
+
+    An already open session (on the real profile) can be passed in as the
+    first one; the others are launched on clones in parallel.
+    """
+
+    def __init__(self, size, open_session, primary=None):
+        self.size = size
+        self.open_session = open_session
+        self.sessions = []
+        self.free = queue.Queue()
+        self._owned = []
+        self._lock = threading.Lock()
+        if primary is not None:
+            self.sessions.append(primary)
+            self.free.put(primary)
+
+    def _add(self, driver, owned, lease=None):
+        with self._lock:
+            session = GrokSession(len(self.sessions), driver, lease)
+            self.sessions.append(session)
+            if owned:
+                self._owned.append(session)
+        self.free.put(session)
+
+    def _launch(self, index):
+        from browser_daemon import lease_browser, release_browser  # browser_daemon imports this module
+        driver, lease = lease_browser() or (create_driver(clone_profile(index)), None)
+        try:
+            self.open_session(driver)
+        except Exception:
+            release_browser(driver, lease)
+            raise
+        self._add(driver, owned=True, lease=lease)
+        logging.info(f"Started Grok session {index}")
+
+    def start(self):
+        missing = range(len(self.sessions), self.size)
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, len(missing))) as executor:
+                for future in [executor.submit(self._launch, i) for i in missing]:
+                    future.result()
+        except Exception:
+            self.close()
+            raise
+        return self
+
+    @contextmanager
+    def session(self):
+        """Borrow a free session for the duration of the with block."""
+        session = self.free.get()
+        try:
+            yield session
+        finally:
+            self.free.put(session)
+
+    def map(self, func, items):
+        """Run func(session, item) on free sessions and return the results in item order."""
+        def run(item):
+            with self.session() as session:
+                return func(session, item)
+
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            return list(executor.map(run, items))
+
+    def close(self):
+        from browser_daemon import release_browser
+        for session in self._owned:
+            try:
+                release_browser(session.driver, session.lease)
+            except Exception as e:
+                logging.warning(f"Failed to close Grok session {session.index}: {e}")
+        self._owned = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+def run_on_sessions(primary, open_session, func, items, size=None):
+    """Run func(session, item) over items, N-way parallel when GROK_SESSIONS > 1.
+
+    Results come back in item order. With one session everything runs on the
+    primary session in the calling thread, exactly as before.
+    """
+    size = session_count_from_env() if size is None else size
+    if size > 1 and len(items) > 1:
+        with SessionPool(min(size, len(items)), open_session, primary=primary) as pool:
+            return pool.map(func, items)
+    return [func(primary, item) for item in items]
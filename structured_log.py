@@ -0,0 +1,182 @@
+import argparse
+import atexit
+import contextvars
+import gzip
+import hashlib
+import json
+import logging
+import os
+import queue
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_DIR = "D:\\Documents\\AutoSDLC\\logs"
+# Large payloads (responses, prompts, page sources), gzipped and named by the sha256 of their text
+BLOB_DIR = os.path.join(LOG_DIR, "blobs")
+# Bytes a log file may grow to before it is rotated (LOG_MAX_BYTES overrides), and how many rotated files are kept
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 5
+# Characters of payload kept inline in a record; longer payloads are written as blobs
+INLINE_PAYLOAD_LIMIT = 500
+
+_stage = contextvars.ContextVar("log_stage", default=None)
+_issue = contextvars.ContextVar("log_issue", default=None)
+_listener = None
+_handler = None
+
+def log_max_bytes_from_env():
+    return max(1024, int(os.getenv("LOG_MAX_BYTES", str(LOG_MAX_BYTES))))
+
+def blob_path(digest, blob_dir=BLOB_DIR):
+    return os.path.join(blob_dir, digest[:2], f"{digest}.gz")
+
+def store_blob(text, blob_dir=BLOB_DIR):
+    """Write text to the blob directory (once per distinct text) and return its sha256."""
+    data = text.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()
+    path = blob_path(digest, blob_dir)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return digest
+
+def read_blob(digest, blob_dir=BLOB_DIR):
+    with gzip.open(blob_path(digest, blob_dir), "rb") as f:
+        return f.read().decode("utf-8")
+
+@contextmanager
+def log_context(stage=None, issue=None):
+    """Tag every record logged in this block (on this thread) with stage and issue."""
+    tokens = [(var, var.set(value)) for var, value in ((_stage, stage), (_issue, issue)) if value is not None]
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+def log_event(event, message, duration=None, payload=None, level=logging.INFO, **data):
+    """Log message as a structured event; payload (a response, a page source) is kept out of the log line itself."""
+    logging.log(level, message, extra={"event": event, "duration": duration, "payload": payload, "data": data or None})
+
+class ContextFilter(logging.Filter):
+    """Copies the caller's log_context() onto the record before it leaves the caller's thread."""
+
+    def filter(self, record):
+        if getattr(record, "stage", None) is None:
+            record.stage = _stage.get()
+        if getattr(record, "issue", None) is None:
+            record.issue = _issue.get()
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, thread, stage, issue, event, duration, message.
+
+    A payload longer than INLINE_PAYLOAD_LIMIT is written to the blob
+    directory and replaced by {"blob": sha256, "chars": length}; this runs on
+    the listener thread, so compressing it costs the prompt loop nothing.
+    """
+
+    def __init__(self, stage, blob_dir=BLOB_DIR):
+        super().__init__()
+        self.stage = stage
+        self.blob_dir = blob_dir
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "thread": record.threadName,
+            "stage": getattr(record, "stage", None) or self.stage,
+            "issue": getattr(record, "issue", None),
+            "event": getattr(record, "event", None) or "log",
+            "message": record.getMessage(),
+        }
+        if getattr(record, "duration", None) is not None:
+            entry["duration"] = round(record.duration, 3)
+        if getattr(record, "data", None):
+            entry.update(record.data)
+        payload = getattr(record, "payload", None)
+        if payload is not None:
+            payload = str(payload)
+            if len(payload) > INLINE_PAYLOAD_LIMIT:
+                try:
+                    entry["payload"] = {"blob": store_blob(payload, self.blob_dir), "chars": len(payload)}
+                except OSError as e:
+                    entry["payload"] = {"blob": None, "chars": len(payload), "error": str(e)}
+            else:
+                entry["payload"] = payload
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+def setup_logging(stage, name=None, level=logging.INFO, console_format='%(levelname)s - %(message)s',
+                  log_dir=LOG_DIR):
+    """Log to logs/<name>.jsonl (rotated by size) and the console, both written by a background thread.
+
+    Callers only put records on a queue, so a slow disk or console never
+    holds up a prompt. Call once per process; later calls return the running
+    listener.
+    """
+    global _listener, _handler
+    if _listener is not None:
+        return _listener
+    os.makedirs(log_dir, exist_ok=True)
+    file_handler = RotatingFileHandler(os.path.join(log_dir, f"{name or stage}.jsonl"), maxBytes=log_max_bytes_from_env(),
+                                       backupCount=LOG_BACKUPS, encoding="utf-8", delay=True)
+    file_handler.setFormatter(JsonFormatter(stage, os.path.join(log_dir, "blobs")))
+    console = logging.StreamHandler()
+    console.setLevel(level)
+    console.setFormatter(logging.Formatter(console_format))
+
+    records = queue.SimpleQueue()
+    _handler = QueueHandler(records)
+    _handler.addFilter(ContextFilter())
+    root = logging.getLogger('')
+    root.setLevel(level)
+    root.addHandler(_handler)
+    _listener = QueueListener(records, file_handler, console, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+def stop_logging():
+    """Write out the queued records and stop the listener thread."""
+    global _listener, _handler
+    if _listener is None:
+        return
+    logging.getLogger('').removeHandler(_handler)
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener, _handler = None, None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Read the JSONL logs and the payload blobs they reference")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    show = subparsers.add_parser("show", help="print a payload blob")
+    show.add_argument("digest", help="sha256 from a record's payload.blob")
+    events = subparsers.add_parser("events", help="print a log's records, optionally only some")
+    events.add_argument("log", help="a .jsonl log file")
+    events.add_argument("--issue", help="only records of this issue, e.g. 'Issue #3'")
+    events.add_argument("--stage", help="only records of this stage")
+    events.add_argument("--event", help="only records of this event, e.g. response")
+    parser.add_argument("--log-dir", default=LOG_DIR, help="directory holding the logs and blobs/")
+    args = parser.parse_args()
+
+    if args.command == "show":
+        sys.stdout.write(read_blob(args.digest, os.path.join(args.log_dir, "blobs")))
+        sys.exit(0)
+    with open(args.log, "r", encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            if any(wanted and entry.get(field) != wanted
+                   for field, wanted in (("issue", args.issue), ("stage", args.stage), ("event", args.event))):
+                continue
+            duration = f" ({entry['duration']:.2f}s)" if "duration" in entry else ""
+            payload = entry.get("payload")
+            blob = f" [blob {payload['blob'][:12]}, {payload['chars']} chars]" if isinstance(payload, dict) else ""
+            print(f"{entry['time']} {entry['level']:<7} {entry['stage'] or '-'} {entry['issue'] or '-'} "
+                  f"{entry['event']}{duration}: {entry['message']}{blob}")
@@ -0,0 +1,94 @@
+import argparse
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+def sample_issues(count):
+    return [{"number": n, "title": f"Sample requirement {n}", "state": "open",
+             "updated_at": f"2025-01-{n:02d}T00:00:00Z"} for n in range(1, count + 1)]
+
+class StubGitHubHandler(BaseHTTPRequestHandler):
+    """Answers GET /repos/<owner>/<repo>/issues like the GitHub REST API.
+
+    Supports state, since, sort (created or updated), direction, per_page
+    and page, with a Link header to the next page and an ETag per response
+    that a matching If-None-Match turns into a 304.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        server = self.server
+        with server.lock:
+            server.requests.append({"path": url.path, "query": query, "headers": dict(self.headers)})
+            issues = [dict(issue) for issue in server.issues]
+        if not url.path.endswith("/issues"):
+            self._reply(404, {"message": "Not Found"})
+            return
+
+        state = query.get("state", "open")
+        issues = [issue for issue in issues if state == "all" or issue["state"] == state]
+        if "since" in query:
+            issues = [issue for issue in issues if issue["updated_at"] >= query["since"]]
+        field = "updated_at" if query.get("sort") == "updated" else "number"  # Numbers stand in for creation order
+        issues.sort(key=lambda issue: (issue[field], issue["number"]), reverse=query.get("direction", "desc") == "desc")
+
+        per_page = min(int(query.get("per_page", 30)), server.max_per_page)
+        page = int(query.get("page", 1))
+        body = json.dumps(issues[(page - 1) * per_page:page * per_page]).encode("utf-8")
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        headers = {"ETag": etag}
+        if page * per_page < len(issues):
+            next_url = f"http://{self.headers['Host']}{url.path}?{urlencode(dict(query, page=page + 1))}"
+            headers["Link"] = f'<{next_url}>; rel="next"'
+        self._reply(200, body, headers)
+
+    def _reply(self, status, payload, headers=None):
+        data = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_server(issues=(), port=0, max_per_page=100):
+    """Start the stand-in server on a background thread and return it.
+
+    server.issues can be edited between requests (under server.lock);
+    server.requests records every request's path, query and headers.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubGitHubHandler)
+    server.issues = [dict(issue) for issue in issues]
+    server.max_per_page = max_per_page
+    server.requests = []
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the GitHub issues API, for fetch_requirements.py --api-url")
+    parser.add_argument("--port", type=int, default=8021)
+    parser.add_argument("--issues", type=int, default=5, help="open sample issues to serve")
+    parser.add_argument("--max-per-page", type=int, default=100, help="cap on per_page, to exercise pagination")
+    args = parser.parse_args()
+    server = start_stub_server(sample_issues(args.issues), args.port, args.max_per_page)
+    print(f"Stub GitHub API listening on http://127.0.0.1:{server.server_port} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,157 @@
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Canned answers shaped like the ones the stage scripts parse
+PLANTUML_RESPONSE = """Here is the class diagram:
+
+```plantuml
+class Service {
+  +run(input: String): String
+}
+class Repository {
+  -items: Array
+  +save(item: Object): void
+}
+Service --> Repository : uses
+```
+
+The service delegates persistence to the repository."""
+
+CODE_RESPONSE = """Here is the implementation:
+
+```javascript
+class Service {
+  constructor(repository) {
+    this.repository = repository;
+  }
+
+  run(input) {
+    this.repository.save(input);
+    return input;
+  }
+}
+
+module.exports = { Service };
+```
+
+The repository is injected through the constructor, so it can be replaced by a mock in tests."""
+
+TEST_RESPONSE = """```javascript
+describe('Service', () => {
+  it('returns its input', () => {
+    const service = new Service({ save: jest.fn() });
+    expect(service.run('x')).toBe('x');
+  });
+});
+```
+
+The repository is replaced by a jest.fn() mock, so the test needs no storage."""
+
+def canned_response(prompt):
+    if "PlantUML code" in prompt:
+        return PLANTUML_RESPONSE
+    if "Jest" in prompt:
+        return TEST_RESPONSE
+    if "generate JavaScript code" in prompt:
+        return CODE_RESPONSE
+    if "[[BEGIN" in prompt:
+        keys = prompt.split(":", 1)[1].split("\n", 1)[0].strip().rstrip(".").split(", ")
+        return "\n".join(f"[[BEGIN {key}]]\nStub analysis of {key}.\n[[END {key}]]" for key in keys)
+    return f"Stub analysis: {prompt[:200]}"
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    """Answers POST /v1/chat/completions like an OpenAI-compatible API."""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive, so client connection pooling is exercised
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._reply(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+            request_number = server.request_count
+        if server.fail_every and request_number % server.fail_every == 0:
+            self._reply(503, {"error": {"message": "Stub server: simulated overload"}})
+            return
+
+        request = json.loads(body)
+        prompt = request["messages"][-1]["content"]
+        if server.latency:
+            time.sleep(server.latency)
+        content = canned_response(prompt)
+        if request.get("stream"):
+            self._stream(request_number, content)
+            return
+        if server.chunk_delay:
+            time.sleep(server.chunk_delay * len(content.splitlines()))  # Same generation time as when streamed
+        self._reply(200, {
+            "id": f"stub-{request_number}",
+            "object": "chat.completion",
+            "model": json.loads(body).get("model", "stub"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}]
+        })
+
+    def _reply(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, request_number, content):
+        """Send content as server-sent chat.completion.chunk events, one line per chunk_delay."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for line in content.splitlines(keepends=True):
+                self._send_event({"id": f"stub-{request_number}", "object": "chat.completion.chunk",
+                                  "choices": [{"index": 0, "delta": {"content": line}, "finish_reason": None}]})
+                if self.server.chunk_delay:
+                    time.sleep(self.server.chunk_delay)
+            self._send_event("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # The client stopped reading once it had what it needed
+
+    def _send_event(self, payload):
+        data = f"data: {payload if isinstance(payload, str) else json.dumps(payload)}\n\n".encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_server(port=0, latency=0.0, fail_every=0, chunk_delay=0.0):
+    """Start the stand-in server on a background thread and return it (server.server_port has the port)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubLLMHandler)
+    server.latency = latency
+    server.fail_every = fail_every
+    server.chunk_delay = chunk_delay
+    server.request_count = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for an OpenAI/xAI-compatible chat completions API")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to wait before each answer")
+    parser.add_argument("--fail-every", type=int, default=0, help="answer every Nth request with 503 to exercise retries")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="seconds per line of an answer, sent as it goes when streamed")
+    args = parser.parse_args()
+    server = start_stub_server(args.port, args.latency, args.fail_every, args.chunk_delay)
+    print(f"Stub LLM API listening on http://127.0.0.1:{server.server_port}/v1 (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,59 @@
+import pytest
+from fetch_requirements import create_session, sync_issues
+from stub_github_server import sample_issues, start_stub_server
+
+@pytest.fixture
+def github():
+    server = start_stub_server(sample_issues(5), max_per_page=2)
+    with create_session("stub-token") as session:
+        yield server, session, f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+def new_state():
+    return {"etag": None, "since": None, "issues": {}}
+
+def test_first_sync_follows_every_page(github):
+    server, session, api_url = github
+    state = new_state()
+    delta = sync_issues(session, state, api_url)
+
+    assert len(server.requests) == 3  # 5 issues, 2 per page
+    assert sorted(change["number"] for change in delta) == [1, 2, 3, 4, 5]
+    assert {change["change"] for change in delta} == {"new"}
+    assert state["since"] == "2025-01-05T00:00:00Z"
+    assert state["etag"]
+
+def test_unchanged_sync_stops_at_304(github):
+    server, session, api_url = github
+    state = new_state()
+    sync_issues(session, state, api_url)
+    sync_issues(session, state, api_url)  # First request with since, a new query and so a new ETag
+    requests_before = len(server.requests)
+
+    assert sync_issues(session, state, api_url) == []
+    assert len(server.requests) == requests_before + 1  # Page 1 answered 304, no more pages
+    assert server.requests[-1]["headers"]["If-None-Match"] == state["etag"]
+
+def test_since_delta_merges_edits_and_closes(github):
+    server, session, api_url = github
+    with server.lock:
+        for issue in server.issues[2:]:
+            issue["updated_at"] = "2025-02-01T00:00:00Z"  # Issues 3-5 bulk edited: the since query spans 2 pages
+    state = new_state()
+    sync_issues(session, state, api_url)
+    assert sync_issues(session, state, api_url) == []
+
+    with server.lock:
+        server.issues[2].update(title="Sample requirement 3, revised", updated_at="2025-02-02T00:00:00Z")
+    delta = sync_issues(session, state, api_url)
+    # Issue 3 sorts onto page 2 by number; the edit is only seen if page 1's ETag covers it
+    assert [(change["number"], change["change"]) for change in delta] == [(3, "edited")]
+    assert state["issues"]["3"]["title"] == "Sample requirement 3, revised"
+    assert state["since"] == "2025-02-02T00:00:00Z"
+
+    with server.lock:
+        server.issues[4].update(state="closed", updated_at="2025-02-03T00:00:00Z")
+    delta = sync_issues(session, state, api_url)
+    assert [(change["number"], change["change"]) for change in delta] == [(5, "closed")]
+    assert sorted(state["issues"], key=int) == ["1", "2", "3", "4"]
+    assert server.requests[-1]["query"]["state"] == "all"
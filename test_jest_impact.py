@@ -0,0 +1,37 @@
+import os
+from jest_runner import JestRun
+from jest_impact import ImportGraph
+
+def make_project(root):
+    for directory in ("src", "tests"):
+        os.makedirs(os.path.join(root, directory))
+    with open(os.path.join(root, "package.json"), "w") as f:
+        f.write("{}\n")
+    with open(os.path.join(root, "src", "Issue_1.js"), "w") as f:
+        f.write("module.exports = {};\n")
+    with open(os.path.join(root, "tests", "Issue_1.test.js"), "w") as f:
+        f.write("require('../src/Issue_1');\ntest('runs', () => {});\n")
+
+def jest_results(name, status="passed"):
+    return {"success": status == "passed",
+            "testResults": [{"name": name, "status": status,
+                             "assertionResults": [{"fullName": "runs", "status": status, "failureMessages": []}]}]}
+
+def test_record_run_keeps_project_paths(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    root = str(tmp_path / "project")
+    workspace = str(tmp_path / "sandboxes" / "Issue_1")
+    make_project(root)
+    graph = ImportGraph(root)
+    assert graph.changed_tests() == [graph.absolute("tests/Issue_1.test.js")]
+
+    # A run in a workspace outside the project, reported absolute or relative to that workspace
+    graph.record_run(JestRun(jest_results(os.path.join(workspace, "tests", "Issue_1.test.js")), 0.0, workspace))
+    assert graph.changed_tests() == []
+    graph.record_run(JestRun(jest_results("tests/Issue_1.test.js"), 0.0, workspace))
+    # Paths that name no test of the project are not recorded
+    graph.record_run(JestRun(jest_results(os.path.join(workspace, "..", "Issue_2", "tests", "Issue_2.test.js")), 0.0, root))
+    graph.record_run(JestRun(jest_results("src/Issue_1.js"), 0.0, root))
+    graph.close()
+
+    assert list(graph.runs.records) == ["tests/Issue_1.test.js"]
@@ -0,0 +1,41 @@
+import json
+import os
+import shutil
+import pytest
+from jest_runner import NODE_PATH
+from jest_sandbox import TestSandbox
+
+NODE_MODULES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "node_modules")
+
+pytestmark = pytest.mark.skipif(not shutil.which(NODE_PATH) or not os.path.isdir(os.path.join(NODE_MODULES, "jest")),
+                                reason="needs node and jest in node_modules")
+
+def make_project(root):
+    """A Jest project with one passing issue: src/Issue_1.js and tests/Issue_1.test.js."""
+    os.makedirs(os.path.join(root, "src"))
+    os.makedirs(os.path.join(root, "tests"))
+    os.symlink(NODE_MODULES, os.path.join(root, "node_modules"), target_is_directory=True)
+    with open(os.path.join(root, "package.json"), "w") as f:
+        json.dump({"name": "sandbox-fixture", "private": True, "jest": {"testEnvironment": "node"}}, f)
+    with open(os.path.join(root, "src", "Issue_1.js"), "w") as f:
+        f.write("module.exports = { add: (a, b) => a + b };\n")
+    with open(os.path.join(root, "tests", "Issue_1.test.js"), "w") as f:
+        f.write("const { add } = require('../src/Issue_1');\ntest('adds', () => { expect(add(1, 2)).toBe(3); });\n")
+    return os.path.join(root, "src", "Issue_1.js"), os.path.join(root, "tests", "Issue_1.test.js")
+
+def test_cached_run_reports_project_paths(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    root = str(tmp_path / "project")
+    src, test = make_project(root)
+    # The workspaces live outside the project, as they do in the system temp directory
+    sandbox = TestSandbox(root, workers=1, warm=False, sandbox_dir=str(tmp_path / "sandboxes"))
+    try:
+        first = sandbox.run(src, test)
+        second = sandbox.run(src, test)
+    finally:
+        sandbox.close()
+
+    assert (sandbox.misses, sandbox.hits) == (1, 1)
+    for run in (first, second):
+        assert run.success
+        assert [t["file"] for t in run.tests] == ["tests/Issue_1.test.js"]
@@ -0,0 +1,43 @@
+import os
+import shutil
+import subprocess
+import pytest
+from js_checker import NodeChecker
+from jest_runner import NODE_PATH
+
+pytestmark = pytest.mark.skipif(not shutil.which(NODE_PATH), reason="needs node")
+
+# Module-level idioms plain node loads without complaint
+NODE_IDIOMS = {
+    "cwd": "const root = process.cwd();\nmodule.exports = { root };",
+    "hrtime": "const start = process.hrtime();\nconst big = process.hrtime.bigint();\nmodule.exports = { start, big };",
+    "memory": "const { heapUsed } = process.memoryUsage();\nmodule.exports = { heapUsed };",
+    "stdout": "process.stdout.write('loading\\n');\nmodule.exports = { ok: true };",
+    "unref": "const sweep = setInterval(() => {}, 1000).unref();\nsetTimeout(() => {}, 10).unref();\n"
+             "clearInterval(sweep);\nmodule.exports = { sweep };",
+    "global": "global.cache = global.cache || {};\nglobalThis.count = 0;\nmodule.exports = { cache: global.cache };",
+    "env": "process.env.MODE = process.env.MODE || 'test';\nprocess.on('exit', () => {});\nmodule.exports = {};\n"
+           "module.exports.mode = process.env.MODE;",
+    "console": "console.table([{ a: 1 }]);\nconsole.time('load');\nconsole.timeEnd('load');\nmodule.exports = class {};",
+}
+
+@pytest.fixture(scope="module")
+def checker():
+    with NodeChecker() as checker:
+        yield checker
+
+@pytest.mark.parametrize("name", sorted(NODE_IDIOMS))
+def test_accepts_what_node_loads(name, checker, tmp_path):
+    path = tmp_path / f"{name}.js"
+    path.write_text(NODE_IDIOMS[name])
+    loaded = subprocess.run([NODE_PATH, "-e", f"require({str(path)!r})"], capture_output=True, text=True)
+    assert loaded.returncode == 0, loaded.stderr
+    assert checker.errors(NODE_IDIOMS[name], str(path)) == []
+
+def test_file_writes_do_not_happen(checker, tmp_path):
+    target = tmp_path / "written.txt"
+    source = (f"const fs = require('fs');\nfs.writeFileSync({str(target)!r}, 'x');\n"
+              f"fs.mkdirSync({str(tmp_path / 'made')!r});\nrequire('fs/promises').writeFile({str(target)!r}, 'x');\n"
+              f"module.exports = {{ here: fs.existsSync({str(tmp_path)!r}) }};")
+    assert checker.errors(source, str(tmp_path / "Issue_1.js")) == []
+    assert not os.path.exists(target) and not os.path.exists(tmp_path / "made")
@@ -0,0 +1,43 @@
+import pytest
+from plantuml_model import PlantUMLSyntaxError, parse_class_diagram
+
+def test_skips_skinparam_and_style_blocks():
+    diagram = parse_class_diagram("""@startuml
+skinparam class { BackgroundColor White }
+skinparam class {
+    BackgroundColor White
+    ArrowColor<<Entity>> Black
+}
+skinparam {
+    Shadowing false
+}
+<style>
+classDiagram {
+    class { LineColor blue }
+}
+</style>
+class Account {
+    +balance : number
+}
+@enduml""")
+    assert list(diagram.classes) == ["Account"]
+
+def test_unclosed_skinparam_block():
+    with pytest.raises(PlantUMLSyntaxError) as raised:
+        parse_class_diagram("class Account\nskinparam class {\n    BackgroundColor White\n")
+    assert [message for _, message in raised.value.errors] == ["skinparam block is never closed"]
+
+def test_arrows_and_comments_are_not_angle_brackets():
+    diagram = parse_class_diagram("""class Button {
+    +onClick : (event) => void
+    +compare(a, b) : boolean // a < b
+    +items : Map<string, Array<Item>>
+}""")
+    fields = {field.name: field.type for field in diagram.classes["Button"].fields}
+    assert fields == {"onClick": "(event) => void", "items": "Map<string, Array<Item>>"}
+    assert [method.name for method in diagram.classes["Button"].methods] == ["compare"]
+
+def test_unbalanced_angle_brackets():
+    with pytest.raises(PlantUMLSyntaxError) as raised:
+        parse_class_diagram("class Store {\n    +items : Map<string, Item\n}")
+    assert raised.value.errors == [(2, "unbalanced angle brackets in member `+items : Map<string, Item`")]